@@ -1,283 +1,273 @@
 # TTS_AI.py
 
-print("Getting things ready, this may take a while...")
-
-import torch
+import time
+STARTUP_T0 = time.perf_counter()
+
+# --- Synthesis Worker (frozen builds relaunch this executable as a worker; no window there) ---
+import sys
+import multiprocessing
+import synthesis_server
+multiprocessing.freeze_support() # PyInstaller: also runs multiprocessing's own helper processes
+if len(sys.argv) > 3 and sys.argv[1] == synthesis_server.WORKER_FLAG:
+    synthesis_server.worker_main(int(sys.argv[2]), sys.argv[3])
+    sys.exit(0)
+
+print("Getting things ready...")
+
+# The window is a thin client of speech_engine.SpeechEngine, which does the synthesis,
+# playback and file reading and can also run without it (python speech_engine.py speak ...).
+# Heavy stacks are deferred: torch/TTS load on a background thread after the window is up,
+# sounddevice with the model, and window_scanner (OCR/CV, pynput) when Scan is first opened.
+import os
 import tkinter as tk
-from tkinter import scrolledtext, ttk
-import sounddevice as sd
-import numpy as np
+from tkinter import filedialog, scrolledtext, ttk
 import threading
-import queue
-import pyautogui
-import time
-import re
 import keyboard
-import os
-import json 
 import program
+import event_bus
+import control_server
+import speech_engine
+from tracing import tracer
 
 from options import OptionsWindow
-import window_scanner 
-from window_scanner import select_window_area
-
-from TTS.api import TTS
 
-from program import app_settings, save_config, toggle_renpy_mode
+from program import app_settings, save_config
 
-# --- Configuration ---
-COMM_FILE = "tts_input.txt"
-TRIGGER_FILE = "tts_trigger.txt"
-CANCEL_FILE = "tts_cancel.txt"
+STARTUP_IMPORT_MS = (time.perf_counter() - STARTUP_T0) * 1000
 
-# --- Delete COMM_FILE at Startup ---
-try:
-    if os.path.exists(COMM_FILE):
-        os.remove(COMM_FILE)
-        print(f"Cleaned up old communication file: {COMM_FILE}")
-    if os.path.exists(CANCEL_FILE):
-        os.remove(CANCEL_FILE)
-    if os.path.exists(TRIGGER_FILE):
-        os.remove(TRIGGER_FILE)
-
-except Exception as e:
-    print(f"Error deleting startup files: {e}")
+# --- Legacy File Protocol: delete stale files at startup ---
+file_trigger_adapter = event_bus.FileTriggerAdapter()
+file_trigger_adapter.cleanup()
 
 # --- Globals and State Management ---
-audio_queue = queue.Queue()
-is_paused = False
-is_cancelled = False
-stream = None
-chunk_size = 1024
 last_read_normalized_text = ""
+document_paragraph = 0  # paragraph of the open file currently playing
 
 # --- Load Config on Startup ---
 program.load_config()
+app_settings = program.app_settings # load_config() rebinds the dict, so re-fetch it
 
-# initialization - THIS IS THE ONLY PLACE THE MODEL IS NOW INITIALIZED AT STARTUP
-device = "cuda" if torch.cuda.is_available() else "cpu"
-print(f"Using device: {device}")
+# --- Speech Engine (models, synthesis, playback; the model is loaded once the window is up) ---
+engine = speech_engine.SpeechEngine(app_settings, started_at=STARTUP_T0)
+startup_metrics = engine.metrics
+startup_metrics["import_ms"] = STARTUP_IMPORT_MS
 
-DEFAULT_MODEL = "tts_models/en/vctk/vits"
-DEFAULT_VOICE = "p243"
-tts = TTS(DEFAULT_MODEL, progress_bar=False).to(device) # FIRST AND ONLY TTS() CALL HERE
+DEFAULT_MODEL = speech_engine.DEFAULT_MODEL
+DEFAULT_VOICE = speech_engine.DEFAULT_VOICE
 
-VITS_ALLOWED_VOICES = ["p229", "p230", "p234", "p238", "p241", "p243", "p250", "p257", "p260"]
 
 # Removed load_word_list and AllowedWords - now in window_scanner.py
 
 
 # --- Text Processing Helpers ---
 
-def normalize_text(text):
-    """Cleans up text for reliable comparison."""
-    if not text:
-        return ""
-    text = text.strip()
-    text = ' '.join(text.split())
-    return text
+normalize_text = speech_engine.normalize_text
 
 # Removed clean_text_content, is_text_valid, and preprocess_text
 
 
-# --- Dedicated Speaker Function for File Triggers ---
+# --- Event Handlers (scanner, hotkeys and buttons publish on event_bus.bus) ---
+
+def show_text(text):
+    """Replaces the text box contents. Safe to call from any thread."""
+    def _update():
+        text_box.delete("1.0", tk.END)
+        if text:
+            text_box.insert("1.0", text)
+    root.after(0, _update)
 
-def process_and_speak_on_trigger():
+def on_speak_event(event):
     """
-    Reads the communication file (which contains text already cleaned/validated by the scanner),
-    checks for the trigger, and initiates speech if new, valid text is found.
+    Speaks text delivered on the bus (already cleaned/validated when it comes from the scanner).
     """
     global last_read_normalized_text
 
-    try:
-        # 1. Check for cancel file and process it
-        if os.path.exists(CANCEL_FILE):
-            cancel_playback()
-            last_read_normalized_text = ""
-            os.remove(CANCEL_FILE)
-            print(f"File-based cancellation processed. Guard reset.")
-        
-        # 2. Check for trigger file
-        trigger_exists = os.path.exists(TRIGGER_FILE)
-        
-        # 3. Read the cleaned text from the scanner
-        current_processed_text = ""
-        if os.path.exists(COMM_FILE):
-            with open(COMM_FILE, 'r', encoding='utf-8') as f:
-                current_processed_text = f.read().strip()
-        
-        # 4. Handle found text (Text is already cleaned and validated by window_scanner.py)
-        if current_processed_text:
-            
-            # Get normalized version for repetition check
-            current_normalized_text = normalize_text(current_processed_text)
-
-            # Check for repetition guard: clear guard if current text is the same
-            if current_normalized_text and current_normalized_text == last_read_normalized_text:
-                last_read_normalized_text = ""
-                
-            # Speak if it's new text (i.e., not a repeat and not empty)
-            if current_normalized_text and current_normalized_text != last_read_normalized_text:
-                print(f"Trigger detected. Speaking text: '{current_processed_text}'")
-                text_box.delete("1.0", tk.END)
-                text_box.insert("1.0", current_processed_text)
-                speak_text_streaming(current_processed_text)
-                last_read_normalized_text = current_normalized_text
-        else:
-             # If COMM_FILE is empty (meaning scanner found no valid text or timed out)
-             if last_read_normalized_text:
-                # Clear repetition guard and stop playback if something was currently speaking
-                cancel_playback()
-                last_read_normalized_text = ""
-                text_box.delete("1.0", tk.END)
-
-
-        # 5. Success! Remove the trigger if it existed.
-        if trigger_exists and os.path.exists(TRIGGER_FILE):
-            os.remove(TRIGGER_FILE)
-            print(f"Removed trigger file: {TRIGGER_FILE}")
-            
-    except Exception as e:
-        print(f"Error in process_and_speak_on_trigger: {e}")
-
-
-# --- TTS and Audio Functions (Remain the same) ---
-def load_model(model_name):
-    global tts
-    print(f"Loading model: {model_name}")
-    tts = TTS(model_name, progress_bar=False).to(device)
-
-    # Voices
-    if hasattr(tts, "speakers") and tts.speakers:
-        voices = list(tts.speakers)
-        if "vctk" in model_name:
-            voices = [v for v in voices if v in VITS_ALLOWED_VOICES]
-    elif hasattr(tts, "speaker_manager") and tts.speaker_manager is not None:
-        voices = tts.speaker_manager.speaker_ids
-    else:
-        voices = ["default"]
+    current_processed_text = event.text.strip()
+    current_normalized_text = normalize_text(current_processed_text)
 
-    # Languages
-    if hasattr(tts, "languages") and tts.languages:
-        languages = list(tts.languages)
-    else:
-        languages = ["default"]
+    # Check for repetition guard: clear guard if current text is the same
+    if current_normalized_text and current_normalized_text == last_read_normalized_text:
+        last_read_normalized_text = ""
 
-    print("Voices available:", voices)
-    print("Languages available:", languages)
+    # Speak if it's new text (i.e., not a repeat and not empty)
+    if current_normalized_text and current_normalized_text != last_read_normalized_text:
+        print(f"Speak event from {event.source or 'unknown'} ({event_bus.bus.last_latency_ms:.1f} ms): '{current_processed_text}'")
+        show_text(current_processed_text)
+        speak_text_streaming(current_processed_text)
+        last_read_normalized_text = current_normalized_text
 
-    return voices, languages
+def on_cancel_event(event):
+    global last_read_normalized_text
+    cancel_playback()
+    last_read_normalized_text = ""
+    print(f"Cancel event from {event.source or 'unknown'} processed. Guard reset.")
 
-def audio_callback(outdata, frames, time_, status):
-    global audio_queue, is_paused, is_cancelled
-    if status:
-        # Filter underflow messages if they are excessive, or keep them for debugging audio issues
-        if "underflow" not in str(status):
-            print(status)
-    outdata.fill(0)
+def on_text_update_event(event):
+    """Recognized text changed without a speak request; empty text means the scanner found nothing."""
+    global last_read_normalized_text
+    if not event.text and last_read_normalized_text:
+        cancel_playback()
+        last_read_normalized_text = ""
+        show_text("")
 
-    if is_cancelled:
-        return
 
-    if is_paused:
-        return
+# --- Speaking (speech_engine does the work; these keep the buttons in step) ---
 
-    idx = 0
-    while idx < frames:
-        try:
-            current_chunk = audio_queue.queue[0]
-        except IndexError:
-            break
-
-        remaining = len(current_chunk)
-        to_write = min(remaining, frames - idx)
-        outdata[idx:idx + to_write, 0] = current_chunk[:to_write]
-        if to_write < remaining:
-            audio_queue.queue[0] = current_chunk[to_write:]
-        else:
-            audio_queue.get()
-        idx += to_write
-
-def start_stream():
-    global stream
-    if stream is None:
-        stream = sd.OutputStream(
-            samplerate=22050,
-            channels=1,
-            callback=audio_callback,
-            blocksize=chunk_size
-        )
-        stream.start()
-
-def stop_stream():
-    global stream
-    if stream:
-        stream.stop()
-        stream.close()
-        stream = None
+def current_voice():
+    return {"model": model_var.get(), "voice": voice_var.get(), "lang": lang_var.get()}
 
 def speak_text_streaming(text_to_speak):
     """Accepts text and streams the TTS output."""
-    global is_paused, is_cancelled, audio_queue
-
     if not text_to_speak:
         return
+    engine.speak(text_to_speak, time.perf_counter(), **current_voice())
+    pause_button.config(text="Pause")
 
-    sentences = re.split(r'(?<=[.!?]) +', text_to_speak)
-
-    selected_model = model_var.get()
-    selected_voice = voice_var.get()
-    selected_lang = lang_var.get()
+def set_paused(paused):
+    engine.set_paused(paused)
+    pause_button.config(text="Resume" if paused else "Pause")
 
-    with audio_queue.mutex:
-        audio_queue.queue.clear()
-    is_paused = False
-    is_cancelled = False
+def pause_resume():
+    set_paused(not engine.is_paused)
 
+def cancel_playback():
+    engine.cancel()
     pause_button.config(text="Pause")
-    start_stream()
-
-    def tts_worker():
-        for sentence in sentences:
-            if is_cancelled:
-                break
-            kwargs = {}
-            if selected_voice != "default":
-                kwargs["speaker"] = selected_voice
-            if selected_lang != "default":
-                kwargs["language"] = selected_lang
-            try:
-                wav = tts.tts(text=sentence, **kwargs)
-                audio_queue.put(np.array(wav, dtype=np.float32))
-            except Exception as e:
-                print(f"TTS generation error for sentence '{sentence}': {e}")
-                break
-
-        if not is_cancelled:
-            while not audio_queue.empty():
-                time.sleep(0.1)
-            stop_stream()
-
-        print("TTS generation finished.")
-
-    threading.Thread(target=tts_worker, daemon=True).start()
 
-def pause_resume():
-    global is_paused
-    is_paused = not is_paused
-    pause_button.config(text="Resume" if is_paused else "Pause")
+def request_cancel(source):
+    """Cancel button/hotkey: goes through the bus so a running scan is stopped too."""
+    event_bus.bus.publish(event_bus.CANCEL, source=source)
 
-def cancel_playback():
-    global is_cancelled
-    is_cancelled = True
-    with audio_queue.mutex:
-        audio_queue.queue.clear()
-    stop_stream()
+# --- File Reading (paragraphs streamed from disk, see document_reader.py) ---
+
+def read_document(paragraph):
+    """Starts reading the open document at `paragraph`; a new speak request or Cancel stops it."""
+    document = engine.current_document
+    if document is None or len(document) == 0:
+        return
+    paragraph = max(0, min(paragraph, len(document) - 1))
+    show_paragraph(document, paragraph)
+    engine.read_document(paragraph, on_paragraph=lambda index: root.after(0, lambda: show_paragraph(document, index)),
+                         **current_voice())
     pause_button.config(text="Pause")
-    print("Playback cancelled.")
+
+def show_paragraph(document, paragraph):
+    """Shows the paragraph being read. Tk thread only."""
+    global document_paragraph
+    if document is not engine.current_document:
+        return
+    document_paragraph = paragraph
+    show_text(document.paragraph(paragraph))
+    reader_var.set(f"{os.path.basename(document.path)}: paragraph {paragraph + 1} of {len(document)}")
+    paragraph_entry.delete(0, tk.END)
+    paragraph_entry.insert(0, str(paragraph + 1))
+
+def open_document():
+    """Picks a text file, indexes it on a background thread, then reads from the remembered paragraph."""
+    path = filedialog.askopenfilename(title="Read File",
+                                      filetypes=[("Text files", "*.txt *.md"), ("All files", "*.*")])
+    if not path:
+        return
+    status_var.set(f"Opening {os.path.basename(path)}...")
+
+    def worker():
+        try:
+            document = engine.open_document(path)
+        except OSError as e:
+            root.after(0, lambda: status_var.set(f"Could not open {path}: {e}"))
+            return
+
+        def start():
+            status_var.set("")
+            for widget in (prev_paragraph_button, next_paragraph_button, paragraph_entry):
+                widget.config(state="normal")
+            read_document(engine.reading_positions.get(document))
+        root.after(0, start)
+
+    threading.Thread(target=worker, name="document-index", daemon=True).start()
+
+# --- Export to Audio File (offline rendering, see render.py) ---
+render_job = None
+
+def export_audio():
+    """
+    Renders the text box, or a chosen text file if the box is empty, to WAV/FLAC/OGG on a
+    background thread with its own worker processes. Pressing the button again stops it.
+    """
+    global render_job
+    if render_job is not None:
+        render_job.cancel()
+        return
+    import render # soundfile and the encoders are only needed here
+
+    text = text_box.get("1.0", tk.END).strip()
+    source = None
+    if not text:
+        source = filedialog.askopenfilename(title="Export Audio: text file to render",
+                                            filetypes=[("Text files", "*.txt *.md"), ("All files", "*.*")])
+        if not source:
+            return
+    out_path = filedialog.asksaveasfilename(title="Export Audio", defaultextension=".wav",
+                                            filetypes=[("WAV", "*.wav"), ("FLAC", "*.flac"), ("OGG Vorbis", "*.ogg")])
+    if not out_path:
+        return
+
+    def on_progress(stats):
+        root.after(0, lambda: status_var.set(f"Exporting: {stats['segments']} segments, {stats['audio_s']:.0f}s of audio, "
+                                             f"{stats['x_realtime']}x real time"))
+    try:
+        job = render.RenderJob(
+            render.segments_from_file(source) if source else render.segments_from_text(text),
+            out_path, model_var.get(), voice_var.get(), lang_var.get(),
+            processes=app_settings["render_processes"],
+            batch_size=app_settings["synthesis_batch_size"],
+            memory_budget_mb=app_settings["model_memory_budget_mb"],
+            on_progress=on_progress
+        )
+    except ValueError as e:
+        status_var.set(str(e))
+        return
+    render_job = job
+    export_button.config(text="Stop Export")
+    status_var.set("Exporting: loading the voice model...")
+
+    def worker():
+        try:
+            stats = job.run()
+            state = "Exported" if job.ok else "Export stopped:"
+            message = f"{state} {os.path.basename(out_path)} ({stats['audio_s']:.0f}s of audio in {stats['wall_s']:.0f}s, {stats['x_realtime']}x real time)"
+        except Exception as e:
+            message = f"Export failed: {e}"
+        print(f"{message} {job.stats()}")
+
+        def finish():
+            global render_job
+            render_job = None
+            export_button.config(text="Export")
+            status_var.set(message)
+        root.after(0, finish)
+
+    threading.Thread(target=worker, name="render", daemon=True).start()
+
+def seek_paragraph(paragraph):
+    # Starting a new reading supersedes the current one, like any speak request
+    if engine.current_document is not None:
+        read_document(paragraph)
+
+def on_paragraph_entry(event=None):
+    try:
+        seek_paragraph(int(paragraph_entry.get()) - 1)
+    except ValueError:
+        pass
 
 # --- GUI and Settings Management ---
 
+def apply_text_profile():
+    """Updates the scanner's text pipeline if the scanner is loaded; otherwise it reads config.json when opened."""
+    scanner = sys.modules.get("window_scanner")
+    if scanner is not None:
+        scanner.set_text_profile(app_settings["text_profile"], app_settings["renpy_mode"])
+
 def save_settings_callback(new_settings):
     global app_settings
     old_speak_key = app_settings["speak_hotkey"]
@@ -291,12 +281,21 @@ def save_settings_callback(new_settings):
 
     app_settings.update(new_settings)
     keyboard.add_hotkey(app_settings["speak_hotkey"], global_on_speak_key)
-    keyboard.add_hotkey(app_settings["cancel_hotkey"], cancel_playback)
+    keyboard.add_hotkey(app_settings["cancel_hotkey"], request_cancel, args=("cancel hotkey",))
     renpy_mode_var.set(app_settings["renpy_mode"])
     save_config(app_settings)
+    # Takes effect on the next scan, no restart needed
+    apply_text_profile()
     
     print(f"Hotkeys updated. Speak: '{app_settings['speak_hotkey']}', Cancel: '{app_settings['cancel_hotkey']}'")
 
+def toggle_renpy_mode():
+    """Renpy Mode checkbox: swaps the scanner's text pipeline and saves the setting."""
+    app_settings["renpy_mode"] = renpy_mode_var.get()
+    print(f"Renpy Mode set to: {app_settings['renpy_mode']}")
+    save_config(app_settings)
+    apply_text_profile()
+
 def open_options():
     OptionsWindow(master=root, current_settings=app_settings, save_callback=save_settings_callback)
 
@@ -328,11 +327,7 @@ model_frame.grid(row=0, column=0, padx=10)
 tk.Label(model_frame, text="Select Model:", bg=BG_COLOR, fg=FG_COLOR, font=("Arial", 10)).pack()
 model_var = tk.StringVar(value=DEFAULT_MODEL)
 model_dropdown = ttk.Combobox(model_frame, textvariable=model_var,
-                              values=[
-                                  "tts_models/en/ljspeech/tacotron2-DDC",
-                                  "tts_models/en/vctk/vits",
-                                  "tts_models/multilingual/multi-dataset/your_tts"
-                              ],
+                              values=speech_engine.MODELS,
                               state="readonly", font=("Arial", 10))
 model_dropdown.pack()
 
@@ -352,18 +347,49 @@ lang_dropdown = ttk.Combobox(lang_frame, textvariable=lang_var,
                              values=["default"], state="readonly", font=("Arial", 10))
 lang_dropdown.pack()
 
-def update_model(event=None):
-    # This function is now correctly used only when a NEW model is selected in the dropdown
-    voices, languages = load_model(model_var.get())
+# --- Model Loading Status ---
+status_var = tk.StringVar(value="")
+status_label = tk.Label(root, textvariable=status_var, bg=BG_COLOR, fg="#cccccc", font=("Arial", 10, "italic"))
+status_label.pack()
+
+def show_model_info(voices, languages):
     voice_dropdown["values"] = voices
-    if model_var.get() == DEFAULT_MODEL and DEFAULT_VOICE in voices:
-        voice_var.set(DEFAULT_VOICE)
-    elif voices:
-        voice_var.set(voices[0])
-    else:
-        voice_var.set("default")
+    voice_var.set(engine.voice)
     lang_dropdown["values"] = languages
-    lang_var.set(languages[0])
+    lang_var.set(engine.lang)
+
+def load_model_async(model_name, on_loaded=None):
+    """
+    Makes a model current on a background thread so the window stays responsive. Models already
+    in memory switch instantly; otherwise speech requested in the meantime waits for the load
+    (see SpeechEngine.speak_segments). `on_loaded` runs on the Tk thread afterwards.
+    """
+    if not engine.is_resident(model_name):
+        model_dropdown.config(state="disabled")
+        status_var.set(f"Loading voice model ({model_name.split('/')[-1]})... speech will start when it is ready.")
+
+    def worker():
+        try:
+            voices, languages = engine.load_model(model_name)
+        except Exception as e:
+            print(f"Error loading model '{model_name}': {e}")
+            root.after(0, lambda: (status_var.set(f"Could not load {model_name}: {e}"),
+                                   model_dropdown.config(state="readonly")))
+            return
+
+        def finish():
+            status_var.set("")
+            model_dropdown.config(state="readonly")
+            show_model_info(voices, languages)
+            if on_loaded:
+                on_loaded()
+        root.after(0, finish)
+
+    threading.Thread(target=worker, name="model-loader", daemon=True).start()
+
+def update_model(event=None, on_loaded=None):
+    # This function is now correctly used only when a NEW model is selected in the dropdown
+    load_model_async(model_var.get(), on_loaded)
 
 model_dropdown.bind("<<ComboboxSelected>>", update_model)
 
@@ -377,19 +403,13 @@ options_button.pack(side=tk.LEFT, padx=5)
 
 # Updated helper for Speak button to handle None safely
 def manual_speak():
-    # Write text from box to comm file to use the full processing pipeline
     text_from_box = text_box.get("1.0", tk.END).strip()
     if text_from_box:
         # Note: If manual text is entered here, it bypasses the cleaning/validation of the scanner.
         # This is expected for manual input.
-        with open(COMM_FILE, 'w', encoding='utf-8') as f:
-            f.write(text_from_box)
-        
-        # Explicitly call the process function
-        threading.Thread(target=process_and_speak_on_trigger, daemon=True).start()
+        event_bus.bus.publish(event_bus.SPEAK, text_from_box, source="speak button")
     else:
-        cancel_playback()
-        last_read_normalized_text = ""
+        event_bus.bus.publish(event_bus.CANCEL, source="speak button")
         text_box.delete("1.0", tk.END)
 
 
@@ -401,7 +421,7 @@ pause_button = tk.Button(action_buttons_frame, text="Pause", command=pause_resum
                          font=("Arial", 12), bg=BTN_ORANGE, fg="white", relief="flat", width=10)
 pause_button.pack(side=tk.LEFT, padx=5)
 
-cancel_button = tk.Button(action_buttons_frame, text="Cancel", command=cancel_playback,
+cancel_button = tk.Button(action_buttons_frame, text="Cancel", command=lambda: request_cancel("cancel button"),
                           font=("Arial", 12), bg=BTN_RED, fg="white", relief="flat", width=10)
 cancel_button.pack(side=tk.LEFT, padx=5)
 
@@ -415,18 +435,27 @@ def clear_text():
 def paste_text():
     try:
         clipboard_content = root.clipboard_get()
-        
-        # Write to COMM_FILE and explicitly trigger the processing
+
         # Note: This text is NOT cleaned/validated.
-        with open(COMM_FILE, 'w', encoding='utf-8') as f:
-            f.write(clipboard_content)
-            
-        threading.Thread(target=process_and_speak_on_trigger, daemon=True).start()
+        event_bus.bus.publish(event_bus.SPEAK, clipboard_content, source="paste")
 
     except tk.TclError:
         pass
 
-scan_button = tk.Button(utility_buttons_frame, text="Scan", command=select_window_area,
+def open_scanner():
+    """Imports the scanner (OCR/CV, pynput, word list) the first time Scan is pressed."""
+    if "window_scanner" not in sys.modules:
+        start = time.perf_counter()
+        previous_status = status_var.get()
+        status_var.set("Loading scanner...")
+        root.update_idletasks()
+        import window_scanner
+        startup_metrics["scanner_import_ms"] = (time.perf_counter() - start) * 1000
+        print(f"Scanner loaded in {startup_metrics['scanner_import_ms']:.0f} ms.")
+        status_var.set(previous_status)
+    sys.modules["window_scanner"].select_window_area()
+
+scan_button = tk.Button(utility_buttons_frame, text="Scan", command=open_scanner,
                          font=("Arial", 12), bg=BTN_SCAN, fg="white", relief="flat", width=10)
 scan_button.pack(side=tk.LEFT, padx=5)
 
@@ -438,6 +467,36 @@ paste_button = tk.Button(utility_buttons_frame, text="Paste", command=paste_text
                          font=("Arial", 12), bg="#555555", fg="white", relief="flat", width=10)
 paste_button.pack(side=tk.LEFT, padx=5)
 
+read_file_button = tk.Button(utility_buttons_frame, text="Read File", command=open_document,
+                             font=("Arial", 12), bg="#555555", fg="white", relief="flat", width=10)
+read_file_button.pack(side=tk.LEFT, padx=5)
+
+export_button = tk.Button(utility_buttons_frame, text="Export", command=export_audio,
+                          font=("Arial", 12), bg="#555555", fg="white", relief="flat", width=10)
+export_button.pack(side=tk.LEFT, padx=5)
+
+# --- File Reading Controls ---
+reader_frame = tk.Frame(root, bg=BG_COLOR)
+reader_frame.pack(pady=(0, 5))
+
+prev_paragraph_button = tk.Button(reader_frame, text="< Paragraph", state="disabled",
+                                  command=lambda: seek_paragraph(document_paragraph - 1),
+                                  font=("Arial", 10), bg="#444444", fg="white", relief="flat")
+prev_paragraph_button.pack(side=tk.LEFT, padx=5)
+
+paragraph_entry = tk.Entry(reader_frame, width=7, state="disabled", font=("Arial", 10),
+                           bg=ENTRY_BG, fg=FG_COLOR, insertbackground="white", justify="center")
+paragraph_entry.bind("<Return>", on_paragraph_entry)
+paragraph_entry.pack(side=tk.LEFT)
+
+next_paragraph_button = tk.Button(reader_frame, text="Paragraph >", state="disabled",
+                                  command=lambda: seek_paragraph(document_paragraph + 1),
+                                  font=("Arial", 10), bg="#444444", fg="white", relief="flat")
+next_paragraph_button.pack(side=tk.LEFT, padx=5)
+
+reader_var = tk.StringVar(value="")
+tk.Label(reader_frame, textvariable=reader_var, bg=BG_COLOR, fg="#cccccc", font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+
 # --- Renpy Mode Checkbox ---
 renpy_frame = tk.Frame(root, bg=BG_COLOR)
 renpy_frame.pack(side=tk.LEFT, padx=10, pady=(0, 10), anchor='sw')
@@ -450,91 +509,115 @@ renpy_mode_check = tk.Checkbutton(renpy_frame, text="Renpy Mode", variable=renpy
 renpy_mode_check.pack(side=tk.LEFT, padx=10)
 
 
-# Initialize (FIX IMPLEMENTED HERE: Removed the redundant update_model() call)
-# Instead of calling update_model(), we directly set the initial dropdown values 
-# from the already loaded global 'tts' object.
-
-# Voices
-if hasattr(tts, "speakers") and tts.speakers:
-    initial_voices = list(tts.speakers)
-    if "vctk" in DEFAULT_MODEL:
-        initial_voices = [v for v in initial_voices if v in VITS_ALLOWED_VOICES]
-elif hasattr(tts, "speaker_manager") and tts.speaker_manager is not None:
-    initial_voices = tts.speaker_manager.speaker_ids
-else:
-    initial_voices = ["default"]
-
-# Languages
-if hasattr(tts, "languages") and tts.languages:
-    initial_languages = list(tts.languages)
-else:
-    initial_languages = ["default"]
-
-voice_dropdown["values"] = initial_voices
-# Ensure the default voice is set if it's available
-if DEFAULT_VOICE in initial_voices:
-    voice_var.set(DEFAULT_VOICE)
-elif initial_voices:
-    voice_var.set(initial_voices[0])
-else:
-    voice_var.set("default")
-    
-lang_dropdown["values"] = initial_languages
-lang_var.set(initial_languages[0])
+# Initialize: the window is built, now load the default model in the background,
+# then keep the other configured models resident for instant switching
+def preload_models():
+    engine.preload(app_settings["preload_models"])
 
-print("Voices available:", initial_voices)
-print("Languages available:", initial_languages)
+load_model_async(DEFAULT_MODEL, on_loaded=preload_models)
 
 
 # --- Hotkey Functions ---
 def global_on_speak_key():
     """
     Called by the 'speak_hotkey' (usually Ctrl+C).
-    It copies, writes the text to the COMM_FILE, and explicitly triggers processing.
+    It copies the selection and publishes it as a speak event.
     """
     try:
-        cancel_playback()
+        event_bus.bus.publish(event_bus.CANCEL, source="speak hotkey")
         # Assume the hotkey itself (e.g., Ctrl+C) handles the copy action.
         time.sleep(0.1)
 
         clipboard_content = root.clipboard_get()
 
-        # Write the clipboard text to the communication file
         # Note: This text is NOT cleaned/validated.
-        with open(COMM_FILE, 'w', encoding='utf-8') as f:
-            f.write(clipboard_content)
-        
-        # Then, manually call the process function in a new thread
-        threading.Thread(target=process_and_speak_on_trigger, daemon=True).start()
-
+        event_bus.bus.publish(event_bus.SPEAK, clipboard_content, source="speak hotkey")
 
     except Exception as e:
         print("Error copying selected text:", e)
 
 keyboard.add_hotkey(app_settings["speak_hotkey"], global_on_speak_key)
-keyboard.add_hotkey(app_settings["cancel_hotkey"], cancel_playback)
+keyboard.add_hotkey(app_settings["cancel_hotkey"], request_cancel, args=("cancel hotkey",))
+
+# --- Event Bus Wiring ---
+tracer.probe("event_queue", event_bus.bus.queue_depth)
+event_bus.bus.subscribe(event_bus.SPEAK, on_speak_event)
+event_bus.bus.subscribe(event_bus.CANCEL, on_cancel_event)
+event_bus.bus.subscribe(event_bus.TEXT_UPDATE, on_text_update_event)
 
-# --- File Watching Logic (Minimal Check) ---
+# --- Legacy File Watching (compatibility adapter, off by default) ---
 
 def minimal_trigger_check():
     """
-    Minimal polling check for the trigger file existence.
-    Scheduled at a low frequency (e.g., 500ms) to avoid lag while enabling 
-    inter-process communication from the scanner.
+    Polls the old trigger/cancel files and republishes them on the event bus.
+    Only runs when 'file_ipc_compat' is enabled, e.g. for a window_scanner.py started on its own.
     """
-    # CRITICAL: This is the ONLY polling/loop in the program now. It is lightweight.
-    
-    # 1. Check for trigger file
-    if os.path.exists(TRIGGER_FILE):
-        # Trigger found, start the heavy work in a separate thread
-        # The thread will check for the cancel file, process the text, and remove the trigger file.
-        print("Minimal check detected trigger. Starting speech process...")
-        threading.Thread(target=process_and_speak_on_trigger, daemon=True).start()
-
-    # 2. Reschedule the check (500ms is half a second, very lightweight)
-    root.after(500, minimal_trigger_check)
+    file_trigger_adapter.poll(event_bus.bus)
+    root.after(app_settings["file_watch_interval"], minimal_trigger_check)
+
+
+if app_settings["file_ipc_compat"]:
+    root.after(app_settings["file_watch_interval"], minimal_trigger_check)
+
+# --- Local Control API (external speak/cancel/pause/set-voice) ---
+
+def control_speak(request):
+    text = request.get("text")
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("'speak' needs a non-empty 'text' string")
+    event_bus.bus.publish(event_bus.SPEAK, text, source="control")
+
+def control_cancel(request):
+    event_bus.bus.publish(event_bus.CANCEL, source="control")
+
+def control_pause(request):
+    paused = request.get("paused")
+    if paused is not None and not isinstance(paused, bool):
+        raise ValueError("'paused' must be true or false")
+    root.after(0, lambda: set_paused(not engine.is_paused if paused is None else paused))
+
+def apply_voice_settings(model=None, voice=None, language=None):
+    """Switches model/voice/language from outside the GUI. Runs on the Tk thread."""
+    if model and model != model_var.get():
+        if model not in model_dropdown["values"]:
+            print(f"Control: unknown model '{model}'")
+            return
+        model_var.set(model)
+        # Voice/language lists change with the model, so apply those once it has loaded
+        update_model(on_loaded=lambda: apply_voice_settings(None, voice, language))
+        return
+    if voice:
+        if voice in voice_dropdown["values"]:
+            voice_var.set(voice)
+        else:
+            print(f"Control: voice '{voice}' not available for {model_var.get()}")
+    if language:
+        if language in lang_dropdown["values"]:
+            lang_var.set(language)
+        else:
+            print(f"Control: language '{language}' not available for {model_var.get()}")
 
+def control_set_voice(request):
+    model, voice, language = request.get("model"), request.get("voice"), request.get("language")
+    if not any(isinstance(v, str) and v for v in (model, voice, language)):
+        raise ValueError("'set-voice' needs at least one of 'voice', 'model' or 'language'")
+    root.after(0, lambda: apply_voice_settings(model, voice, language))
 
-# Start the minimal trigger check loop
-root.after(500, minimal_trigger_check) # <--- ADDED LINE: Start the periodic check
-root.mainloop()
\ No newline at end of file
+if app_settings["control_server_enabled"]:
+    try:
+        control = control_server.ControlServer({
+            "speak": control_speak,
+            "cancel": control_cancel,
+            "pause": control_pause,
+            "set-voice": control_set_voice,
+        }, port=app_settings["control_server_port"])
+        control.start()
+    except OSError as e:
+        print(f"Could not start control server: {e}")
+
+def report_gui_ready():
+    startup_metrics["gui_ready_ms"] = (time.perf_counter() - STARTUP_T0) * 1000
+    print(f"Window ready in {startup_metrics['gui_ready_ms']:.0f} ms (imports {STARTUP_IMPORT_MS:.0f} ms).")
+
+root.after_idle(report_gui_ready)
+root.mainloop()
@@ -0,0 +1,221 @@
+# audio_cache.py
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# --- Configuration ---
+CACHE_DIR = "audio_cache"
+DEFAULT_MEMORY_LIMIT_MB = 64
+DEFAULT_DISK_LIMIT_MB = 512
+CACHE_FILE_EXT = ".npy"
+
+
+# --- Key Helpers ---
+
+def normalize_sentence(sentence):
+    """Collapses whitespace so trivially different OCR/clipboard text shares one entry."""
+    if not sentence:
+        return ""
+    return ' '.join(sentence.split())
+
+
+def make_cache_key(sentence, model_name, speaker, language):
+    """Hashes everything that changes the synthesized waveform into a stable file-safe key."""
+    parts = [normalize_sentence(sentence), model_name or "", speaker or "default", language or "default"]
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def _to_pcm16(wav):
+    """Float waveform (-1..1) -> int16 PCM. Half the size of float32 and plenty for speech."""
+    wav = np.asarray(wav, dtype=np.float32)
+    return (np.clip(wav, -1.0, 1.0) * 32767.0).astype(np.int16)
+
+
+def _to_float32(pcm):
+    return pcm.astype(np.float32) * (1.0 / 32767.0)
+
+
+# --- Cache ---
+
+class AudioCache:
+    """
+    Two-level LRU cache for synthesized sentences.
+    Level 1 keeps int16 arrays in memory, level 2 keeps them as .npy files in CACHE_DIR.
+    Both levels are bounded by size in bytes and evict the least recently used entry first.
+    """
+    def __init__(self, cache_dir=CACHE_DIR, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB,
+                 disk_limit_mb=DEFAULT_DISK_LIMIT_MB, enabled=True):
+        self.cache_dir = cache_dir
+        self.memory_limit = int(memory_limit_mb * 1024 * 1024)
+        self.disk_limit = int(disk_limit_mb * 1024 * 1024)
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> int16 array
+        self._memory_bytes = 0
+        self._disk = OrderedDict()    # key -> file size in bytes (oldest first)
+        self._disk_bytes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.enabled and self.disk_limit > 0:
+            self._scan_disk()
+
+    def _path_for(self, key):
+        return os.path.join(self.cache_dir, key + CACHE_FILE_EXT)
+
+    def _scan_disk(self):
+        """Rebuilds the disk index from the cache folder, oldest access first."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entries = []
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith(CACHE_FILE_EXT):
+                        st = entry.stat()
+                        entries.append((st.st_mtime, entry.name[:-len(CACHE_FILE_EXT)], st.st_size))
+            entries.sort()
+            for _, key, size in entries:
+                self._disk[key] = size
+                self._disk_bytes += size
+            print(f"Audio cache: {len(self._disk)} cached sentences on disk ({self._disk_bytes / 1048576:.1f} MB).")
+            self._evict_disk()
+        except Exception as e:
+            print(f"Audio cache: error scanning '{self.cache_dir}': {e}")
+
+    # --- Eviction (call with lock held) ---
+
+    def _evict_memory(self):
+        while self._memory_bytes > self.memory_limit and self._memory:
+            _, pcm = self._memory.popitem(last=False)
+            self._memory_bytes -= pcm.nbytes
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.disk_limit and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(self._path_for(key))
+            except OSError:
+                pass
+
+    def _remember(self, key, pcm):
+        if pcm.nbytes > self.memory_limit:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old.nbytes
+        self._memory[key] = pcm
+        self._memory_bytes += pcm.nbytes
+        self._evict_memory()
+
+    # --- Public API ---
+
+    def get(self, key):
+        """Returns the cached waveform as float32, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            pcm = self._memory.get(key)
+            if pcm is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return _to_float32(pcm)
+            on_disk = key in self._disk
+
+        if on_disk:
+            path = self._path_for(key)
+            try:
+                pcm = np.load(path, allow_pickle=False)
+                os.utime(path)  # mtime doubles as the LRU timestamp across restarts
+            except Exception as e:
+                print(f"Audio cache: dropping unreadable entry {key}: {e}")
+                with self._lock:
+                    size = self._disk.pop(key, None)
+                    if size is not None:
+                        self._disk_bytes -= size
+                pcm = None
+
+            if pcm is not None:
+                with self._lock:
+                    if key in self._disk:
+                        self._disk.move_to_end(key)
+                    self._remember(key, pcm)
+                    self.hits += 1
+                    self.disk_hits += 1
+                return _to_float32(pcm)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, wav):
+        """Stores a freshly synthesized waveform in memory and on disk."""
+        if not self.enabled:
+            return
+
+        pcm = _to_pcm16(wav)
+        with self._lock:
+            self._remember(key, pcm)
+            if self.disk_limit <= 0 or key in self._disk:
+                return
+
+        # Unique temp file: lookahead can synthesize a repeated sentence ("Yes.") on two threads at once
+        path = self._path_for(key)
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, pcm, allow_pickle=False)
+            size = os.path.getsize(tmp_path)
+            with self._lock:
+                if key not in self._disk: # the other writer may have won meanwhile
+                    os.replace(tmp_path, path)
+                    tmp_path = None
+                    self._disk[key] = size
+                    self._disk_bytes += size
+                    self._evict_disk()
+        except Exception as e:
+            print(f"Audio cache: error writing {path}: {e}")
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def clear(self):
+        """Empties both levels and deletes the cached files."""
+        with self._lock:
+            keys = list(self._disk)
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._disk.clear()
+            self._disk_bytes = 0
+        for key in keys:
+            try:
+                os.remove(self._path_for(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "memory_mb": round(self._memory_bytes / 1048576, 2),
+                "disk_entries": len(self._disk),
+                "disk_mb": round(self._disk_bytes / 1048576, 2),
+            }
@@ -0,0 +1,108 @@
+# batch_synthesis.py
+# -*- coding: utf-8 -*-
+
+import weakref
+
+import numpy as np
+
+import model_manager
+
+# --- Configuration ---
+DEFAULT_BATCH_SIZE = 4
+MAX_LENGTH_RATIO = 1.6   # longest/shortest sentence in one batch; keeps padding waste low
+MAX_BATCH_CHARS = 1200   # bounds the padded input (and activation memory) of one forward pass
+
+_unbatchable = weakref.WeakSet() # models whose batched call failed once; never retried
+
+
+def iter_batches(sentences, max_batch=DEFAULT_BATCH_SIZE, max_length_ratio=MAX_LENGTH_RATIO,
+                 max_chars=MAX_BATCH_CHARS):
+    """
+    Groups consecutive sentences into batches of similar length, keeping their order so the
+    audio can still be streamed. The first sentence always goes alone, so playback starts
+    after one sentence's worth of inference rather than a whole batch.
+    """
+    batch = []
+    shortest = longest = 0
+    first = True
+    for sentence in sentences:
+        length = max(1, len(sentence))
+        if batch:
+            fits = (len(batch) < max_batch
+                    and max(longest, length) <= max_length_ratio * min(shortest, length)
+                    and max(longest, length) * (len(batch) + 1) <= max_chars)
+            if not fits:
+                yield batch
+                batch = []
+        if not batch:
+            shortest = longest = length
+        batch.append(sentence)
+        shortest, longest = min(shortest, length), max(longest, length)
+        if first or max_batch <= 1:
+            first = False
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def supports_batching(tts):
+    """True for end-to-end VITS models (one forward pass, no separate vocoder) that have not failed before."""
+    synthesizer = getattr(tts, "synthesizer", None)
+    model = getattr(synthesizer, "tts_model", None)
+    return (model is not None and type(model).__name__ == "Vits" and hasattr(model, "tokenizer")
+            and getattr(synthesizer, "vocoder_model", None) is None and tts not in _unbatchable)
+
+
+def _vits_batch(tts, sentences, voice, lang):
+    import torch
+
+    synthesizer = tts.synthesizer
+    model = synthesizer.tts_model
+    device = next(model.parameters()).device
+
+    language_id = None
+    if lang != "default" and getattr(model, "language_manager", None) is not None:
+        language_id = model.language_manager.name_to_id[lang]
+
+    ids = [model.tokenizer.text_to_ids(s, language=language_id) for s in sentences]
+    lengths = torch.tensor([len(i) for i in ids], dtype=torch.long, device=device)
+    x = torch.zeros((len(ids), int(lengths.max())), dtype=torch.long, device=device)
+    for row, token_ids in enumerate(ids):
+        x[row, :len(token_ids)] = torch.tensor(token_ids, dtype=torch.long, device=device)
+
+    aux_input = {"x_lengths": lengths, "speaker_ids": None, "d_vectors": None, "language_ids": None}
+    if voice != "default" and getattr(model, "speaker_manager", None) is not None:
+        if getattr(model.args, "use_d_vector_file", False):
+            embedding = model.speaker_manager.get_mean_embedding(voice, num_samples=None, randomize=False)
+            aux_input["d_vectors"] = torch.tensor(np.array(embedding), dtype=torch.float32, device=device).repeat(len(ids), 1)
+        else:
+            speaker_id = model.speaker_manager.name_to_id[voice]
+            aux_input["speaker_ids"] = torch.full((len(ids),), speaker_id, dtype=torch.long, device=device)
+    if language_id is not None:
+        aux_input["language_ids"] = torch.full((len(ids),), language_id, dtype=torch.long, device=device)
+
+    with torch.no_grad():
+        outputs = model.inference(x, aux_input=aux_input)
+
+    # Outputs are padded to the longest item; y_mask marks each item's real frames
+    wavs = outputs["model_outputs"]
+    frames = outputs["y_mask"].sum(dim=(1, 2)).long().tolist()
+    samples_per_frame = wavs.shape[-1] // outputs["y_mask"].shape[-1]
+    return [wavs[row, 0, :frames[row] * samples_per_frame].float().cpu().numpy() for row in range(len(ids))]
+
+
+def synthesize_batch(tts, sentences, voice, lang):
+    """
+    Returns one float32 waveform per sentence. Batchable models get a single padded forward
+    pass; everything else (or a batch of one) falls back to one tts.tts() call per sentence.
+    """
+    if len(sentences) > 1 and supports_batching(tts):
+        try:
+            return _vits_batch(tts, sentences, voice, lang)
+        except Exception as e:
+            _unbatchable.add(tts)
+            print(f"Batch synthesis unavailable for this model ({type(e).__name__}: {e}); using single sentences.")
+
+    kwargs = model_manager.synthesis_kwargs(voice, lang)
+    return [np.asarray(tts.tts(text=s, **kwargs), dtype=np.float32) for s in sentences]
@@ -0,0 +1,65 @@
+# bench_batch_synthesis.py
+# -*- coding: utf-8 -*-
+
+"""
+Batch synthesis benchmark: sentences/sec and real-time factor (inference seconds per second
+of audio) of one tts.tts() call per sentence vs length-bucketed batches, on the cleaned
+Ren'Py corpus. Needs torch and Coqui TTS; the model is downloaded on first use.
+
+    python benchmarks/bench_batch_synthesis.py [--model tts_models/en/vctk/vits] [--voice p243] [--sizes 1 2 4 8]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch_synthesis
+import model_manager
+import synthesis_pipeline
+import text_normalizer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def run(tts, sentences, batch_size, voice, lang, sample_rate):
+    pipeline = synthesis_pipeline.SynthesisPipeline(
+        synthesize=lambda s: batch_synthesis.synthesize_batch(tts, [s], voice, lang)[0],
+        synthesize_batch=lambda batch: batch_synthesis.synthesize_batch(tts, batch, voice, lang),
+        batch_size=batch_size,
+        sentences=sentences,
+        on_audio=lambda wav: None,
+        lookahead=1,
+        sample_rate=sample_rate
+    )
+    start = time.perf_counter()
+    pipeline.run()
+    stats = pipeline.stats()
+    stats["wall_s"] = round(time.perf_counter() - start, 2)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="tts_models/en/vctk/vits")
+    parser.add_argument("--voice", default="p243")
+    parser.add_argument("--lang", default="default")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with open(os.path.join(HERE, "renpy_corpus.txt"), "r", encoding="utf-8") as f:
+        sentences = [text_normalizer.clean(line.strip().replace("\\n", "\n"), True) for line in f if line.strip()]
+    sentences = [s for s in sentences if s.strip()]
+
+    tts = model_manager.load_tts_model(args.model, model_manager.default_device())
+    model_manager.warm_up_model(args.model, tts)
+    sample_rate = tts.synthesizer.output_sample_rate
+    print(f"{args.model}: batching {'supported' if batch_synthesis.supports_batching(tts) else 'not supported (single calls)'}, "
+          f"{len(sentences)} sentences")
+
+    for size in args.sizes:
+        stats = run(tts, sentences, size, args.voice, args.lang, sample_rate)
+        print(f"batch {size}: {stats['sentences_per_s']:6.2f} sentences/s   RTF {stats.get('rtf', 0):.3f}   "
+              f"({stats['batches']} forward passes, {stats['wall_s']}s)")
@@ -0,0 +1,128 @@
+# bench_clean_text.py
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmark: the old multi-pass clean_text_content against the compiled rule table
+in text_normalizer. Also checks that both produce identical output on the corpus and on
+randomly generated OCR-like noise.
+
+    python benchmarks/bench_clean_text.py [--repeat 200] [--fuzz 200000]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import text_normalizer
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "renpy_corpus.txt")
+
+
+# --- Reference: clean_text_content as it was before the rule table ---
+
+def collapse_repeats(match):
+    return match.group(1) + (match.group(2) if match.group(2) else "")
+
+vocalizations = {"A": "Ah", "O": "Oh", "H": "Hhh", "E": "Ehh", "U": "Uhh"}
+def replace_vocal(match):
+    word = match.group(0)
+    return vocalizations.get(word, word)
+
+def reference_clean_text_content(text, renpy_mode):
+    if not text:
+        return ""
+
+    if renpy_mode:
+        text = text.replace('\n', ' ')
+        text = re.sub(r'^\s*".*?"\s*', '', text, flags=re.MULTILINE)
+        text = re.sub(r'^\s*[^:]+:\s*', '', text, flags=re.MULTILINE)
+        text = text.strip()
+
+        text = text.replace("|", "I")
+        text = text.replace("$", "s")
+        text = text.replace("[", "I")
+        text = text.replace("]", "I")
+        text = text.replace("{", "I")
+        text = text.replace("}", "I")
+        text = text.replace("@", "0")
+        text = text.replace("sigh", "")
+        text = text.replace("whisper", "")
+        text = re.sub(r'\bOoh\b', 'Oh', text, flags=re.IGNORECASE)
+        text = re.sub(r'(?i)(?<=([a-z]))0|0(?=([a-z]))', 'o', text)
+
+    text = re.sub(r'oz', 'ounces', text, flags=re.IGNORECASE)
+    text = re.sub(r'\b(\w)(\1+)?', collapse_repeats, text)
+    text = re.sub(r'\b[A-Za-z]-', '', text)
+    text = re.sub(r'\b[A-Z]\b', replace_vocal, text)
+    text = re.sub(r'\b[mM]{1,3}\b', '', text)
+    text = re.sub(r'\.{2,}', '.', text)
+    text = re.sub(r'\b[.,!?]\b', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    text = re.sub(r'\*', '', text)
+    return text
+
+
+# --- Helpers ---
+
+def load_corpus():
+    with open(CORPUS_FILE, "r", encoding="utf-8") as f:
+        # OCR output arrives with real newlines; the corpus stores them as "\n"
+        return [line.rstrip("\n").replace("\\n", "\n") for line in f if line.strip()]
+
+FUZZ_ALPHABET = (list("aAbmMoOzZhHeEuUIs0123 .,!?:-*\"'|$[]{}@\n\t\r\x0b\x0c\x1c  ")
+                 + ["sigh", "whisper", "Ooh", "oz", "Speaker: ", "\"Name\" ", "...", "mmm", "M0"])
+
+def fuzz_lines(count, seed=1234):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(FUZZ_ALPHABET) for _ in range(rng.randint(0, 40))) for _ in range(count)]
+
+def check_identical(lines):
+    mismatches = 0
+    for line in lines:
+        for renpy_mode in (True, False):
+            expected = reference_clean_text_content(line, renpy_mode)
+            got = text_normalizer.clean(line, renpy_mode)
+            if expected != got:
+                mismatches += 1
+                if mismatches <= 5:
+                    print(f"MISMATCH (renpy_mode={renpy_mode}) {line!r}\n  expected {expected!r}\n  got      {got!r}")
+    return mismatches
+
+def time_per_line(func, lines, renpy_mode, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            func(line, renpy_mode)
+    return (time.perf_counter() - start) / (repeat * len(lines)) * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="passes over the corpus per timing")
+    parser.add_argument("--fuzz", type=int, default=200000, help="random lines for the identity check")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    mismatches = check_identical(corpus) + check_identical(fuzz_lines(args.fuzz))
+    print(f"Identity check: {len(corpus)} corpus lines + {args.fuzz} fuzz lines, {mismatches} mismatches")
+
+    for renpy_mode in (True, False):
+        old_us = time_per_line(reference_clean_text_content, corpus, renpy_mode, args.repeat)
+        new_us = time_per_line(text_normalizer.clean, corpus, renpy_mode, args.repeat)
+        print(f"renpy_mode={renpy_mode!s:5}  old {old_us:7.2f} us/line   new {new_us:7.2f} us/line   speedup {old_us / new_us:4.2f}x")
+
+    # Per-stage cost of each built-in profile
+    for profile in text_normalizer.PROFILES:
+        pipeline = text_normalizer.build_pipeline(profile, path=None, timed=True)
+        for _ in range(args.repeat):
+            for line in corpus:
+                pipeline(line)
+        stages = ", ".join(f"{name} {s['avg_us']:.2f}" for name, s in pipeline.stats().items())
+        print(f"{profile:10} us/line per stage: {stages}")
+
+    sys.exit(1 if mismatches else 0)
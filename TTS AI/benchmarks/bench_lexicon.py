@@ -0,0 +1,93 @@
+# bench_lexicon.py
+# -*- coding: utf-8 -*-
+
+"""
+Lexicon benchmark: load time of the old Python set vs the mapped lexicon, exact and fuzzy
+lookup cost, and how many OCR-damaged corpus lines each validator still accepts.
+
+    python benchmarks/bench_lexicon.py [--words ../top_words.txt]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lexicon
+import text_normalizer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STRIP = '.,?!:;"\'()[]{}'
+
+# Typical Tesseract confusions on game fonts
+OCR_CONFUSIONS = [("m", "rn"), ("l", "I"), ("o", "0"), ("e", "c"), ("h", "b"), ("i", "l"), ("a", "o")]
+
+
+def load_set(path):
+    words = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            word = line.strip().lower()
+            if word:
+                words.add(word)
+    return words
+
+def damage(line, rng):
+    """Applies one OCR confusion to every word longer than three letters."""
+    words = []
+    for word in line.split():
+        if len(word) > 3:
+            old, new = rng.choice(OCR_CONFUSIONS)
+            if old in word:
+                word = word.replace(old, new, 1)
+        words.append(word)
+    return " ".join(words)
+
+def valid_exact(words, text):
+    return any(w.strip(STRIP) in words for w in text.lower().split())
+
+def valid_fuzzy(lex, text, max_distance=1, min_length=4):
+    tokens = [w.strip(STRIP) for w in text.lower().split()]
+    if any(t in lex for t in tokens):
+        return True
+    return any(len(t) >= min_length and lex.lookup(t, max_distance) for t in tokens)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", default=os.path.join(os.path.dirname(HERE), "top_words.txt"))
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    word_set = load_set(args.words)
+    set_ms = (time.perf_counter() - start) * 1000
+
+    lexicon.open_lexicon(args.words) # make sure the compiled file exists
+    start = time.perf_counter()
+    lex = lexicon.open_lexicon(args.words)
+    lex_ms = (time.perf_counter() - start) * 1000
+    print(f"Load: set {set_ms:.2f} ms, mapped lexicon {lex_ms:.2f} ms ({len(lex)} words)")
+
+    sample = lexicon.read_word_list(args.words)[::25]
+    start = time.perf_counter()
+    for word in sample:
+        lex.rank(word + "#") # uncached misses
+    exact_us = (time.perf_counter() - start) / len(sample) * 1e6
+    start = time.perf_counter()
+    for word in sample:
+        lex.lookup(word[:-1] + "q" if len(word) > 3 else word, 1)
+    fuzzy_us = (time.perf_counter() - start) / len(sample) * 1e6
+    print(f"Lookup: exact (uncached) {exact_us:.1f} us, fuzzy distance 1 {fuzzy_us:.1f} us")
+
+    with open(os.path.join(HERE, "renpy_corpus.txt"), "r", encoding="utf-8") as f:
+        corpus = [text_normalizer.clean(line.strip(), True) for line in f if line.strip()]
+    rng = random.Random(7)
+    damaged = [damage(line, rng) for line in corpus for _ in range(5)]
+    # Only lines that lost every exact match show the difference
+    hard = [line for line in damaged if not valid_exact(word_set, line)]
+    accepted = sum(valid_fuzzy(lex, line) for line in hard)
+    print(f"Damaged lines rejected by exact matching: {len(hard)} of {len(damaged)}; "
+          f"accepted by fuzzy matching: {accepted}")
@@ -0,0 +1,80 @@
+# bench_spell_correct.py
+# -*- coding: utf-8 -*-
+
+"""
+Spell-correction benchmark: per-line cost of SpellCorrector on the cleaned Ren'Py corpus,
+both clean and with typical OCR confusions injected, and how many damaged words it restores.
+Cold = fresh corrector for every pass (no token cache), warm = one corrector for the whole run.
+
+    python benchmarks/bench_spell_correct.py [--repeat 50]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lexicon
+import spell_correct
+import text_normalizer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+INJECTED = [("m", "rn"), ("l", "I"), ("o", "0"), ("d", "cl"), ("i", "l"), ("h", "b"), ("s", "5")]
+
+
+def damage(line, rng, lex):
+    """Applies one OCR confusion to each known word longer than two letters."""
+    damaged, expected = [], []
+    for word in line.split():
+        new = word
+        if len(word) > 2 and word.lower() in lex:
+            seen, ocr = rng.choice(INJECTED)
+            if seen in word:
+                new = word.replace(seen, ocr, 1)
+        damaged.append(new)
+        expected.append(word)
+    return " ".join(damaged), " ".join(expected)
+
+def time_lines(lines, lex, repeat, warm):
+    corrector = spell_correct.SpellCorrector(lex)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        if not warm:
+            corrector = spell_correct.SpellCorrector(lex)
+        for line in lines:
+            corrector.correct(line)
+    return (time.perf_counter() - start) / (repeat * len(lines)) * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    lex = lexicon.open_lexicon(os.path.join(os.path.dirname(HERE), "top_words.txt"))
+    with open(os.path.join(HERE, "renpy_corpus.txt"), "r", encoding="utf-8") as f:
+        clean_lines = [text_normalizer.clean(line.strip().replace("\\n", "\n"), True) for line in f if line.strip()]
+
+    rng = random.Random(3)
+    pairs = [damage(line, rng, lex) for line in clean_lines]
+    damaged_lines = [d for d, _ in pairs]
+
+    for name, lines in (("clean", clean_lines), ("damaged", damaged_lines)):
+        cold = time_lines(lines, lex, args.repeat, warm=False)
+        warm = time_lines(lines, lex, args.repeat, warm=True)
+        print(f"{name:8} lines: cold {cold:7.1f} us/line   warm {warm:6.1f} us/line")
+
+    corrector = spell_correct.SpellCorrector(lex)
+    damaged_words = restored = 0
+    for damaged, expected in pairs:
+        got = corrector.correct(damaged).split()
+        for d, e, g in zip(damaged.split(), expected.split(), got):
+            if d != e:
+                damaged_words += 1
+                restored += g.lower() == e.lower()
+    unchanged = sum(corrector.correct(line) == line for line in clean_lines)
+    print(f"Restored {restored} of {damaged_words} damaged words; {unchanged} of {len(clean_lines)} clean lines left untouched")
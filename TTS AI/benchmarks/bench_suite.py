@@ -0,0 +1,375 @@
+# bench_suite.py
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark suite for the scan-to-speech and text-to-speech paths. Results are written as one
+JSON document so runs can be kept and compared across changes.
+
+    text   clean_text_content / is_text_valid throughput on the Ren'Py corpus
+    ocr    grab_and_ocr latency on the screenshots in benchmarks/fixtures (via ArrayCapture)
+    rtf    real-time factor of tts.tts() for each model in the model dropdown
+    ttfa   time to first audio of a speak request, played into a null audio sink
+
+    python benchmarks/bench_suite.py [--only text ocr] [-o results.json] [--compare previous.json]
+
+JSON goes to stdout (or -o); progress and the modules' own prints go to stderr. A stage whose
+dependencies are missing (ocr needs PIL/pynput/keyboard and Tesseract,
+rtf/ttfa need torch and Coqui TTS; text needs nothing beyond the repo) is reported as skipped with the reason. --compare exits
+with status 1 if any timing got worse than --tolerance.
+"""
+
+import argparse
+import contextlib
+import datetime
+import gc
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+import text_normalizer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPUS_FILE = os.path.join(HERE, "renpy_corpus.txt")
+FIXTURE_DIR = os.path.join(HERE, "fixtures")
+STAGES = ("text", "ocr", "rtf", "ttfa")
+STRIP = '.,?!:;"\'()[]{}'
+
+
+# --- Helpers ---
+
+def load_corpus():
+    with open(CORPUS_FILE, "r", encoding="utf-8") as f:
+        return [line.strip().replace("\\n", "\n") for line in f if line.strip()]
+
+def clean_sentences(limit=None):
+    sentences = [text_normalizer.clean(line, True) for line in load_corpus()]
+    sentences = [s for s in sentences if s.strip()]
+    return sentences[:limit] if limit else sentences
+
+def summarize(samples):
+    """mean/p50/p90/max of a list of numbers, rounded for the report."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": round(pick(0.5), 3),
+        "p90": round(pick(0.9), 3),
+        "max": round(ordered[-1], 3),
+    }
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+@contextlib.contextmanager
+def stdout_to_stderr():
+    """Sends everything printed to stdout, including by worker processes, to stderr."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+
+
+# --- Stages ---
+
+def bench_text(args):
+    import text_validation
+
+    start = time.perf_counter()
+    text_validation.get_allowed_words()
+    text_validation.get_text_pipeline()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    lines = load_corpus()
+    clean_us, valid_us = [], []
+    valid = 0
+    for repeat in range(args.repeat):
+        for line in lines:
+            t0 = time.perf_counter()
+            cleaned = text_validation.clean_text_content(line)
+            t1 = time.perf_counter()
+            ok = text_validation.is_text_valid(cleaned)
+            t2 = time.perf_counter()
+            clean_us.append((t1 - t0) * 1e6)
+            valid_us.append((t2 - t1) * 1e6)
+            if repeat == 0:
+                valid += ok
+    return {
+        "lines": len(lines),
+        "repeat": args.repeat,
+        "profile": text_validation.get_text_pipeline().name,
+        "lexicon_load_ms": round(load_ms, 2),
+        "clean_us": summarize(clean_us),
+        "valid_us": summarize(valid_us),
+        "clean_lines_per_s": round(len(clean_us) / (sum(clean_us) / 1e6), 1),
+        "valid_lines_per_s": round(len(valid_us) / (sum(valid_us) / 1e6), 1),
+        "valid_lines": valid,
+    }
+
+def word_accuracy(expected, recognized):
+    """Share of the expected words that appear in the OCR output (order ignored)."""
+    words = [w.strip(STRIP).lower() for w in expected.split()]
+    found = {w.strip(STRIP).lower() for w in recognized.split()}
+    words = [w for w in words if w]
+    return sum(w in found for w in words) / len(words) if words else 1.0
+
+def bench_ocr(args):
+    import cv2
+    import capture_backend
+    import ocr_backend
+    import window_scanner
+
+    paths = sorted(glob.glob(os.path.join(args.fixtures, "*.png")))
+    if not paths:
+        raise FileNotFoundError(f"no *.png fixtures in {args.fixtures} (run make_ocr_fixtures.py)")
+    if args.tesseract:
+        window_scanner.tesseract_path = args.tesseract
+
+    # ArrayCapture hands out the fixtures in order, one per grab
+    capture = capture_backend.ArrayCapture(paths)
+    window_scanner.set_capture_backend(capture)
+    start = time.perf_counter()
+    window_scanner.get_ocr_backend()
+    ocr_init_ms = (time.perf_counter() - start) * 1000
+
+    grab_ms, total_ms, accuracy = [], [], []
+    for repeat in range(args.ocr_repeat):
+        for path, frame in zip(paths, capture.frames):
+            rect = (0, 0, frame.shape[1], frame.shape[0])
+            t0 = time.perf_counter()
+            window_scanner.grab_mask(rect)
+            t1 = time.perf_counter()
+            text, _ = window_scanner.grab_and_ocr(rect)
+            t2 = time.perf_counter()
+            if text.startswith(("Tesseract Error", "OCR Runtime Error", "Capture Error")):
+                raise ocr_backend.OcrEngineNotFound(text)
+            grab_ms.append((t1 - t0) * 1000)
+            total_ms.append((t2 - t1) * 1000)
+            expected_path = os.path.splitext(path)[0] + ".txt"
+            if repeat == 0 and os.path.exists(expected_path):
+                with open(expected_path, "r", encoding="utf-8") as f:
+                    accuracy.append(word_accuracy(f.read(), text))
+    return {
+        "fixtures": len(paths),
+        "repeat": args.ocr_repeat,
+        "ocr_backend": window_scanner.get_ocr_backend().name,
+        "ocr_init_ms": round(ocr_init_ms, 1),
+        "capture_mask_ms": summarize(grab_ms),
+        "grab_and_ocr_ms": summarize(total_ms),
+        "word_accuracy": round(sum(accuracy) / len(accuracy), 3) if accuracy else None,
+    }
+
+def bench_rtf(args):
+    import model_manager
+    import speech_engine
+
+    device = model_manager.default_device()
+    sentences = clean_sentences(args.sentences)
+    results = {"device": device, "sentences": len(sentences), "models": {}}
+    for model_name in args.models or speech_engine.MODELS:
+        log(f"rtf: {model_name}")
+        try:
+            start = time.perf_counter()
+            tts = model_manager.load_tts_model(model_name, device)
+            load_s = time.perf_counter() - start
+            start = time.perf_counter()
+            model_manager.warm_up_model(model_name, tts)
+            warm_up_s = time.perf_counter() - start
+
+            voices, languages = model_manager.describe_model(tts, model_name, verbose=False)
+            voice = speech_engine.DEFAULT_VOICE if speech_engine.DEFAULT_VOICE in voices else voices[0]
+            kwargs = model_manager.synthesis_kwargs(voice, languages[0])
+            sample_rate = model_manager.output_sample_rate(tts)
+
+            synth_s = audio_s = 0.0
+            chars = 0
+            for sentence in sentences:
+                start = time.perf_counter()
+                wav = tts.tts(text=sentence, **kwargs)
+                synth_s += time.perf_counter() - start
+                audio_s += len(wav) / sample_rate
+                chars += len(sentence)
+            results["models"][model_name] = {
+                "voice": voice,
+                "sample_rate": sample_rate,
+                "load_s": round(load_s, 2),
+                "warm_up_s": round(warm_up_s, 3),
+                "synth_s": round(synth_s, 3),
+                "audio_s": round(audio_s, 2),
+                "rtf": round(synth_s / audio_s, 4) if audio_s else None,
+                "chars_per_s": round(chars / synth_s, 1) if synth_s else None,
+            }
+            del tts
+        except Exception as e:
+            results["models"][model_name] = {"error": f"{type(e).__name__}: {e}"}
+        gc.collect() # one model at a time, like the app's memory budget would
+    return results
+
+def bench_ttfa(args):
+    import program
+    import speech_engine
+
+    settings = dict(program.DEFAULT_SETTINGS, audio_cache_enabled=False,
+                    synthesis_processes=args.processes)
+    engine = speech_engine.SpeechEngine(settings, audio_output="null")
+    try:
+        start = time.perf_counter()
+        engine.load_model(args.model)
+        load_s = time.perf_counter() - start
+
+        # Whole corpus lines, as they would arrive from the scanner or the clipboard
+        texts = clean_sentences(args.utterances)
+        ttfa_ms, rtf = [], []
+        for text in texts:
+            engine.last_ttfa_ms = engine.last_stats = None
+            thread = engine.speak(text)
+            thread.join()
+            if engine.last_ttfa_ms is None:
+                raise RuntimeError("no audio was produced (see the log above)")
+            ttfa_ms.append(engine.last_ttfa_ms)
+            if engine.last_stats and engine.last_stats.get("rtf") is not None:
+                rtf.append(engine.last_stats["rtf"])
+        return {
+            "model": args.model,
+            "voice": engine.voice,
+            "processes": args.processes,
+            "utterances": len(texts),
+            "load_s": round(load_s, 2),
+            "first_ttfa_ms": round(ttfa_ms[0], 1),
+            "ttfa_ms": summarize(ttfa_ms[1:] or ttfa_ms),
+            "rtf": round(sum(rtf) / len(rtf), 4) if rtf else None,
+            "underflows": engine.audio_ring.underflows,
+        }
+    finally:
+        engine.close()
+
+STAGE_FUNCTIONS = {"text": bench_text, "ocr": bench_ocr, "rtf": bench_rtf, "ttfa": bench_ttfa}
+
+
+# --- Comparing Runs ---
+
+def flatten(value, prefix=""):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten(item, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, value
+
+def direction(path):
+    """+1 if higher is better, -1 if lower is better, 0 for counts and settings."""
+    parts = path.split(".")
+    if parts[-1] == "stage_s": # includes downloads and imports; too noisy to judge
+        return 0
+    if any(p.endswith("per_s") or p.endswith("accuracy") for p in parts):
+        return 1
+    if any(p.endswith(("_ms", "_us", "_s")) or p == "rtf" for p in parts):
+        return -1
+    return 0
+
+def compare(previous, current, tolerance):
+    """Logs every metric that moved by more than `tolerance`; returns the regressions."""
+    old = dict(flatten(previous.get("results", {})))
+    regressions = []
+    for path, value in flatten(current.get("results", {})):
+        sign = direction(path)
+        before = old.get(path)
+        if not sign or not before:
+            continue
+        change = (value - before) / abs(before)
+        if abs(change) <= tolerance:
+            continue
+        worse = change * sign < 0
+        log(f"{'REGRESSION' if worse else 'improved  '} {path}: {before} -> {value} ({change:+.0%})")
+        if worse:
+            regressions.append(path)
+    return regressions
+
+
+# --- Main ---
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run_suite(args):
+    report = {
+        "suite": "neuro-speak",
+        "format": 1,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": {},
+    }
+    for stage in args.only or STAGES:
+        log(f"--- {stage} ---")
+        start = time.perf_counter()
+        try:
+            # The scanner and the engine print diagnostics; keep stdout for the JSON
+            with stdout_to_stderr():
+                result = STAGE_FUNCTIONS[stage](args)
+        except (ImportError, OSError) as e:
+            result = {"skipped": f"{type(e).__name__}: {e}"}
+        except Exception as e:
+            result = {"error": f"{type(e).__name__}: {e}"}
+        result["stage_s"] = round(time.perf_counter() - start, 2)
+        report["results"][stage] = result
+        log(json.dumps(result))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=STAGES, help="stages to run (default: all)")
+    parser.add_argument("-o", "--output", default="-", help="JSON file to write ('-' = stdout)")
+    parser.add_argument("--compare", help="earlier JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="relative change ignored by --compare")
+    parser.add_argument("--repeat", type=int, default=20, help="text: passes over the corpus")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="ocr: folder of *.png screenshots (+ .txt)")
+    parser.add_argument("--ocr-repeat", type=int, default=5, help="ocr: passes over the fixtures")
+    parser.add_argument("--tesseract", help="ocr: path to tesseract.exe")
+    parser.add_argument("--models", nargs="+", help="rtf: models to time (default: the model dropdown)")
+    parser.add_argument("--sentences", type=int, default=10, help="rtf: corpus sentences per model")
+    parser.add_argument("--model", default="tts_models/en/vctk/vits", help="ttfa: model to speak with")
+    parser.add_argument("--utterances", type=int, default=8, help="ttfa: speak requests")
+    parser.add_argument("--processes", type=int, default=1, help="ttfa: synthesis processes (0 = in-process)")
+    args = parser.parse_args()
+
+    # Relative paths in the app (config.json, top_words.txt, caches) resolve from its folder
+    output = args.output if args.output == "-" else os.path.abspath(args.output)
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+    args.fixtures = os.path.abspath(args.fixtures)
+    os.chdir(APP_DIR)
+
+    report = run_suite(args)
+    document = json.dumps(report, indent=2)
+    if output == "-":
+        print(document)
+    else:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(document + "\n")
+        log(f"Wrote {output}")
+
+    if compare_path:
+        with open(compare_path, "r", encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        log(f"{len(regressions)} regression(s) against {compare_path}")
+        sys.exit(1 if regressions else 0)
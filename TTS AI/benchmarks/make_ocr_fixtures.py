@@ -0,0 +1,55 @@
+# make_ocr_fixtures.py
+# -*- coding: utf-8 -*-
+
+"""
+Writes the synthetic subtitle screenshots in benchmarks/fixtures/ used by bench_suite.py:
+white dialogue text over a dark gradient with a coloured speaker name (which the white-text
+mask must drop), as in a Ren'Py text box. Each NAME.png gets a NAME.txt with the dialogue,
+so OCR accuracy can be scored. Real screenshots can be added next to them the same way.
+
+    python benchmarks/make_ocr_fixtures.py
+"""
+
+import os
+import textwrap
+
+import cv2
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(HERE, "fixtures")
+
+WIDTH, HEIGHT = 960, 200
+FONT = cv2.FONT_HERSHEY_DUPLEX
+WRAP_CHARS = 52
+
+FIXTURES = [
+    ("Monika", "Ah, hello there. Did you need something?"),
+    ("Eileen", "Once you add a story, pictures, and music, you can release it to the world!"),
+    ("Natsuki", "It's not like I made them for you or anything..."),
+    ("Yuri", "I was just reading. This book is a little unsettling, but I can't put it down."),
+    ("Sylvie", "Are you going to ask me that question?"),
+    ("Sayori", "I overslept again! Wait for me, I will be there in five minutes."),
+]
+
+
+def draw_fixture(speaker, text, seed):
+    rng = np.random.default_rng(seed)
+    top, bottom = rng.integers(20, 70, 3), rng.integers(50, 110, 3)
+    ramp = np.linspace(0.0, 1.0, HEIGHT)[:, None, None]
+    image = (top + (bottom - top) * ramp).astype(np.uint8).repeat(WIDTH, axis=1)
+
+    cv2.putText(image, speaker, (24, 36), FONT, 0.9, (200, 120, 255), 2, cv2.LINE_AA)
+    for row, line in enumerate(textwrap.wrap(text, WRAP_CHARS)):
+        cv2.putText(image, line, (24, 84 + row * 40), FONT, 1.0, (255, 255, 255), 2, cv2.LINE_AA)
+    return image
+
+
+if __name__ == "__main__":
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for index, (speaker, text) in enumerate(FIXTURES, start=1):
+        name = os.path.join(FIXTURE_DIR, f"subtitle_{index:02d}")
+        cv2.imwrite(name + ".png", draw_fixture(speaker, text, index), [cv2.IMWRITE_PNG_COMPRESSION, 9])
+        with open(name + ".txt", "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Wrote {name}.png")
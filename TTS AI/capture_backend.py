@@ -0,0 +1,144 @@
+# capture_backend.py
+# -*- coding: utf-8 -*-
+
+import itertools
+import threading
+
+import numpy as np
+
+# --- White Text Thresholds (HSV, same as the old cv2.inRange call) ---
+LOWER_WHITE = np.array([0, 0, 180], dtype=np.uint8)
+UPPER_WHITE = np.array([179, 70, 255], dtype=np.uint8)
+
+
+class WhiteMasker:
+    """
+    Computes the white-text mask straight from the captured frame into reusable buffers.
+    OpenCV's BGR2HSV accepts 3- or 4-channel input, and V/S do not depend on channel order
+    (only hue does, which is unrestricted), so RGB, BGR and BGRA frames all work without
+    an intermediate colour conversion or per-frame allocation.
+    The returned mask is overwritten by the next call on the same thread; copy it to keep it.
+    """
+    def __init__(self):
+        import cv2
+
+        self._cv2 = cv2
+        self._local = threading.local()
+
+    def _buffers(self, shape):
+        local = self._local
+        if getattr(local, "shape", None) != shape:
+            local.shape = shape
+            local.hsv = np.empty(shape + (3,), dtype=np.uint8)
+            local.mask = np.empty(shape, dtype=np.uint8)
+        return local
+
+    def compute(self, frame):
+        b = self._buffers(frame.shape[:2])
+        self._cv2.cvtColor(frame, self._cv2.COLOR_BGR2HSV, dst=b.hsv)
+        self._cv2.inRange(b.hsv, LOWER_WHITE, UPPER_WHITE, dst=b.mask)
+        return b.mask
+
+
+# --- Capture Backends ---
+
+class CaptureBackend:
+    """Grabs a screen region (x1, y1, x2, y2) as an HxWx3 or HxWx4 uint8 array."""
+    name = "base"
+
+    def grab(self, rect):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MssCapture(CaptureBackend):
+    """
+    Fast native grabber (GDI BitBlt on Windows, XShm on Linux) through mss.
+    Returns a zero-copy BGRA view over the grabbed bytes; no PIL image is built.
+    """
+    name = "mss"
+
+    def __init__(self):
+        import mss # optional dependency
+
+        self._mss = mss
+        self._local = threading.local() # mss handles are not shareable across threads
+
+    def _sct(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = self._local.sct = self._mss.mss()
+        return sct
+
+    def grab(self, rect):
+        x1, y1, x2, y2 = rect
+        shot = self._sct().grab({"left": x1, "top": y1, "width": x2 - x1, "height": y2 - y1})
+        return np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+
+    def close(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is not None:
+            sct.close()
+            self._local.sct = None
+
+
+class PyAutoGuiCapture(CaptureBackend):
+    """Fallback: pyautogui screenshot (PIL image per call), viewed as an RGB array."""
+    name = "pyautogui"
+
+    def __init__(self):
+        import pyautogui
+
+        self._pyautogui = pyautogui
+
+    def grab(self, rect):
+        x1, y1, x2, y2 = rect
+        img_pil = self._pyautogui.screenshot(region=(x1, y1, x2 - x1, y2 - y1))
+        return np.asarray(img_pil)
+
+
+class ArrayCapture(CaptureBackend):
+    """
+    Headless stand-in for tests and benchmarks: cycles through prepared frames instead of
+    touching the screen. Frames are numpy arrays or image file paths (loaded once, as BGR).
+    The requested rect is ignored.
+    """
+    name = "array"
+
+    def __init__(self, frames):
+        loaded = []
+        for frame in frames:
+            if isinstance(frame, str):
+                import cv2
+
+                image = cv2.imread(frame, cv2.IMREAD_COLOR)
+                if image is None:
+                    raise FileNotFoundError(f"Could not read capture fixture: {frame}")
+                frame = image
+            loaded.append(np.ascontiguousarray(frame, dtype=np.uint8))
+        if not loaded:
+            raise ValueError("ArrayCapture needs at least one frame")
+        self.frames = loaded
+        self._cycle = itertools.cycle(loaded)
+        self._lock = threading.Lock()
+
+    def grab(self, rect):
+        with self._lock:
+            return next(self._cycle)
+
+
+def create_capture_backend(preferred="auto"):
+    """Returns mss when available ("auto"/"mss"), else pyautogui."""
+    if preferred in ("auto", "mss"):
+        try:
+            backend = MssCapture()
+            print("Capture backend: mss.")
+            return backend
+        except ImportError:
+            if preferred == "mss":
+                print("Capture backend: mss is not installed, falling back to pyautogui.")
+
+    print("Capture backend: pyautogui.")
+    return PyAutoGuiCapture()
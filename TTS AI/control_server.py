@@ -0,0 +1,195 @@
+# control_server.py
+# -*- coding: utf-8 -*-
+
+"""
+Local control API so other programs can drive Neuro Speak without touching the disk.
+
+Protocol: one JSON object per line, one JSON reply per line.
+    {"cmd": "speak", "text": "Hello there."}
+    {"cmd": "cancel"}
+    {"cmd": "pause"}                      (toggles; or {"cmd": "pause", "paused": true})
+    {"cmd": "set-voice", "voice": "p243", "model": "...", "language": "..."}
+Replies are sent as soon as the command is accepted: {"ok": true, "cmd": "speak"}
+or {"ok": false, "error": "..."}.
+
+Quick test from a terminal:
+    python control_server.py speak "Hello from another program."
+"""
+
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+import program
+
+# --- Configuration ---
+DEFAULT_SOCKET_PATH = program.data_path("neuro_speak.sock") # absolute, so it never lands in a random cwd
+DEFAULT_HOST = "127.0.0.1" # never listen on anything but loopback
+DEFAULT_PORT = 50555
+MAX_LINE_BYTES = 1024 * 1024
+
+COMMANDS = ("speak", "cancel", "pause", "set-voice")
+
+HAS_UNIX_SOCKETS = hasattr(socket, "AF_UNIX")
+
+
+class ControlRequestHandler(socketserver.StreamRequestHandler):
+    """Reads newline-delimited JSON commands until the client disconnects."""
+    def handle(self):
+        while True:
+            line = self.rfile.readline(MAX_LINE_BYTES)
+            if not line:
+                break
+            if not line.endswith(b"\n") and len(line) >= MAX_LINE_BYTES:
+                # Over-long request: skip the rest of it instead of reading it as more commands
+                while line and not line.endswith(b"\n"):
+                    line = self.rfile.readline(MAX_LINE_BYTES)
+                reply = {"ok": False, "error": f"request longer than {MAX_LINE_BYTES} bytes"}
+            elif not line.strip():
+                continue
+            else:
+                reply = self.server.control.handle_line(line)
+            self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if HAS_UNIX_SOCKETS:
+    class _ThreadingUnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+class ControlServer:
+    """
+    Serves the control protocol on a Unix-domain socket, or on localhost TCP where Unix
+    sockets are unavailable (Windows) or fail to bind.
+
+    `handlers` maps a command name to a callable taking the decoded request dict. Handlers must
+    only queue work (e.g. publish on the event bus) so replies go out immediately; raising
+    ValueError turns into an {"ok": false} reply.
+    """
+    def __init__(self, handlers, socket_path=DEFAULT_SOCKET_PATH, host=DEFAULT_HOST,
+                 port=DEFAULT_PORT, prefer_unix=True):
+        self.handlers = handlers
+        self.socket_path = socket_path
+        self.host = host
+        self.port = port
+        self.prefer_unix = prefer_unix and HAS_UNIX_SOCKETS
+
+        self.server = None
+        self.address = None
+        self._thread = None
+        self.commands_handled = 0
+
+    def handle_line(self, line):
+        """Decodes and dispatches one request line. Returns the reply dict."""
+        try:
+            request = json.loads(line)
+        except (ValueError, UnicodeDecodeError) as e:
+            return {"ok": False, "error": f"invalid JSON: {e}"}
+
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "request must be a JSON object"}
+
+        cmd = request.get("cmd")
+        handler = self.handlers.get(cmd) if isinstance(cmd, str) else None
+        if handler is None:
+            return {"ok": False, "error": f"unknown command {cmd!r}, expected one of {list(COMMANDS)}"}
+
+        try:
+            handler(request)
+        except ValueError as e:
+            return {"ok": False, "cmd": cmd, "error": str(e)}
+        except Exception as e:
+            print(f"Control server: error handling '{cmd}': {e}")
+            return {"ok": False, "cmd": cmd, "error": "internal error"}
+
+        self.commands_handled += 1
+        return {"ok": True, "cmd": cmd}
+
+    def start(self):
+        """Binds the socket and serves on a daemon thread. Returns the bound address."""
+        if self.prefer_unix:
+            try:
+                if os.path.exists(self.socket_path):
+                    os.remove(self.socket_path) # stale socket from a previous run
+                # Created owner-only (0600): other local users must not be able to drive the app
+                old_umask = os.umask(0o177)
+                try:
+                    self.server = _ThreadingUnixServer(self.socket_path, ControlRequestHandler)
+                finally:
+                    os.umask(old_umask)
+                self.address = self.socket_path
+            except OSError as e:
+                print(f"Control server: Unix socket unavailable ({e}), falling back to TCP.")
+                self.server = None
+
+        if self.server is None:
+            self.server = _ThreadingTCPServer((self.host, self.port), ControlRequestHandler)
+            self.address = self.server.server_address
+
+        self.server.control = self
+        self._thread = threading.Thread(target=self.server.serve_forever, name="control-server", daemon=True)
+        self._thread.start()
+        print(f"Control server listening on {self.address}")
+        return self.address
+
+    def stop(self):
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            try:
+                os.remove(self.address)
+            except OSError:
+                pass
+        self.server = None
+
+
+# --- Client Helper ---
+
+def connect(address=None, timeout=5.0):
+    """Opens a connection to a running server. `address` is a socket path or (host, port)."""
+    if address is None:
+        if HAS_UNIX_SOCKETS and os.path.exists(DEFAULT_SOCKET_PATH):
+            address = DEFAULT_SOCKET_PATH
+        else:
+            address = (DEFAULT_HOST, DEFAULT_PORT)
+
+    if isinstance(address, str):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    sock.connect(address)
+    return sock
+
+
+def send_command(request, address=None, timeout=5.0):
+    """Sends one command dict and returns the decoded reply."""
+    with connect(address, timeout) as sock:
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        reply = sock.makefile("rb").readline()
+    return json.loads(reply)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        print(f"Usage: python control_server.py <{'|'.join(COMMANDS)}> [text | voice]")
+        sys.exit(1)
+
+    cmd = sys.argv[1]
+    request = {"cmd": cmd}
+    if cmd == "speak":
+        request["text"] = " ".join(sys.argv[2:])
+    elif cmd == "set-voice" and len(sys.argv) > 2:
+        request["voice"] = sys.argv[2]
+    print(send_command(request))
@@ -0,0 +1,166 @@
+# document_reader.py
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import re
+import threading
+import time
+from array import array
+
+# --- Configuration ---
+POSITIONS_FILE = "reading_positions.json"
+POSITION_SAVE_INTERVAL = 5.0     # seconds between writes while reading
+MAX_PARAGRAPH_BYTES = 64 * 1024  # very long paragraphs are cut at the next line break, long lines at the next space
+LINE_MODE_AVERAGE = 120          # longer average lines mean one paragraph per line (e.g. EPUB exports)
+SAMPLE_LINES = 2000              # lines looked at to pick the paragraph style
+
+_WHITESPACE = re.compile(rb"\s")
+
+
+class Document:
+    """
+    A large text file read lazily by paragraph. Opening it scans the file once, in pieces of at
+    most MAX_PARAGRAPH_BYTES, and keeps only the byte offset of each paragraph; text is read from
+    disk when asked for. Paragraphs (and single lines, for files with no line breaks) longer than
+    MAX_PARAGRAPH_BYTES are cut at the next whitespace, so one read stays around that size; only
+    a run of text with no whitespace at all is read in one go.
+
+    Paragraphs are separated by blank lines (wrapped .txt books), or are single lines when the
+    file has long lines and few blank ones (text extracted from EPUB/HTML).
+    """
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        stat = os.stat(self.path)
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.line_mode = self._detect_line_mode()
+        self.offsets = array("Q") # start of each paragraph; the file end closes the last one
+        start = time.perf_counter()
+        self._index()
+        self.index_ms = (time.perf_counter() - start) * 1000
+
+    def _detect_line_mode(self):
+        blank = lengths = count = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.strip():
+                    blank += 1
+                else:
+                    lengths += len(line)
+                    count += 1
+                if blank + count >= SAMPLE_LINES:
+                    break
+        return blank == 0 or (count > 0 and lengths / count > LINE_MODE_AVERAGE)
+
+    def _index(self):
+        offset = 0
+        paragraph_start = None
+        line_start = True
+        with open(self.path, "rb") as f:
+            # readline(limit) hands over-long lines back in pieces instead of loading them whole
+            for piece in iter(lambda: f.readline(MAX_PARAGRAPH_BYTES), b""):
+                if line_start:
+                    if not piece.strip():
+                        paragraph_start = None
+                    elif (paragraph_start is None or self.line_mode
+                          or offset - paragraph_start >= MAX_PARAGRAPH_BYTES):
+                        paragraph_start = offset
+                        self.offsets.append(offset)
+                elif paragraph_start is None:
+                    if piece.strip(): # the line opened with a long run of blanks
+                        paragraph_start = offset
+                        self.offsets.append(offset)
+                else:
+                    # Inside a line longer than MAX_PARAGRAPH_BYTES: cut at the next whitespace past the limit
+                    match = _WHITESPACE.search(piece, max(0, paragraph_start + MAX_PARAGRAPH_BYTES - offset))
+                    if match:
+                        paragraph_start = offset + match.end()
+                        self.offsets.append(paragraph_start)
+                offset += len(piece)
+                line_start = piece.endswith(b"\n")
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _read(self, f, index):
+        start = self.offsets[index]
+        end = self.offsets[index + 1] if index + 1 < len(self.offsets) else self.size
+        f.seek(start)
+        data = f.read(end - start)
+        return " ".join(data.decode("utf-8-sig" if start == 0 else "utf-8", errors="replace").split())
+
+    def paragraph(self, index):
+        """Text of one paragraph with line wraps joined."""
+        with open(self.path, "rb") as f:
+            return self._read(f, index)
+
+    def iter_paragraphs(self, start=0):
+        """Yields (index, text) from `start`, reading one paragraph at a time through one open file."""
+        with open(self.path, "rb") as f:
+            for index in range(max(0, start), len(self.offsets)):
+                text = self._read(f, index)
+                if text:
+                    yield index, text
+
+
+def iter_segments(document, start, segment, clean=None):
+    """
+    Yields (paragraph_index, segment) from paragraph `start` onwards: each paragraph is cleaned
+    with `clean` (text -> text) and split with `segment` (text -> list of strings) only when the
+    synthesis pipeline asks for more, so at most its lookahead is ever held in memory.
+    """
+    for index, text in document.iter_paragraphs(start):
+        if clean is not None:
+            text = clean(text)
+        for piece in segment(text):
+            yield index, piece
+
+
+class ReadingPositions:
+    """Remembers the paragraph each file was left at, in reading_positions.json. Thread-safe."""
+    def __init__(self, path=POSITIONS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._positions = {}
+        self._dirty = False
+        self._last_save = 0.0
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._positions = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Could not read {path}: {e}")
+
+    def get(self, document):
+        """Saved paragraph for this file, or 0. Clamped in case the file got shorter."""
+        entry = self._positions.get(document.path)
+        if not entry:
+            return 0
+        return min(max(0, int(entry.get("paragraph", 0))), max(0, len(document) - 1))
+
+    def set(self, document, paragraph):
+        """Records the paragraph being read; written to disk at most every few seconds."""
+        with self._lock:
+            entry = self._positions.get(document.path)
+            if entry and entry.get("paragraph") == paragraph:
+                return
+            self._positions[document.path] = {"paragraph": paragraph, "paragraphs": len(document),
+                                              "updated": time.time()}
+            self._dirty = True
+        if time.monotonic() - self._last_save >= POSITION_SAVE_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._positions, f, indent=4)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError as e:
+                print(f"Could not save reading position: {e}")
+            self._last_save = time.monotonic()
@@ -0,0 +1,138 @@
+# event_bus.py
+# -*- coding: utf-8 -*-
+
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+
+# --- Event Types ---
+SPEAK = "speak"              # text: cleaned text to read aloud
+CANCEL = "cancel"            # stop playback and reset the repetition guard
+TEXT_UPDATE = "text_update"  # text: latest recognized text, display only (may be empty)
+
+# --- Legacy File Protocol (compatibility adapter only) ---
+COMM_FILE = "tts_input.txt"
+TRIGGER_FILE = "tts_trigger.txt"
+CANCEL_FILE = "tts_cancel.txt"
+
+Event = namedtuple("Event", ["type", "text", "source", "timestamp"])
+
+
+class EventBus:
+    """
+    Thread-safe in-process channel between the scanner, hotkeys and the TTS player.
+    publish() never blocks: events are queued and delivered in order on one dispatcher thread,
+    so a CANCEL published before a SPEAK is always handled first.
+    """
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+
+        self.published = 0
+        self.last_latency_ms = 0.0 # publish -> handler start, for the most recent event
+
+    def subscribe(self, event_type, handler):
+        with self._lock:
+            self._subscribers.setdefault(event_type, []).append(handler)
+
+    def unsubscribe(self, event_type, handler):
+        with self._lock:
+            handlers = self._subscribers.get(event_type, [])
+            if handler in handlers:
+                handlers.remove(handler)
+
+    def has_subscribers(self, event_type):
+        with self._lock:
+            return bool(self._subscribers.get(event_type))
+
+    def queue_depth(self):
+        """Events published but not yet handled."""
+        return self._queue.qsize()
+
+    def publish(self, event_type, text="", source=""):
+        self._ensure_dispatcher()
+        self._queue.put(Event(event_type, text, source, time.perf_counter()))
+        self.published += 1
+
+    def _ensure_dispatcher(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._dispatch_loop, name="event-bus", daemon=True)
+                self._thread.start()
+
+    def _dispatch_loop(self):
+        while True:
+            event = self._queue.get()
+            self.last_latency_ms = (time.perf_counter() - event.timestamp) * 1000
+            with self._lock:
+                handlers = list(self._subscribers.get(event.type, []))
+            for handler in handlers:
+                try:
+                    handler(event)
+                except Exception as e:
+                    print(f"Error handling '{event.type}' event from {event.source or 'unknown'}: {e}")
+
+
+class FileTriggerAdapter:
+    """
+    Bridges the old tts_input.txt / tts_trigger.txt / tts_cancel.txt protocol onto the bus.
+    Only needed when the scanner and the player run as separate processes
+    (e.g. window_scanner.py launched on its own) or when 'file_ipc_compat' is enabled.
+    """
+    def __init__(self, comm_file=COMM_FILE, trigger_file=TRIGGER_FILE, cancel_file=CANCEL_FILE):
+        self.comm_file = comm_file
+        self.trigger_file = trigger_file
+        self.cancel_file = cancel_file
+
+    # --- Writer Side (scanner) ---
+
+    def write_text(self, text):
+        """Writes recognized text; the trigger is only created when there is something to say."""
+        with open(self.comm_file, 'w', encoding='utf-8') as f:
+            f.write(text)
+        if text.strip():
+            with open(self.trigger_file, 'w', encoding='utf-8') as f:
+                f.write("SPEAK")
+        elif os.path.exists(self.trigger_file):
+            os.remove(self.trigger_file)
+
+    def write_cancel(self):
+        with open(self.cancel_file, 'w', encoding='utf-8') as f:
+            f.write("CANCEL")
+
+    # --- Reader Side (player) ---
+
+    def poll(self, target_bus):
+        """Publishes events for any pending files and consumes them. Cheap enough for a Tk timer."""
+        try:
+            if os.path.exists(self.cancel_file):
+                os.remove(self.cancel_file)
+                target_bus.publish(CANCEL, source="file")
+
+            if os.path.exists(self.trigger_file):
+                text = ""
+                if os.path.exists(self.comm_file):
+                    with open(self.comm_file, 'r', encoding='utf-8') as f:
+                        text = f.read().strip()
+                os.remove(self.trigger_file)
+                target_bus.publish(SPEAK if text else TEXT_UPDATE, text, source="file")
+        except Exception as e:
+            print(f"Error polling trigger files: {e}")
+
+    def cleanup(self):
+        """Removes stale protocol files left over from a previous run."""
+        for path in (self.comm_file, self.trigger_file, self.cancel_file):
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+                    print(f"Cleaned up old communication file: {path}")
+            except Exception as e:
+                print(f"Error deleting startup file {path}: {e}")
+
+
+# Shared instance: the scanner and TTS_AI run in the same process and talk through this.
+bus = EventBus()
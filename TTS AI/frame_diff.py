@@ -0,0 +1,100 @@
+# frame_diff.py
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+# --- Configuration ---
+DOWNSAMPLE = 4              # compare every 4th pixel in each direction (1/16 of the mask)
+CHANGE_THRESHOLD = 0.002    # fraction of sampled pixels that must differ to count as "changed"
+MIN_CHANGED_PIXELS = 2      # ignore single-pixel noise on tiny ROIs
+SETTLE_FRAMES = 1           # identical frames required before OCR (lets typewriter text finish)
+MAX_DEBOUNCE_FRAMES = 8     # OCR anyway if the ROI keeps changing (animated backgrounds)
+
+# Decisions returned by FrameChangeDetector.check()
+OCR = "ocr"
+SKIP_UNCHANGED = "unchanged"
+SKIP_SETTLING = "settling"
+
+
+class FrameChangeDetector:
+    """
+    Cheap gate in front of Tesseract for continuous scanning, working on the white-text mask.
+
+    Each frame is reduced to a strided boolean sample of the mask and compared with the previous
+    frame by counting differing pixels:
+    - the first frame after reset()             -> run OCR at once (nothing suggests it is still changing)
+    - identical to what was last OCR'd          -> skip, the result cannot change
+    - still changing from the previous frame    -> skip until it has settled (typewriter effects)
+    - settled on something new                  -> run OCR
+    """
+    def __init__(self, downsample=DOWNSAMPLE, threshold=CHANGE_THRESHOLD,
+                 settle_frames=SETTLE_FRAMES, max_debounce_frames=MAX_DEBOUNCE_FRAMES):
+        self.downsample = max(1, int(downsample))
+        self.threshold = threshold
+        self.settle_frames = settle_frames
+        self.max_debounce_frames = max_debounce_frames
+        self.reset()
+
+        self.ocr_calls = 0
+        self.skipped_unchanged = 0
+        self.skipped_settling = 0
+
+    def reset(self):
+        """Forgets frame history (e.g. when the ROI changes); counters are kept."""
+        self._previous = None
+        self._last_ocr = None
+        self._stable_count = 0
+        self._debounce_count = 0
+
+    def signature(self, mask):
+        return mask[::self.downsample, ::self.downsample] > 0
+
+    def _differs(self, a, b):
+        if a is None or b is None or a.shape != b.shape:
+            return True
+        changed = np.count_nonzero(a != b)
+        return changed >= MIN_CHANGED_PIXELS and changed > self.threshold * a.size
+
+    def check(self, mask):
+        """Returns OCR, SKIP_UNCHANGED or SKIP_SETTLING for this frame and updates the counters."""
+        current = self.signature(mask)
+        first_frame = self._previous is None
+        changed_since_previous = self._differs(current, self._previous)
+        self._previous = current
+
+        if first_frame:
+            pass # settling only applies once a change has been seen
+        elif changed_since_previous:
+            self._stable_count = 0
+            self._debounce_count += 1
+            if self._debounce_count <= self.max_debounce_frames:
+                self.skipped_settling += 1
+                return SKIP_SETTLING
+        else:
+            self._stable_count += 1
+            if not self._differs(current, self._last_ocr):
+                self.skipped_unchanged += 1
+                return SKIP_UNCHANGED
+            if self._stable_count < self.settle_frames:
+                self.skipped_settling += 1
+                return SKIP_SETTLING
+
+        self._last_ocr = current
+        self._debounce_count = 0
+        self.ocr_calls += 1
+        return OCR
+
+    def should_ocr(self, mask):
+        return self.check(mask) == OCR
+
+    @property
+    def ocr_avoided(self):
+        return self.skipped_unchanged + self.skipped_settling
+
+    def stats(self):
+        return {
+            "ocr_calls": self.ocr_calls,
+            "ocr_avoided": self.ocr_avoided,
+            "skipped_unchanged": self.skipped_unchanged,
+            "skipped_settling": self.skipped_settling,
+        }
@@ -130,6 +130,17 @@ if %errorlevel% neq 0 (
     exit /b
 )
 
+:: --- Optional Accelerators (not required, failures are ignored) ---
+echo [5/5] Installing optional speed-ups...
+python -m pip install mss
+if %errorlevel% neq 0 (
+    echo [NOTE] mss could not be installed. Scanning will capture with pyautogui instead.
+)
+python -m pip install tesserocr
+if %errorlevel% neq 0 (
+    echo [NOTE] tesserocr could not be installed. Scanning will use pytesseract instead.
+)
+
 :: --- Installation Summary ---
 echo.
 echo =====================================================
@@ -0,0 +1,278 @@
+# lexicon.py
+# -*- coding: utf-8 -*-
+
+import os
+import struct
+import time
+import zlib
+
+import numpy as np
+
+# --- Configuration ---
+WORD_LIST_FILE = "top_words.txt"
+LEXICON_SUFFIX = ".lex"       # compiled next to the word list, rebuilt when the list changes
+MAX_EDIT_DISTANCE = 2         # largest distance the deletion index supports
+PREFIX_LENGTH = 7             # SymSpell prefix: only the first 7 letters are indexed
+RANK_CACHE_SIZE = 4096        # recently looked-up words kept in a dict (OCR'd lines repeat a lot)
+
+MAGIC = b"NSLEX001"
+# magic, word_count, blob_size, delete_count, max_distance, prefix_length, source_size, source_mtime_ns
+HEADER = struct.Struct("<8sIIIIIQQ")
+
+
+def _hash(word):
+    """Stable 64-bit hash for the on-disk index (Python's hash() is salted per process)."""
+    data = word.encode("utf-8")
+    return (zlib.crc32(data) << 32) | zlib.adler32(data)
+
+
+def _deletes(word, max_distance):
+    """The word plus every variant with up to `max_distance` characters removed."""
+    found = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for variant in frontier:
+            if not variant:
+                continue
+            for i in range(len(variant)):
+                next_frontier.add(variant[:i] + variant[i + 1:])
+        next_frontier -= found
+        found |= next_frontier
+        frontier = next_frontier
+    return found
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Optimal string alignment distance (insert, delete, substitute, swap neighbours).
+    Returns max_distance + 1 as soon as the distance is known to exceed max_distance.
+    Common prefixes/suffixes are trimmed and only the diagonal band that can stay within
+    max_distance is computed, so near matches cost a handful of cells.
+    """
+    if a == b:
+        return 0
+    too_far = max_distance + 1
+    if abs(len(a) - len(b)) > max_distance:
+        return too_far
+
+    start = 0
+    limit = min(len(a), len(b))
+    while start < limit and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a, b = a[start:end_a], b[start:end_b]
+    if not a or not b:
+        return max(len(a), len(b)) if max(len(a), len(b)) <= max_distance else too_far
+
+    big = too_far + 1
+    n = len(b)
+    previous_previous = None
+    previous = [j if j <= max_distance else big for j in range(n + 1)]
+    for i in range(1, len(a) + 1):
+        current = [big] * (n + 1)
+        current[0] = i if i <= max_distance else big
+        lo = max(1, i - max_distance)
+        hi = min(n, i + max_distance)
+        row_min = current[0]
+        ai = a[i - 1]
+        for j in range(lo, hi + 1):
+            value = previous[j - 1] + (ai != b[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if (previous_previous is not None and j > 1 and ai == b[j - 2] and a[i - 2] == b[j - 1]
+                    and previous_previous[j - 2] + 1 < value):
+                value = previous_previous[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return too_far
+        previous_previous, previous = previous, current
+    return previous[n] if previous[n] <= max_distance else too_far
+
+
+class Lexicon:
+    """
+    Read-only word list compiled into one memory-mappable file:
+      - words in frequency order (id == rank) as an offset table + UTF-8 blob, plus their lengths
+      - sorted 64-bit hashes of every word, for exact lookups
+      - sorted hashes of SymSpell deletion variants of each word's prefix, for fuzzy lookups
+    Opening it maps the file; nothing is parsed or copied, so it is ready in a few milliseconds.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._mmap = np.memmap(path, dtype=np.uint8, mode="r")
+        self._data = self._mmap.view(np.ndarray) # plain views: slicing a memmap subclass is slow
+        (magic, self.word_count, blob_size, delete_count, self.max_distance, self.prefix_length,
+         self.source_size, self.source_mtime_ns) = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Neuro Speak lexicon")
+
+        offset = _align(HEADER.size)
+        self._offsets, offset = _section(self._data, offset, np.uint32, self.word_count + 1)
+        self._blob, offset = _section(self._data, offset, np.uint8, blob_size)
+        self._lengths, offset = _section(self._data, offset, np.uint8, self.word_count)
+        self._word_hashes, offset = _section(self._data, offset, np.uint64, self.word_count)
+        self._word_ids, offset = _section(self._data, offset, np.uint32, self.word_count)
+        self._delete_hashes, offset = _section(self._data, offset, np.uint64, delete_count)
+        self._delete_ids, offset = _section(self._data, offset, np.uint32, delete_count)
+        self._rank_cache = {}
+
+    def __len__(self):
+        return self.word_count
+
+    def word(self, word_id):
+        start, end = self._offsets[word_id], self._offsets[word_id + 1]
+        return self._blob[start:end].tobytes().decode("utf-8")
+
+    def rank(self, word):
+        """Frequency rank (0 = most common) of an exact word, or None."""
+        try:
+            return self._rank_cache[word]
+        except KeyError:
+            pass
+
+        result = None
+        h = np.uint64(_hash(word))
+        i = int(np.searchsorted(self._word_hashes, h))
+        while i < self.word_count and self._word_hashes[i] == h:
+            word_id = int(self._word_ids[i])
+            if self.word(word_id) == word:
+                result = word_id
+                break
+            i += 1
+
+        if len(self._rank_cache) >= RANK_CACHE_SIZE:
+            self._rank_cache.clear()
+        self._rank_cache[word] = result
+        return result
+
+    def __contains__(self, word):
+        return self.rank(word) is not None
+
+    def lookup(self, word, max_distance=1):
+        """
+        Words within `max_distance` edits, as (word, distance, rank) sorted by distance, then rank.
+        """
+        max_distance = min(max_distance, self.max_distance)
+        exact = self.rank(word)
+        if exact is not None or max_distance == 0:
+            return [] if exact is None else [(word, 0, exact)]
+
+        queries = np.fromiter((_hash(v) for v in _deletes(word[:self.prefix_length], max_distance)),
+                              dtype=np.uint64)
+        starts = np.searchsorted(self._delete_hashes, queries, side="left")
+        ends = np.searchsorted(self._delete_hashes, queries, side="right")
+
+        hits = [self._delete_ids[start:end] for start, end in zip(starts, ends) if end > start]
+        if not hits:
+            return []
+        # Unique ids come back sorted, i.e. by rank; the length filter runs before any decoding
+        candidates = np.unique(np.concatenate(hits))
+        lengths = self._lengths[candidates].astype(np.int32)
+        candidates = candidates[np.abs(lengths - min(len(word), 255)) <= max_distance]
+
+        matches = []
+        for word_id in candidates.tolist():
+            candidate = self.word(word_id)
+            distance = edit_distance(word, candidate, max_distance)
+            if distance <= max_distance:
+                matches.append((candidate, distance, word_id))
+        matches.sort(key=lambda r: r[1]) # stable: ties stay in rank order
+        return matches
+
+    def close(self):
+        """Drops every view of the file so the mapping is released (needed before replacing it on Windows)."""
+        self._offsets = self._blob = self._lengths = None
+        self._word_hashes = self._word_ids = self._delete_hashes = self._delete_ids = None
+        self._data = self._mmap = None
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+def _section(data, offset, dtype, count):
+    nbytes = np.dtype(dtype).itemsize * count
+    return data[offset:offset + nbytes].view(dtype), _align(offset + nbytes)
+
+
+def read_word_list(source):
+    """Lowercased, de-duplicated words in file (frequency) order."""
+    words = []
+    seen = set()
+    with open(source, "r", encoding="utf-8-sig") as f:
+        for line in f:
+            word = line.strip().lower()
+            if word and word not in seen:
+                seen.add(word)
+                words.append(word)
+    return words
+
+
+def build_lexicon(source, path, max_distance=MAX_EDIT_DISTANCE, prefix_length=PREFIX_LENGTH):
+    """Compiles a word list (one word per line, most frequent first) into `path`."""
+    words = read_word_list(source)
+    encoded = [w.encode("utf-8") for w in words]
+    offsets = np.zeros(len(words) + 1, dtype=np.uint32)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    blob = b"".join(encoded)
+    lengths = np.array([min(len(w), 255) for w in words], dtype=np.uint8)
+
+    word_hashes = np.fromiter((_hash(w) for w in words), dtype=np.uint64, count=len(words))
+    order = np.argsort(word_hashes, kind="stable")
+
+    delete_hashes = []
+    delete_ids = []
+    for word_id, word in enumerate(words):
+        for variant in _deletes(word[:prefix_length], max_distance):
+            delete_hashes.append(_hash(variant))
+            delete_ids.append(word_id)
+    delete_hashes = np.array(delete_hashes, dtype=np.uint64)
+    delete_ids = np.array(delete_ids, dtype=np.uint32)
+    delete_order = np.argsort(delete_hashes, kind="stable")
+
+    stat = os.stat(source)
+    header = HEADER.pack(MAGIC, len(words), len(blob), len(delete_hashes), max_distance, prefix_length,
+                         stat.st_size, stat.st_mtime_ns)
+    sections = [offsets.tobytes(), blob, lengths.tobytes(), word_hashes[order].tobytes(), order.astype(np.uint32).tobytes(),
+                delete_hashes[delete_order].tobytes(), delete_ids[delete_order].tobytes()]
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(b"\0" * (_align(HEADER.size) - HEADER.size))
+        for section in sections:
+            f.write(section)
+            f.write(b"\0" * (_align(len(section)) - len(section)))
+    os.replace(tmp_path, path) # never leave a half-written lexicon behind
+
+
+def open_lexicon(source=WORD_LIST_FILE, path=None):
+    """
+    Maps the compiled lexicon for `source`, (re)building it first if it is missing or older
+    than the word list. Returns None if the word list does not exist.
+    """
+    path = path or os.path.splitext(source)[0] + LEXICON_SUFFIX
+    if not os.path.exists(source):
+        return Lexicon(path) if os.path.exists(path) else None
+
+    stat = os.stat(source)
+    if os.path.exists(path):
+        try:
+            lexicon = Lexicon(path)
+            if (lexicon.source_size, lexicon.source_mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                return lexicon
+            lexicon.close()
+        except (ValueError, struct.error) as e:
+            print(f"Lexicon: {e}, rebuilding.")
+
+    start = time.perf_counter()
+    build_lexicon(source, path)
+    print(f"Lexicon: compiled {source} -> {path} in {time.perf_counter() - start:.2f}s")
+    return Lexicon(path)
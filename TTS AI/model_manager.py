@@ -0,0 +1,281 @@
+# model_manager.py
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# --- Configuration ---
+MB = 1024 * 1024
+DEFAULT_MEMORY_BUDGET_MB = 1024
+WAIT_POLL_SECONDS = 0.1 # how often waiters check their cancel flag
+WARM_UP_TEXT = "Hello there."
+
+VITS_ALLOWED_VOICES = ["p229", "p230", "p234", "p238", "p241", "p243", "p250", "p257", "p260"]
+
+
+# --- Coqui TTS Helpers (shared by the GUI process and the synthesis workers) ---
+
+def default_device():
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+def load_tts_model(model_name, device):
+    """Builds a Coqui TTS model on `device`. Blocking; imports torch/TTS on first use."""
+    from TTS.api import TTS
+    print(f"Loading model: {model_name}")
+    return TTS(model_name, progress_bar=False).to(device)
+
+def describe_model(tts, model_name, verbose=True):
+    """Returns (voices, languages) offered by a loaded model."""
+    # Voices
+    if hasattr(tts, "speakers") and tts.speakers:
+        voices = list(tts.speakers)
+        if "vctk" in model_name:
+            voices = [v for v in voices if v in VITS_ALLOWED_VOICES]
+    elif hasattr(tts, "speaker_manager") and tts.speaker_manager is not None:
+        voices = tts.speaker_manager.speaker_ids
+    else:
+        voices = ["default"]
+
+    # Languages
+    if hasattr(tts, "languages") and tts.languages:
+        languages = list(tts.languages)
+    else:
+        languages = ["default"]
+
+    if verbose:
+        print("Voices available:", voices)
+        print("Languages available:", languages)
+
+    return voices, languages
+
+def output_sample_rate(tts, default=22050):
+    """Native sample rate of a loaded model's waveforms."""
+    synthesizer = getattr(tts, "synthesizer", None)
+    return int(getattr(synthesizer, "output_sample_rate", None) or default)
+
+def synthesis_kwargs(voice, lang):
+    kwargs = {}
+    if voice != "default":
+        kwargs["speaker"] = voice
+    if lang != "default":
+        kwargs["language"] = lang
+    return kwargs
+
+def warm_up_model(model_name, tts):
+    """One short synthesis right after loading, so the first real sentence does not pay for lazy initialisation."""
+    voices, languages = describe_model(tts, model_name, verbose=False)
+    tts.tts(text=WARM_UP_TEXT, **synthesis_kwargs(voices[0], languages[0]))
+
+
+def model_memory_bytes(model):
+    """
+    Estimates the resident size of a Coqui TTS object: parameters and buffers of every torch module
+    reachable from it or its synthesizer (TTS model, vocoder, speaker encoder). 0 if unknown.
+    """
+    seen = set()
+    total = 0
+    containers = [model, getattr(model, "synthesizer", None)]
+    for container in containers:
+        if container is None:
+            continue
+        for value in list(vars(container).values()) + [container]:
+            if not hasattr(value, "parameters") or not hasattr(value, "buffers"):
+                continue
+            try:
+                tensors = list(value.parameters()) + list(value.buffers())
+            except Exception:
+                continue
+            for tensor in tensors:
+                if id(tensor) not in seen:
+                    seen.add(id(tensor))
+                    total += tensor.numel() * tensor.element_size()
+    return total
+
+
+class ResidentModel:
+    """A loaded model plus the bookkeeping the pool needs."""
+    def __init__(self, name, model, size_bytes, load_seconds, warm_up_seconds):
+        self.name = name
+        self.model = model
+        self.size_bytes = size_bytes
+        self.load_seconds = load_seconds
+        self.warm_up_seconds = warm_up_seconds
+        self.leases = 0 # utterances currently synthesizing with this model
+        self.last_used = time.monotonic()
+
+
+class ModelManager:
+    """
+    Keeps several TTS models resident so switching is instant.
+
+    - loader(name) builds a model; warm_up(name, model) runs a short synthesis so the first real
+      request does not pay for lazy initialisation. Both run on whichever thread needs the model
+      first (the GUI only ever calls switch() from a background thread).
+    - Concurrent requests for a model that is still loading wait for that one load.
+    - Models are evicted least-recently-used first when the pool exceeds the memory budget;
+      the current model and models leased by an in-flight utterance are never evicted.
+    - switch() replaces `current` with a single assignment. Utterances keep the model they leased,
+      so a switch never changes the model under a running tts_worker.
+    """
+    def __init__(self, loader, warm_up=None, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+        self.loader = loader
+        self.warm_up = warm_up
+        self.memory_budget_bytes = int(memory_budget_mb * MB)
+
+        self._lock = threading.Lock()
+        self._models = OrderedDict() # name -> ResidentModel, least recently used first
+        self._loading = {}           # name -> threading.Event set when that load finishes
+        self._errors = {}            # name -> last load error
+        self.current = None          # ResidentModel
+
+        # Metrics
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    # --- Queries ---
+
+    def is_resident(self, name):
+        with self._lock:
+            return name in self._models
+
+    @property
+    def resident_bytes(self):
+        with self._lock:
+            return sum(m.size_bytes for m in self._models.values())
+
+    # --- Loading ---
+
+    def ensure(self, name, is_cancelled=None):
+        """
+        Returns the ResidentModel for `name`, loading it if needed. Returns None if `is_cancelled`
+        turns true while waiting for another thread's load. Raises the loader's exception on failure.
+        """
+        while True:
+            with self._lock:
+                resident = self._models.get(name)
+                if resident is not None:
+                    self._models.move_to_end(name)
+                    resident.last_used = time.monotonic()
+                    self.hits += 1
+                    return resident
+                pending = self._loading.get(name)
+                if pending is None:
+                    pending = self._loading[name] = threading.Event()
+                    break # this thread loads it
+            # Someone else is loading it: wait, then re-check (the load may have failed)
+            while not pending.wait(WAIT_POLL_SECONDS):
+                if is_cancelled is not None and is_cancelled():
+                    return None
+            with self._lock:
+                if name not in self._models and name in self._errors:
+                    raise self._errors[name]
+
+        try:
+            resident = self._load(name)
+        except Exception as e:
+            with self._lock:
+                self._errors[name] = e
+                del self._loading[name]
+            pending.set()
+            raise
+
+        with self._lock:
+            self._errors.pop(name, None)
+            self._models[name] = resident
+            del self._loading[name]
+            self.loads += 1
+            self._evict_locked(keep=resident) # about to be used by the caller
+        pending.set()
+        return resident
+
+    def _load(self, name):
+        start = time.perf_counter()
+        model = self.loader(name)
+        load_seconds = time.perf_counter() - start
+
+        warm_up_seconds = 0.0
+        if self.warm_up is not None:
+            start = time.perf_counter()
+            try:
+                self.warm_up(name, model)
+            except Exception as e:
+                print(f"Model manager: warm-up of '{name}' failed ({e}); continuing without it.")
+            warm_up_seconds = time.perf_counter() - start
+
+        size_bytes = model_memory_bytes(model)
+        print(f"Model manager: '{name}' loaded in {load_seconds:.1f}s, warmed up in {warm_up_seconds:.2f}s, "
+              f"~{size_bytes / MB:.0f} MB")
+        return ResidentModel(name, model, size_bytes, load_seconds, warm_up_seconds)
+
+    def _evict_locked(self, keep=None):
+        total = sum(m.size_bytes for m in self._models.values())
+        for name in list(self._models):
+            if total <= self.memory_budget_bytes:
+                break
+            resident = self._models[name]
+            if resident is self.current or resident is keep or resident.leases > 0:
+                continue
+            del self._models[name]
+            total -= resident.size_bytes
+            self.evictions += 1
+            print(f"Model manager: evicted '{name}' (over the {self.memory_budget_bytes / MB:.0f} MB budget)")
+        if total > self.memory_budget_bytes:
+            print(f"Model manager: {total / MB:.0f} MB resident, over budget; all remaining models are in use.")
+
+    # --- Switching and Leasing ---
+
+    def switch(self, name):
+        """Makes `name` the current model (loading it if needed). Blocking; call off the Tk thread."""
+        resident = self.ensure(name)
+        with self._lock:
+            self.current = resident
+            self._evict_locked() # the previous current model may now be evictable
+        return resident
+
+    @contextmanager
+    def lease(self, name, is_cancelled=None):
+        """
+        Pins `name` for the duration of one utterance and yields its model object, or None if
+        cancelled while the model was still loading.
+        """
+        resident = self.ensure(name, is_cancelled)
+        if resident is None:
+            yield None
+            return
+        with self._lock:
+            resident.leases += 1
+        try:
+            yield resident.model
+        finally:
+            with self._lock:
+                resident.leases -= 1
+                resident.last_used = time.monotonic()
+                self._evict_locked()
+
+    def preload_async(self, names):
+        """Loads (and warms up) `names` one after another on a background thread."""
+        def worker():
+            for name in names:
+                try:
+                    self.ensure(name)
+                except Exception as e:
+                    print(f"Model manager: could not preload '{name}': {e}")
+        thread = threading.Thread(target=worker, name="model-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        with self._lock:
+            return {
+                "resident": list(self._models),
+                "current": self.current.name if self.current else None,
+                "resident_mb": round(sum(m.size_bytes for m in self._models.values()) / MB, 1),
+                "budget_mb": round(self.memory_budget_bytes / MB, 1),
+                "loads": self.loads,
+                "hits": self.hits,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,110 @@
+# ocr_backend.py
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+
+import numpy as np
+
+# --- Configuration ---
+OCR_LANGUAGE = "eng"
+PAGE_SEG_MODE = 6 # single uniform block of text; matches the old '--psm 6'
+PYTESSERACT_CONFIG = f'--oem 3 --psm {PAGE_SEG_MODE}'
+
+
+class OcrEngineNotFound(Exception):
+    """Raised when the Tesseract binary or its language data cannot be found."""
+
+
+class OcrBackend:
+    """Common interface: turn a single-channel uint8 image (numpy array) into text."""
+    name = "base"
+    requires_executable = False # True if tesseract.exe must exist on disk
+
+    def image_to_string(self, image):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class TesserocrBackend(OcrBackend):
+    """
+    Persistent in-process libtesseract engine (via tesserocr).
+    Language data is loaded once; each scan only hands over the raw mask bytes,
+    so there is no process spawn and no temporary PNG per attempt.
+    """
+    name = "tesserocr"
+
+    def __init__(self, tessdata_path=None, language=OCR_LANGUAGE):
+        import tesserocr # optional dependency
+
+        kwargs = {"lang": language, "psm": tesserocr.PSM.SINGLE_BLOCK}
+        if tessdata_path:
+            kwargs["path"] = tessdata_path.rstrip("\\/") + os.sep
+        try:
+            self._api = tesserocr.PyTessBaseAPI(**kwargs)
+        except RuntimeError as e:
+            raise OcrEngineNotFound(f"libtesseract could not load '{language}' data: {e}")
+        self._lock = threading.Lock() # one TessBaseAPI must not be used from two threads at once
+
+    def image_to_string(self, image):
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        if image.ndim != 2:
+            raise ValueError("TesserocrBackend expects a single-channel mask")
+        height, width = image.shape
+        with self._lock:
+            self._api.SetImageBytes(image.tobytes(), width, height, 1, width)
+            return self._api.GetUTF8Text()
+
+    def close(self):
+        with self._lock:
+            self._api.End()
+
+
+class PytesseractBackend(OcrBackend):
+    """Fallback: runs tesseract.exe through pytesseract (one process per call)."""
+    name = "pytesseract"
+    requires_executable = True
+
+    def __init__(self, tesseract_path=None):
+        import pytesseract
+
+        self._pytesseract = pytesseract
+        if tesseract_path:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_path
+
+    def image_to_string(self, image):
+        try:
+            return self._pytesseract.image_to_string(image, config=PYTESSERACT_CONFIG)
+        except self._pytesseract.TesseractNotFoundError as e:
+            raise OcrEngineNotFound(str(e))
+
+
+def _tessdata_dir_for(tesseract_path):
+    """UB-Mannheim installs keep language data next to the executable."""
+    if not tesseract_path:
+        return None
+    candidate = os.path.join(os.path.dirname(tesseract_path), "tessdata")
+    return candidate if os.path.isdir(candidate) else None
+
+
+def create_ocr_backend(tesseract_path=None, preferred="auto"):
+    """
+    Returns the fastest available backend.
+    preferred: "auto" (tesserocr, else pytesseract), "tesserocr" or "pytesseract".
+    """
+    if preferred in ("auto", "tesserocr"):
+        try:
+            backend = TesserocrBackend(_tessdata_dir_for(tesseract_path))
+            print("OCR backend: persistent libtesseract (tesserocr).")
+            return backend
+        except ImportError:
+            if preferred == "tesserocr":
+                print("OCR backend: tesserocr is not installed, falling back to pytesseract.")
+        except OcrEngineNotFound as e:
+            print(f"OCR backend: {e}. Falling back to pytesseract.")
+
+    backend = PytesseractBackend(tesseract_path)
+    print("OCR backend: pytesseract (spawns tesseract per scan).")
+    return backend
@@ -1,5 +1,7 @@
 import tkinter as tk
 from tkinter import ttk
+import text_normalizer
+import tracing
 
 # --- Configuration for consistent styling ---
 BG_COLOR = "#1e1e1e"
@@ -10,6 +12,7 @@ BTN_GREY = "#444444"
 NAV_BG = "#2c2c2c" # Background for the navigation menu (tabs)
 NAV_ACTIVE_BG = "#3e3e3e" # Background for the active selected tab
 NAV_WIDTH = 15 # Width of the navigation column in character units
+METRICS_REFRESH_MS = 500 # how often the Metrics tab redraws while it is shown
 
 class OptionsWindow(tk.Toplevel):
     """
@@ -38,6 +41,7 @@ class OptionsWindow(tk.Toplevel):
 
         # Dictionary to hold content frames
         self.content_frames = {}
+        self._metrics_job = None
         # Variable to track the currently selected navigation button
         self.active_nav_var = tk.StringVar()
 
@@ -92,7 +96,7 @@ class OptionsWindow(tk.Toplevel):
 
         # --- Populate Navigation Panel (no change) ---
         self.nav_buttons = {}
-        nav_items = ["Hotkeys", "Scanning"]
+        nav_items = ["Hotkeys", "Scanning", "Metrics"]
 
         for item in nav_items:
             btn = tk.Radiobutton(nav_frame, text=item, variable=self.active_nav_var, value=item,
@@ -110,6 +114,7 @@ class OptionsWindow(tk.Toplevel):
         # --- Populate Content Frames ---
         self.create_hotkey_frame()
         self.create_scanning_frame()
+        self.create_metrics_frame()
 
         # --- Footer Buttons (no change) ---
         button_frame = tk.Frame(footer_frame, bg=NAV_BG)
@@ -132,6 +137,8 @@ class OptionsWindow(tk.Toplevel):
 
             frame.pack(fill="both", expand=True, padx=10, pady=10)
             self.active_nav_var.set(frame_name)
+            if frame_name == "Metrics":
+                self.refresh_metrics()
 
     def create_hotkey_frame(self):
         """Creates the content panel for Hotkey settings (Global Z/X)."""
@@ -187,6 +194,16 @@ class OptionsWindow(tk.Toplevel):
                        font=("Arial", 11), relief="flat", bd=0).pack(side="left")
         tk.Label(renpy_frame, text="(Removes character names and cleans text for Renpy games.)", bg=BG_COLOR, fg=FG_COLOR).pack(side="left", anchor="w")
 
+        # Text Profile (which cleaning stages run on scanned text)
+        profile_frame = tk.Frame(frame, bg=BG_COLOR)
+        profile_frame.pack(fill="x", pady=8)
+        tk.Label(profile_frame, text="Text Profile:", width=25, anchor="w", bg=BG_COLOR, fg=FG_COLOR).pack(side="left")
+
+        self.text_profile_var = tk.StringVar(value=self.current_settings.get("text_profile", "auto"))
+        ttk.Combobox(profile_frame, textvariable=self.text_profile_var, values=["auto"] + text_normalizer.available_profiles(),
+                     state="readonly", width=12).pack(side="left", padx=5)
+        tk.Label(profile_frame, text="'auto' follows Renpy Mode. Add your own in text_profiles.json.", bg=BG_COLOR, fg=FG_COLOR).pack(side="left", anchor="w")
+
         # --- Region Selection Hotkeys Configuration (NEW INPUTS) ---
         tk.Label(frame, text="--- Region Selection Hotkeys (Active During Scan Mode) ---", font=("Arial", 12, "bold"), bg=BG_COLOR, fg=FG_COLOR).pack(anchor="w", pady=(20, 10))
 
@@ -225,6 +242,40 @@ class OptionsWindow(tk.Toplevel):
 
         # ----------------------------------------------------
 
+    def create_metrics_frame(self):
+        """Creates the live latency/throughput panel, fed by tracing.tracer."""
+        frame = tk.Frame(self.content_container, bg=BG_COLOR)
+        self.content_frames["Metrics"] = frame
+
+        tk.Label(frame, text="Live Metrics", font=("Arial", 16, "bold"), bg=BG_COLOR, fg=FG_COLOR).pack(anchor="w", pady=(0, 10))
+        trace_file = self.current_settings.get("trace_file") or "off"
+        tk.Label(frame, text=f"Timings over the last minute, refreshed twice a second. Trace file: {trace_file}",
+                 bg=BG_COLOR, fg=FG_COLOR).pack(anchor="w", pady=(0, 10))
+
+        self.metrics_var = tk.StringVar(value="")
+        tk.Label(frame, textvariable=self.metrics_var, font=("Consolas", 10), justify="left", anchor="nw",
+                 bg=ENTRY_BG, fg=FG_COLOR, padx=10, pady=10).pack(fill="both", expand=True)
+
+    def refresh_metrics(self):
+        """Redraws the Metrics tab and schedules the next redraw while the tab is shown."""
+        if self._metrics_job is not None:
+            # Re-entering the tab calls this directly; drop the pending redraw so only one loop runs
+            self.after_cancel(self._metrics_job)
+        self._metrics_job = None
+        if self.active_nav_var.get() != "Metrics" or not self.winfo_exists():
+            return
+        if not tracing.tracer.enabled:
+            self.metrics_var.set("Tracing is off (\"tracing_enabled\": false in config.json).")
+        else:
+            self.metrics_var.set(tracing.format_snapshot(tracing.tracer.snapshot()))
+        self._metrics_job = self.after(METRICS_REFRESH_MS, self.refresh_metrics)
+
+    def destroy(self):
+        if self._metrics_job is not None:
+            self.after_cancel(self._metrics_job)
+            self._metrics_job = None
+        super().destroy()
+
     def save(self):
         """
         Gathers settings and calls the external save_callback to update the main app state.
@@ -235,6 +286,7 @@ class OptionsWindow(tk.Toplevel):
                 "cancel_hotkey": self.hkx_var.get().strip().lower(),
                 "file_watch_interval": int(self.polling_var.get()),
                 "renpy_mode": self.renpy_mode_var.get(),
+                "text_profile": self.text_profile_var.get(),
                 # NEW SCANNING HOTKEYS
                 "hotkey_continuous_scan": self.hki_continuous_var.get().strip().lower(),
                 "hotkey_reset_crop": self.hki_reset_var.get().strip().lower(),
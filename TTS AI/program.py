@@ -1,30 +1,48 @@
-import torch
-import tkinter as tk
-from tkinter import scrolledtext, ttk
-import sounddevice as sd
-import numpy as np
-import threading
-import queue
-import pyautogui
-import time
-import re
-import keyboard
+# Settings only; torch, TTS, audio and the scanner are loaded by TTS_AI.py when needed.
+# Importable without a display: the old GUI helpers below import keyboard/Tk themselves.
 import os
+import sys
 import json # NEW: Import JSON library for file persistence
 
-from options import OptionsWindow
-from window_scanner import select_window_area
-
-from TTS.api import TTS
-
 # --- Configuration Constants ---
 CONFIG_FILE = "config.json"
 
+def data_path(name):
+    """Absolute path of a runtime file (socket, traces) kept next to config.json."""
+    return os.path.join(os.path.dirname(os.path.abspath(CONFIG_FILE)), name)
+
 DEFAULT_SETTINGS = {
     "speak_hotkey": "ctrl+z",
     "cancel_hotkey": "ctrl+x",
     "file_watch_interval": 200,
-    "renpy_mode": True
+    "renpy_mode": True,
+    "text_profile": "auto",
+    "text_pipeline_timing": False,
+    "validation_max_edit_distance": 1,
+    "spell_correction": True,
+    "audio_cache_enabled": True,
+    "audio_cache_memory_mb": 64,
+    "audio_cache_disk_mb": 512,
+    "synthesis_lookahead": 3,
+    "synthesis_processes": 0 if getattr(sys, "frozen", False) else 1, # packaged .exe: in-process until workers are opted into
+    "synthesis_batch_size": 4,
+    "render_processes": 2,
+    "segment_max_chars": 200,
+    "first_segment_max_chars": 60,
+    "model_memory_budget_mb": 2048,
+    "preload_models": [],
+    "model_warm_up": True,
+    "audio_buffer_seconds": 30,
+    "audio_device": "",
+    "audio_sample_rate": "model",
+    "file_ipc_compat": False,
+    "control_server_enabled": False,
+    "control_server_port": 50555,
+    "tracing_enabled": True,
+    "trace_file": "", # e.g. "traces.jsonl" to export records next to config.json
+    "trace_file_mb": 5,
+    "ocr_backend": "auto",
+    "capture_backend": "auto"
 }
 
 app_settings = DEFAULT_SETTINGS.copy()
@@ -71,6 +89,7 @@ def save_settings_callback(new_settings):
     Called when the Options window is closed via 'Save'.
     """
     global app_settings
+    import keyboard
 
     # 1. Update the hotkey bindings (remove old, add new)
     old_speak_key = app_settings["speak_hotkey"]
@@ -105,6 +124,7 @@ def save_settings_callback(new_settings):
 # Function to open the Options GUI
 def open_options():
     """Opens the modal OptionsWindow, passing current settings and the save callback."""
+    from options import OptionsWindow
     print("Options button pressed. Opening options window.")
     # Pass the current settings and the callback function
     OptionsWindow(master=root, current_settings=app_settings, save_callback=save_settings_callback)
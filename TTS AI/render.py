@@ -0,0 +1,253 @@
+# render.py
+# -*- coding: utf-8 -*-
+
+"""
+Offline rendering: synthesizes a whole text (or a large text file, streamed by paragraph)
+into a WAV, FLAC or OGG file instead of the speakers. Sentences are synthesized in parallel
+by a pool of worker processes (see synthesis_server.py) and written to disk in order as they
+arrive, so memory stays flat however long the text is.
+
+    python render.py chapter.txt -o chapter.flac [--model tts_models/en/vctk/vits] [--voice p243] [--processes 4]
+    python render.py --text "Hello there." -o hello.wav
+
+FLAC and OGG need the soundfile package (installed with Coqui TTS); plain WAV works without it.
+"""
+
+import argparse
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+import batch_synthesis
+import document_reader
+import model_manager
+import synthesis_pipeline
+import synthesis_server
+import text_normalizer
+
+# --- Configuration ---
+DEFAULT_MODEL = "tts_models/en/vctk/vits"
+DEFAULT_VOICE = "p243"
+DEFAULT_PROCESSES = 2
+SEGMENT_GAP_SECONDS = 0.15        # silence between segments, like the pause between live sentences
+PROGRESS_INTERVAL = 1.0           # seconds between on_progress calls
+
+FORMATS = {                       # extension -> (libsndfile format, subtype)
+    ".wav": ("WAV", "PCM_16"),
+    ".flac": ("FLAC", "PCM_16"),
+    ".ogg": ("OGG", "VORBIS"),
+}
+
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
+
+
+def check_output_path(path):
+    """Raises ValueError if `path` has an extension we cannot write; returns the extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported format '{extension}'; use one of {', '.join(FORMATS)}")
+    if soundfile is None and extension != ".wav":
+        raise ValueError(f"Writing {extension} files needs the soundfile package (pip install soundfile)")
+    return extension
+
+
+class AudioFileWriter:
+    """Streaming mono encoder: each write() goes straight to the file."""
+    def __init__(self, path, sample_rate):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.frames = 0
+        extension = check_output_path(path)
+
+        self._soundfile = None
+        self._wave = None
+        if soundfile is not None:
+            file_format, subtype = FORMATS[extension]
+            self._soundfile = soundfile.SoundFile(path, "w", samplerate=sample_rate, channels=1,
+                                                  format=file_format, subtype=subtype)
+        else:
+            self._wave = wave.open(path, "wb")
+            self._wave.setnchannels(1)
+            self._wave.setsampwidth(2)
+            self._wave.setframerate(sample_rate)
+
+    def write(self, wav):
+        wav = np.asarray(wav, dtype=np.float32)
+        if self._soundfile is not None:
+            self._soundfile.write(wav)
+        else:
+            self._wave.writeframes((np.clip(wav, -1.0, 1.0) * 32767).astype("<i2").tobytes())
+        self.frames += len(wav)
+
+    def write_silence(self, seconds):
+        self.write(np.zeros(int(seconds * self.sample_rate), dtype=np.float32))
+
+    def close(self):
+        if self._soundfile is not None:
+            self._soundfile.close()
+        elif self._wave is not None:
+            self._wave.close()
+
+
+def segments_from_text(text):
+    return synthesis_pipeline.segment_text(text, first_max_chars=synthesis_pipeline.DEFAULT_MAX_SEGMENT_CHARS)
+
+def segments_from_file(path):
+    """Lazily cleaned and segmented paragraphs of a text file (see document_reader.py)."""
+    document = document_reader.Document(path)
+    clean = text_normalizer.build_pipeline("books")
+    for _, segment in document_reader.iter_segments(document, 0, segments_from_text, clean):
+        yield segment
+
+
+class RenderJob:
+    """
+    Renders `segments` (any iterable of text segments) to `out_path`.
+    processes > 0 synthesizes in that many worker processes; 0 loads the model in this process.
+    `on_progress(stats)` is called from the rendering thread about once a second.
+    """
+    def __init__(self, segments, out_path, model_name=DEFAULT_MODEL, voice="default", lang="default",
+                 processes=DEFAULT_PROCESSES, batch_size=batch_synthesis.DEFAULT_BATCH_SIZE,
+                 memory_budget_mb=2048, on_progress=None):
+        check_output_path(out_path) # fail before loading a model
+        self.segments = segments
+        self.out_path = out_path
+        self.model_name = model_name
+        self.voice = voice
+        self.lang = lang
+        self.processes = max(0, int(processes))
+        self.batch_size = batch_size
+        self.memory_budget_mb = memory_budget_mb
+        self.on_progress = on_progress
+        self.cancelled = False
+
+        self.chars = 0
+        self.segments_done = 0
+        self.load_seconds = 0.0
+        self.started_at = None
+        self.pipeline = None
+        self.ok = False
+        self._writer = None
+        self._last_progress = 0.0
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _backend(self):
+        """Returns (synthesize_batch, workers, sample_rate, close)."""
+        if self.processes > 0:
+            server = synthesis_server.SynthesisServer(processes=self.processes, memory_budget_mb=self.memory_budget_mb,
+                                                      warm_up=False)
+            server.load(self.model_name)
+            synthesize = lambda batch: server.submit(batch, self.model_name, self.voice, self.lang).result()
+            return synthesize, self.processes, server.sample_rates[self.model_name], server.stop
+
+        tts = model_manager.load_tts_model(self.model_name, model_manager.default_device())
+        synthesize = lambda batch: batch_synthesis.synthesize_batch(tts, batch, self.voice, self.lang)
+        return synthesize, 1, model_manager.output_sample_rate(tts), lambda: None
+
+    def _on_sentence(self, sentence):
+        self.chars += len(sentence)
+        self.segments_done += 1
+
+    def _on_audio(self, wav):
+        if self._writer.frames:
+            self._writer.write_silence(SEGMENT_GAP_SECONDS)
+        self._writer.write(wav)
+        if self.on_progress is not None and time.perf_counter() - self._last_progress >= PROGRESS_INTERVAL:
+            self._last_progress = time.perf_counter()
+            self.on_progress(self.stats())
+
+    def run(self):
+        """Blocks until the file is written (or cancelled); returns stats()."""
+        start = time.perf_counter()
+        synthesize, workers, sample_rate, close = self._backend()
+        self.load_seconds = time.perf_counter() - start
+        try:
+            self._writer = AudioFileWriter(self.out_path, sample_rate)
+            self.started_at = time.perf_counter()
+            self.pipeline = synthesis_pipeline.SynthesisPipeline(
+                synthesize=lambda sentence: synthesize([sentence])[0],
+                synthesize_batch=synthesize,
+                batch_size=self.batch_size,
+                sentences=self.segments,
+                on_audio=self._on_audio,
+                on_sentence=self._on_sentence,
+                lookahead=2 * workers,
+                workers=workers,
+                is_cancelled=lambda: self.cancelled,
+                sample_rate=sample_rate
+            )
+            self.ok = self.pipeline.run()
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+            close()
+        return self.stats()
+
+    def stats(self):
+        """Render throughput; `x_realtime` is seconds of audio produced per second of wall time."""
+        wall = time.perf_counter() - self.started_at if self.started_at else 0.0
+        audio = self._writer.frames / self._writer.sample_rate if self._writer else 0.0
+        return {
+            "segments": self.segments_done,
+            "chars": self.chars,
+            "audio_s": round(audio, 1),
+            "wall_s": round(wall, 1),
+            "load_s": round(self.load_seconds, 1),
+            "x_realtime": round(audio / wall, 2) if wall else 0.0,
+            "chars_per_s": round(self.chars / wall, 1) if wall else 0.0,
+        }
+
+
+def add_arguments(parser):
+    """Render options, shared with `python speech_engine.py render`."""
+    parser.add_argument("input", nargs="?", help="text file to render ('-' reads standard input)")
+    parser.add_argument("--text", help="render this text instead of a file")
+    parser.add_argument("-o", "--output", required=True, help="output file: .wav, .flac or .ogg")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--voice", default=DEFAULT_VOICE)
+    parser.add_argument("--lang", default="default")
+    parser.add_argument("--processes", type=int, default=DEFAULT_PROCESSES,
+                        help="worker processes (0 = synthesize in this process)")
+    parser.add_argument("--batch-size", type=int, default=batch_synthesis.DEFAULT_BATCH_SIZE)
+
+def main(args):
+    """Runs a render from parsed add_arguments() options; returns the exit status."""
+    try:
+        check_output_path(args.output)
+    except ValueError as e:
+        print(f"render: {e}")
+        return 2
+    if args.text is not None:
+        segments = segments_from_text(args.text)
+    elif args.input == "-":
+        segments = segments_from_text(sys.stdin.read())
+    elif args.input:
+        segments = segments_from_file(args.input)
+    else:
+        print("render: give an input file or --text")
+        return 2
+
+    job = RenderJob(segments, args.output, args.model, args.voice, args.lang, args.processes, args.batch_size,
+                    on_progress=lambda s: print(f"  {s['segments']} segments, {s['audio_s']}s of audio, "
+                                                f"{s['x_realtime']}x real time", flush=True))
+    try:
+        stats = job.run()
+    except KeyboardInterrupt:
+        job.cancel()
+        return 1
+    print(f"Wrote {args.output}: {stats}")
+    return 0 if job.ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    sys.exit(main(parser.parse_args()))
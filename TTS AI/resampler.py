@@ -0,0 +1,63 @@
+# resampler.py
+# -*- coding: utf-8 -*-
+
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+
+# --- Configuration ---
+ZERO_CROSSINGS = 16   # filter half-length in input samples (at the lower of the two rates)
+KAISER_BETA = 8.0     # ~80 dB stopband, well below what the TTS models themselves produce
+ROLLOFF = 0.94        # cutoff as a fraction of the lower Nyquist, leaving room for the transition band
+BLOCK_SAMPLES = 32768 # output samples computed per step, bounding the gather matrix to a few MB
+
+
+@lru_cache(maxsize=16)
+def _polyphase_filter(up, down):
+    """
+    Windowed-sinc low-pass for upsampling by `up` and downsampling by `down`, split into `up`
+    phases: row p holds the taps h[p], h[p + up], h[p + 2*up], ... reversed, ready to be
+    multiplied with a window of consecutive input samples.
+    """
+    ratio = max(up, down)
+    half = ZERO_CROSSINGS * ratio
+    n = np.arange(-half, half + 1, dtype=np.float64)
+    cutoff = ROLLOFF / ratio
+    taps = cutoff * np.sinc(cutoff * n) * np.kaiser(len(n), KAISER_BETA) * up
+
+    taps_per_phase = -(-len(taps) // up)
+    padded = np.zeros(taps_per_phase * up)
+    padded[:len(taps)] = taps
+    phases = padded.reshape(taps_per_phase, up).T[:, ::-1]
+    return np.ascontiguousarray(phases, dtype=np.float32), half
+
+
+def resample(wav, from_rate, to_rate):
+    """
+    Returns `wav` (1-D float32) converted from `from_rate` to `to_rate` Hz with a polyphase FIR,
+    i.e. upsample by L, low-pass, downsample by M without ever building the L-times longer signal.
+    Each output sample is a dot product of one filter phase with a window of the input, so a whole
+    block is one gather plus one einsum. Same rate returns the input unchanged.
+    """
+    from_rate, to_rate = int(from_rate), int(to_rate)
+    if from_rate == to_rate or len(wav) == 0:
+        return wav
+    common = gcd(from_rate, to_rate)
+    up, down = to_rate // common, from_rate // common
+    phases, half = _polyphase_filter(up, down)
+    taps_per_phase = phases.shape[1]
+
+    # Zero padding on both sides, so every window is a plain slice of `padded`
+    wav = np.asarray(wav, dtype=np.float32)
+    padded = np.concatenate((np.zeros(taps_per_phase - 1, dtype=np.float32), wav,
+                             np.zeros(taps_per_phase + 1, dtype=np.float32)))
+    windows = np.lib.stride_tricks.sliding_window_view(padded, taps_per_phase)
+
+    out_len = -(-len(wav) * up // down)
+    out = np.empty(out_len, dtype=np.float32)
+    for start in range(0, out_len, BLOCK_SAMPLES):
+        # Position of each output sample on the (virtual) upsampled time line, filter delay removed
+        t = np.arange(start, min(start + BLOCK_SAMPLES, out_len), dtype=np.int64) * down + half
+        np.einsum("ij,ij->i", windows[t // up], phases[t % up], out=out[start:start + len(t)])
+    return out
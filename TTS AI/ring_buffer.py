@@ -0,0 +1,177 @@
+# ring_buffer.py
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+import numpy as np
+
+# --- Configuration ---
+DEFAULT_CAPACITY_SECONDS = 30
+WRITE_RETRY_INTERVAL = 0.005 # seconds the producer sleeps while the buffer is full
+
+
+class AudioRingBuffer:
+    """
+    Preallocated single-producer/single-consumer float32 ring buffer for the audio callback.
+
+    The producer (synthesis thread) only advances `_write_idx` and the consumer (sounddevice
+    callback) only advances `_read_idx`, so neither side needs a lock: each index is a plain
+    int assignment, which is atomic under the GIL. Both indices grow forever and are wrapped
+    with `% capacity` when touching the array.
+
+    Flushing is requested from any thread by publishing `_discard_to`; the consumer (and the
+    fill-level helpers) treat everything before it as already played.
+
+    A superseded producer may still be inside write() when the next utterance starts, so writers
+    are serialized by a lock the consumer never takes, and each write carries the epoch returned
+    by begin_utterance(): flush() bumps the epoch, and a write from an older epoch stops and
+    drops its data instead of landing after the flush.
+    """
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._buffer = np.zeros(self.capacity, dtype=np.float32)
+        self._write_idx = 0
+        self._read_idx = 0
+        self._discard_to = 0
+        self._epoch = 0
+        self._producer_lock = threading.Lock()
+
+        self.paused = False
+        self.producer_done = True
+        self._playing = False # True once the current utterance has produced its first block
+
+        # Metrics
+        self.underflows = 0
+        self.blocks_read = 0
+        self.min_fill = self.capacity
+
+    # --- Shared Helpers ---
+
+    def _effective_read_idx(self):
+        return max(self._read_idx, self._discard_to)
+
+    def write_position(self):
+        """Total samples written so far; compare with played_position() to see when audio is reached."""
+        return self._write_idx
+
+    def played_position(self):
+        """Total samples played (or discarded) so far."""
+        return self._effective_read_idx()
+
+    def fill_level(self):
+        """Number of samples waiting to be played."""
+        return self._write_idx - self._effective_read_idx()
+
+    def fill_ratio(self):
+        return self.fill_level() / self.capacity
+
+    def is_empty(self):
+        return self.fill_level() <= 0
+
+    # --- Producer Side ---
+
+    def begin_utterance(self):
+        """
+        Marks the start of a new utterance; underflows are only counted once audio has started.
+        Returns the epoch to pass to write() and end_utterance().
+        """
+        self.producer_done = False
+        self._playing = False
+        return self._epoch
+
+    def end_utterance(self, epoch=None):
+        """Marks that no more audio is coming, so running dry is expected rather than an underflow."""
+        if epoch is None or epoch == self._epoch:
+            self.producer_done = True
+
+    def write(self, samples, is_cancelled=None, epoch=None):
+        """
+        Copies samples into the buffer, waiting for the consumer whenever it is full.
+        Returns the number of samples written (less than len(samples) if cancelled while waiting,
+        or if the buffer was flushed since `epoch`).
+        """
+        samples = np.asarray(samples, dtype=np.float32).ravel()
+        total = len(samples)
+        pos = 0
+        while pos < total:
+            with self._producer_lock:
+                if epoch is not None and epoch != self._epoch:
+                    break
+                write_idx = self._write_idx
+                free = self.capacity - (write_idx - self._effective_read_idx())
+                if free > 0:
+                    count = min(free, total - pos)
+                    start = write_idx % self.capacity
+                    first = min(count, self.capacity - start)
+                    self._buffer[start:start + first] = samples[pos:pos + first]
+                    if count > first:
+                        self._buffer[:count - first] = samples[pos + first:pos + count]
+                    pos += count
+                    self._write_idx = write_idx + count # publish only after the data is in place
+                    continue
+            if is_cancelled and is_cancelled():
+                break
+            time.sleep(WRITE_RETRY_INTERVAL)
+        return pos
+
+    def wait_until_drained(self, is_cancelled=None, poll_interval=0.05):
+        """Blocks until the consumer has played everything written so far."""
+        while not self.is_empty():
+            if is_cancelled and is_cancelled():
+                return False
+            time.sleep(poll_interval)
+        return True
+
+    # --- Any Thread ---
+
+    def flush(self):
+        """Drops everything queued for playback without touching the array; older writes stop."""
+        with self._producer_lock: # waits for at most one chunk copy of a write in progress
+            self._epoch += 1
+            self._discard_to = self._write_idx
+
+    def cancel(self):
+        self.flush()
+        self.producer_done = True
+        self.paused = False
+
+    # --- Consumer Side (real-time callback, no allocation) ---
+
+    def read_into(self, out):
+        """Fills the 1-D float32 view `out` with the next samples, padding with silence."""
+        frames = len(out)
+        if self.paused:
+            out.fill(0)
+            return 0
+
+        read_idx = self._effective_read_idx()
+        available = self._write_idx - read_idx
+        if available < self.min_fill:
+            self.min_fill = max(available, 0)
+
+        count = min(frames, available)
+        if count > 0:
+            start = read_idx % self.capacity
+            first = min(count, self.capacity - start)
+            out[:first] = self._buffer[start:start + first]
+            if count > first:
+                out[first:count] = self._buffer[:count - first]
+            self._read_idx = read_idx + count
+            self._playing = True
+        if count < frames:
+            out[count:] = 0
+            if self._playing and not self.producer_done:
+                self.underflows += 1
+
+        self.blocks_read += 1
+        return count
+
+    def stats(self):
+        return {
+            "fill_samples": self.fill_level(),
+            "fill_ratio": round(self.fill_ratio(), 3),
+            "min_fill_samples": self.min_fill,
+            "underflows": self.underflows,
+            "blocks_read": self.blocks_read,
+        }
@@ -0,0 +1,199 @@
+# scan_service.py
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+from tracing import tracer
+
+# --- Schedule Defaults ---
+FAST_INTERVAL = 0.05  # seconds between frames right after a click or while the ROI is changing
+SLOW_INTERVAL = 0.5   # ceiling the interval backs off to while the ROI stays unchanged
+BACKOFF = 1.5         # interval multiplier per unchanged frame
+MAX_SCAN_TIME = 20    # seconds before a continuous scan gives up
+
+# --- Step Results (returned by the step functions) ---
+FOUND = "found"       # valid text was sent; scan finished
+FAILED = "failed"     # fatal error (capture/OCR); scan finished
+CHANGING = "changing" # ROI changed or new text was OCR'd but rejected; keep polling fast
+STABLE = "stable"     # nothing new on screen; back off
+
+# --- Scan Modes ---
+CONTINUOUS = "continuous"
+SINGLE = "single"
+
+
+class ScanJob:
+    """One scan request. `context` carries whatever the step functions need (widgets etc.)."""
+    def __init__(self, mode, context=None):
+        self.mode = mode
+        self.context = context
+        self.state = {} # scratch space for the step functions (e.g. a frame-change detector)
+        self.created_at = time.perf_counter()
+        self.frames = 0
+        self.result = None
+        self.time_to_valid_ms = None
+        self.cancelled = False
+
+
+class ScanService:
+    """
+    Long-lived scanning thread with an adaptive frame schedule.
+
+    - Polls every FAST_INTERVAL right after a request and backs off towards SLOW_INTERVAL
+      while frames come back STABLE; any CHANGING frame snaps back to the fast rate.
+    - A new request while a scan is running supersedes it (restarts the clock) instead of
+      starting another thread, so mashing the hotkey can never stack scans.
+    - cancel() wakes the thread immediately; no waiting out a sleep.
+
+    step(job)        -> one frame of a continuous scan, returns FOUND/FAILED/CHANGING/STABLE
+    single_step(job) -> a one-shot scan
+    on_timeout(job)  -> called when a continuous scan runs out of time
+    on_state(active) -> called from the scan thread when scanning starts/stops
+    """
+    def __init__(self, step, single_step=None, on_timeout=None, on_state=None,
+                 fast_interval=FAST_INTERVAL, slow_interval=SLOW_INTERVAL,
+                 backoff=BACKOFF, max_scan_time=MAX_SCAN_TIME):
+        self.step = step
+        self.single_step = single_step
+        self.on_timeout = on_timeout
+        self.on_state = on_state
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.backoff = backoff
+        self.max_scan_time = max_scan_time
+
+        self._cond = threading.Condition()
+        self._pending = None
+        self._current = None
+        self._stopped = False
+        self._thread = None
+
+        # Metrics
+        self.scans_started = 0
+        self.scans_superseded = 0
+        self.scans_found = 0
+        self.last_scan_rate = 0.0     # frames per second of the last finished scan
+        self.last_time_to_valid_ms = None
+        self._time_to_valid_total = 0.0
+
+    # --- Control (any thread) ---
+
+    def start(self):
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name="scan-service", daemon=True)
+                self._thread.start()
+
+    def request(self, mode=CONTINUOUS, context=None):
+        """Queues a scan, superseding any scan that is still running."""
+        self.start()
+        job = ScanJob(mode, context)
+        with self._cond:
+            if self._current is not None:
+                self._current.cancelled = True
+                self.scans_superseded += 1
+            self._pending = job
+            self._cond.notify_all()
+        return job
+
+    def cancel(self):
+        """Stops the running scan (and drops a queued one) immediately."""
+        with self._cond:
+            if self._current is not None:
+                self._current.cancelled = True
+            self._pending = None
+            self._cond.notify_all()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            if self._current is not None:
+                self._current.cancelled = True
+            self._pending = None
+            self._cond.notify_all()
+
+    @property
+    def is_scanning(self):
+        return self._current is not None
+
+    # --- Scan Thread ---
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                job = self._current = self._pending
+                self._pending = None
+
+            self.scans_started += 1
+            self._notify_state(True)
+            try:
+                if job.mode == SINGLE:
+                    job.result = self.single_step(job) if self.single_step else FAILED
+                else:
+                    self._run_continuous(job)
+            except Exception as e:
+                print(f"Scan service: error during {job.mode} scan: {e}")
+                job.result = FAILED
+            finally:
+                with self._cond:
+                    self._current = None
+                    idle = self._pending is None
+                if idle:
+                    self._notify_state(False)
+
+    def _run_continuous(self, job):
+        interval = self.fast_interval
+        start = job.created_at
+        while not job.cancelled:
+            if time.perf_counter() - start >= self.max_scan_time:
+                if self.on_timeout:
+                    self.on_timeout(job)
+                job.result = None
+                break
+
+            result = self.step(job)
+            job.frames += 1
+            if result in (FOUND, FAILED):
+                job.result = result
+                if result == FOUND:
+                    job.time_to_valid_ms = (time.perf_counter() - start) * 1000
+                    self.scans_found += 1
+                    self.last_time_to_valid_ms = job.time_to_valid_ms
+                    self._time_to_valid_total += job.time_to_valid_ms
+                    tracer.record("scan_to_text", job.time_to_valid_ms, frames=job.frames)
+                break
+
+            if result == STABLE:
+                interval = min(interval * self.backoff, self.slow_interval)
+            else:
+                interval = self.fast_interval
+
+            with self._cond:
+                if not job.cancelled:
+                    self._cond.wait(interval) # woken early by request()/cancel()
+
+        elapsed = time.perf_counter() - start
+        self.last_scan_rate = job.frames / elapsed if elapsed > 0 else 0.0
+
+    def _notify_state(self, active):
+        if self.on_state:
+            try:
+                self.on_state(active)
+            except Exception as e:
+                print(f"Scan service: error in state callback: {e}")
+
+    def stats(self):
+        return {
+            "scans_started": self.scans_started,
+            "scans_superseded": self.scans_superseded,
+            "scans_found": self.scans_found,
+            "last_scan_rate_fps": round(self.last_scan_rate, 1),
+            "last_time_to_valid_ms": None if self.last_time_to_valid_ms is None else round(self.last_time_to_valid_ms, 1),
+            "avg_time_to_valid_ms": round(self._time_to_valid_total / self.scans_found, 1) if self.scans_found else None,
+        }
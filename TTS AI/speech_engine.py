@@ -0,0 +1,744 @@
+# speech_engine.py
+# -*- coding: utf-8 -*-
+
+"""
+Headless speech engine: model loading, synthesis, playback and file reading without Tk or
+global keyboard hooks, so it can be scripted, benchmarked or run on a machine with no display.
+TTS_AI.py is the GUI on top of it. torch/TTS load with the first model, sounddevice with it too.
+
+    python speech_engine.py speak "Hello there." [--model ...] [--voice p243] [--lang ...]
+    python speech_engine.py speak --file book.txt [--paragraph 12]
+    python speech_engine.py render chapter.txt -o chapter.flac     (same options as render.py)
+    python speech_engine.py serve                                  (control API only, see control_server.py)
+    python speech_engine.py voices [--model ...]
+    python speech_engine.py devices                                (audio outputs, for --device / "audio_device")
+"""
+
+import argparse
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+import audio_cache
+import batch_synthesis
+import document_reader
+import model_manager
+import program
+import resampler
+import ring_buffer
+import synthesis_pipeline
+import synthesis_server
+import text_normalizer
+from tracing import tracer
+
+# --- Configuration ---
+DEFAULT_MODEL = "tts_models/en/vctk/vits"
+DEFAULT_VOICE = "p243"
+MODELS = [
+    "tts_models/en/ljspeech/tacotron2-DDC",
+    "tts_models/en/vctk/vits",
+    "tts_models/multilingual/multi-dataset/your_tts",
+]
+OUTPUT_SAMPLE_RATE = 22050 # fallback when a model does not report its rate
+MAX_BUFFER_RATE = 48000    # the ring buffer is sized for this rate, so it never has to be reallocated
+CHUNK_SIZE = 1024
+PLAYBACK_POLL = 0.05       # seconds between checks of how far playback has got (for on_sentence)
+
+
+# --- Text Helpers ---
+
+def normalize_text(text):
+    """Cleans up text for reliable comparison."""
+    if not text:
+        return ""
+    text = text.strip()
+    text = ' '.join(text.split())
+    return text
+
+def format_metrics(metrics):
+    return ", ".join(f"{k}={v:.1f}" for k, v in metrics.items())
+
+
+class NullOutputStream:
+    """
+    Stand-in for sounddevice.OutputStream that plays into nothing: a thread pulls blocks from
+    the callback at the real-time rate, so buffering and back-pressure behave as on a device.
+    For benchmarks and machines without audio (audio_output="null").
+    """
+    def __init__(self, samplerate, channels, callback, blocksize):
+        self.samplerate = samplerate
+        self.callback = callback
+        self.blocksize = blocksize
+        self._buffer = np.zeros((blocksize, channels), dtype=np.float32)
+        self._running = False
+        self._thread = None
+
+    def _run(self):
+        interval = self.blocksize / self.samplerate
+        next_block = time.perf_counter()
+        while self._running:
+            self.callback(self._buffer, self.blocksize, None, None)
+            next_block += interval
+            delay = next_block - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="null-audio", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def close(self):
+        pass
+
+
+class SpeechEngine:
+    """
+    Speaks text on the default audio device. speak(), speak_segments() and read_document()
+    return at once and synthesize on a background thread (returned, so scripts can join it);
+    a newer request or cancel() supersedes the one playing.
+
+    `settings` is a program.DEFAULT_SETTINGS-style dict, read when each request starts.
+    `audio_output` is "device" (sounddevice) or "null" (see NullOutputStream).
+
+    The output stream is opened once and kept running between utterances (the ring buffer plays
+    silence while idle); it is only reopened when the sample rate it needs changes. It runs at the
+    model's own rate, or at the device's rate with "audio_sample_rate": "device", in which case
+    audio is converted by resampler.resample before it is queued.
+    """
+    def __init__(self, settings=None, started_at=None, audio_output="device"):
+        self.settings = settings if settings is not None else dict(program.DEFAULT_SETTINGS)
+        self.started_at = started_at or time.perf_counter()
+        self.audio_output = audio_output
+        self.metrics = {}
+        self.first_speech_pending = True # first-speech latency is reported once per run
+        self.last_ttfa_ms = None # request -> first audio queued for playback, latest request
+        self.last_stats = None   # synthesis stats of the latest finished request
+
+        # Current model/voice/language, set by load_model() and select()
+        self.model_name = DEFAULT_MODEL
+        self.voice = DEFAULT_VOICE
+        self.lang = "default"
+        self.voices = []
+        self.languages = ["default"]
+
+        # --- Playback State ---
+        self.is_paused = False
+        self.is_cancelled = False
+        self.generation = 0 # bumped on every speak request so stale workers can tell they were superseded
+        self.device = None
+        self.stream = None
+        self.stream_rate = None # sample rate the open stream plays at
+        self._stream_request = None # rate it was opened for (differs after a fallback to the device rate)
+        self._stream_lock = threading.Lock()
+
+        # --- File Reading State ---
+        self.current_document = None # document_reader.Document being read, if any
+        self.reading_positions = document_reader.ReadingPositions()
+
+        settings = self.settings
+        # Export is opt-in; a relative trace_file lands next to config.json, not in the working directory
+        trace_path = program.data_path(settings["trace_file"]) if settings["trace_file"] else None
+        tracer.configure(settings["tracing_enabled"], trace_path, settings["trace_file_mb"])
+        self.audio_cache = audio_cache.AudioCache(
+            memory_limit_mb=settings["audio_cache_memory_mb"],
+            disk_limit_mb=settings["audio_cache_disk_mb"],
+            enabled=settings["audio_cache_enabled"]
+        )
+        # Preallocated, read lock-free by audio_callback
+        self.audio_ring = ring_buffer.AudioRingBuffer(MAX_BUFFER_RATE * settings["audio_buffer_seconds"])
+
+        self.model_pool = model_manager.ModelManager(
+            loader=self._load_tts,
+            warm_up=model_manager.warm_up_model if settings["model_warm_up"] else None,
+            memory_budget_mb=settings["model_memory_budget_mb"]
+        )
+        # Out-of-process synthesis; synthesis_processes = 0 keeps inference in this process
+        self.synth_server = None
+        if settings["synthesis_processes"] > 0:
+            self.synth_server = synthesis_server.SynthesisServer(
+                processes=settings["synthesis_processes"],
+                memory_budget_mb=settings["model_memory_budget_mb"],
+                warm_up=settings["model_warm_up"]
+            )
+
+        # Read only when the metrics panel or the trace export asks
+        tracer.probe("audio_underflows", lambda: self.audio_ring.underflows)
+        tracer.probe("audio_buffer_s", lambda: round(self.audio_ring.fill_level() / (self.stream_rate or OUTPUT_SAMPLE_RATE), 2))
+        tracer.probe("synth_in_flight", lambda: self.synth_server.stats()["in_flight"] if self.synth_server else 0)
+
+    # --- Models ---
+
+    def _load_tts(self, model_name):
+        """Builds a model on the current device. Blocking; model_pool calls it from a background thread."""
+        start = time.perf_counter()
+        import torch
+        from TTS.api import TTS
+        self.metrics.setdefault("torch_tts_import_s", time.perf_counter() - start)
+        if self.device is None:
+            self.device = model_manager.default_device()
+            print(f"Using device: {self.device}")
+        return model_manager.load_tts_model(model_name, self.device)
+
+    def is_resident(self, model_name):
+        """True if load_model(model_name) will return at once."""
+        return self.synth_server is None and self.model_pool.is_resident(model_name)
+
+    def load_model(self, model_name):
+        """
+        Makes `model_name` current and returns its (voices, languages); the voice and language
+        are reset to the model's defaults. Blocking. Falls back to in-process synthesis if the
+        worker processes cannot start.
+        """
+        start = time.perf_counter()
+        if self.synth_server is not None:
+            try:
+                voices, languages = self.synth_server.load(model_name)
+            except synthesis_server.WorkerStartError as e:
+                self._synthesize_in_process(e)
+        if self.synth_server is None:
+            resident = self.model_pool.switch(model_name)
+            voices, languages = model_manager.describe_model(resident.model, model_name)
+        # Import the audio stack now too, so the first speak does not pay for it
+        if self.audio_output == "device":
+            try:
+                import sounddevice
+            except OSError as e: # no PortAudio library; only speaking needs it
+                print(f"Audio output unavailable: {e}")
+
+        load_seconds = time.perf_counter() - start
+        if "model_load_s" not in self.metrics:
+            self.metrics["model_load_s"] = load_seconds
+            self.metrics["model_ready_since_start_s"] = time.perf_counter() - self.started_at
+        print(f"Model '{model_name}' ready in {load_seconds:.2f}s. Backend: {self.backend_stats()}")
+
+        self.model_name = model_name
+        self.voices, self.languages = list(voices), list(languages)
+        if model_name == DEFAULT_MODEL and DEFAULT_VOICE in voices:
+            self.voice = DEFAULT_VOICE
+        else:
+            self.voice = voices[0] if voices else "default"
+        self.lang = languages[0]
+        return voices, languages
+
+    def select(self, model=None, voice=None, language=None):
+        """
+        Switches model, voice and/or language, loading the model first if it changed (blocking).
+        Raises ValueError for a voice or language the model does not offer.
+        """
+        if model and (model != self.model_name or not self.voices):
+            self.load_model(model)
+        if voice and voice != self.voice:
+            if voice not in self.voices:
+                raise ValueError(f"voice '{voice}' is not available for {self.model_name}")
+            self.voice = voice
+        if language and language != self.lang:
+            if language not in self.languages:
+                raise ValueError(f"language '{language}' is not available for {self.model_name}")
+            self.lang = language
+
+    def preload(self, models):
+        """Keeps other models resident for instant switching, in the worker processes or in this one."""
+        others = [m for m in models if m != self.model_name]
+        if not others:
+            return
+        if self.synth_server is not None:
+            self.synth_server.preload(others)
+        else:
+            self.model_pool.preload_async(others)
+
+    def _synthesize_in_process(self, reason):
+        """Falls back from the worker processes to in-process synthesis for good."""
+        print(f"Synthesis workers unavailable ({reason}); synthesizing in this process instead.")
+        synth_server, self.synth_server = self.synth_server, None
+        if synth_server is not None:
+            synth_server.stop()
+
+    def backend_stats(self):
+        return self.synth_server.stats() if self.synth_server is not None else self.model_pool.stats()
+
+    def model_sample_rate(self, model_name, tts=None):
+        """Output rate of a loaded model: from the worker processes, or from the in-process `tts`."""
+        if tts is not None:
+            return model_manager.output_sample_rate(tts, OUTPUT_SAMPLE_RATE)
+        if self.synth_server is not None:
+            return self.synth_server.sample_rates.get(model_name, OUTPUT_SAMPLE_RATE)
+        return OUTPUT_SAMPLE_RATE
+
+    # --- Audio Output ---
+
+    def audio_callback(self, outdata, frames, time_, status):
+        if status:
+            # Filter underflow messages if they are excessive, or keep them for debugging audio issues
+            if "underflow" not in str(status):
+                print(status)
+            else:
+                tracer.count("output_underflows")
+
+        # Pause/cancel are handled inside the ring buffer; nothing here allocates.
+        self.audio_ring.read_into(outdata[:, 0])
+
+    def output_device(self):
+        """The "audio_device" setting as sounddevice expects it: None (default), an index or a name."""
+        device = self.settings["audio_device"]
+        if isinstance(device, str):
+            device = device.strip()
+            return int(device) if device.isdigit() else (device or None)
+        return device
+
+    def device_sample_rate(self):
+        import sounddevice as sd
+        return int(sd.query_devices(self.output_device(), "output")["default_samplerate"])
+
+    def _open_stream(self, rate):
+        if self.audio_output == "null":
+            stream = NullOutputStream(samplerate=rate, channels=1, callback=self.audio_callback, blocksize=CHUNK_SIZE)
+        else:
+            import sounddevice as sd # already imported by load_model; PortAudio init is not free
+            stream = sd.OutputStream(
+                samplerate=rate,
+                channels=1,
+                device=self.output_device(),
+                callback=self.audio_callback,
+                blocksize=CHUNK_SIZE
+            )
+        stream.start()
+        self.stream, self.stream_rate = stream, rate
+
+    def start_stream(self, model_rate=OUTPUT_SAMPLE_RATE):
+        """
+        Makes sure the output stream is running at the rate audio at `model_rate` should play at,
+        reusing the open stream when it already does. Returns the stream's rate.
+        """
+        with self._stream_lock:
+            rate = model_rate
+            if self.audio_output != "null" and self.settings["audio_sample_rate"] == "device":
+                rate = self.device_sample_rate()
+            if self.stream is not None and self._stream_request == rate:
+                return self.stream_rate
+            self._close_stream()
+            try:
+                self._open_stream(rate)
+            except Exception as e:
+                if self.audio_output == "null" or rate != model_rate:
+                    raise
+                # Some devices/host APIs only run at their own rate; resample to that instead
+                device_rate = self.device_sample_rate()
+                print(f"Audio output: {rate} Hz not supported ({e}); using the device rate {device_rate} Hz.")
+                self._open_stream(device_rate)
+            self._stream_request = rate
+            if self.stream_rate != model_rate:
+                print(f"Audio output: {self.stream_rate} Hz, resampling from {model_rate} Hz.")
+            return self.stream_rate
+
+    def _close_stream(self):
+        stream = self.stream
+        if stream:
+            self.stream = None
+            self.stream_rate = self._stream_request = None
+            stream.stop()
+            stream.close()
+
+    def stop_stream(self):
+        with self._stream_lock:
+            self._close_stream()
+
+    # --- Synthesis ---
+
+    def synthesize_sentence(self, synthesize, sentence, model_name, voice, lang):
+        """Returns the float32 waveform for one sentence, from the audio cache or `synthesize(sentence)`."""
+        cache_key = audio_cache.make_cache_key(sentence, model_name, voice, lang)
+        wav = self.audio_cache.get(cache_key)
+        if wav is None:
+            wav = synthesize(sentence)
+            self.audio_cache.put(cache_key, wav)
+        return wav
+
+    def synthesize_sentences(self, synthesize_batch, sentences, model_name, voice, lang):
+        """Batch version of synthesize_sentence: only sentences missing from the audio cache are synthesized."""
+        keys = [audio_cache.make_cache_key(s, model_name, voice, lang) for s in sentences]
+        wavs = [self.audio_cache.get(key) for key in keys]
+        missing = [i for i, wav in enumerate(wavs) if wav is None]
+        if missing:
+            for i, wav in zip(missing, synthesize_batch([sentences[i] for i in missing])):
+                self.audio_cache.put(keys[i], wav)
+                wavs[i] = wav
+        return wavs
+
+    # --- Speaking ---
+
+    def speak(self, text, requested_at=None, model=None, voice=None, lang=None):
+        """Speaks `text`, split into sentences (long ones at clause boundaries, the first one short)."""
+        if not text:
+            return None
+        requested_at = requested_at or time.perf_counter()
+        sentences = synthesis_pipeline.segment_text(text, self.settings["segment_max_chars"],
+                                                    self.settings["first_segment_max_chars"])
+        return self.speak_segments(sentences, requested_at, model=model, voice=voice, lang=lang)
+
+    def speak_segments(self, sentences, requested_at=None, on_sentence=None, on_finished=None,
+                       model=None, voice=None, lang=None):
+        """
+        Streams the TTS output of `sentences`, any iterable of text segments (consumed lazily, so it
+        can be a generator over a whole book). `on_sentence` is called from a monitor thread as each
+        segment starts playing, which can be long after it was synthesized (the ring buffer holds
+        "audio_buffer_seconds"); `on_finished` once everything has played without a cancel.
+        Model, voice and language default to the current ones. Returns the synthesis thread.
+        """
+        requested_at = requested_at or time.perf_counter()
+        selected_model = model or self.model_name
+        selected_voice = voice or self.voice
+        selected_lang = lang or self.lang
+        settings = self.settings
+
+        self.is_paused = False
+        self.is_cancelled = False
+        self.generation += 1
+        generation = self.generation
+        if self.synth_server is not None:
+            self.synth_server.cancel_pending()
+        audio_ring = self.audio_ring
+        audio_ring.flush()
+        audio_ring.paused = False
+        epoch = audio_ring.begin_utterance()
+
+        # A newer speak request supersedes this one even if is_cancelled was reset in between.
+        superseded = lambda: self.is_cancelled or self.generation != generation
+
+        # Sample index where each segment's audio starts, so on_sentence follows what is heard
+        marks = deque()
+        synthesis_done = threading.Event()
+        def mark_sentence(sentence):
+            marks.append((audio_ring.write_position(), sentence))
+
+        def playback_monitor():
+            while not superseded():
+                played = audio_ring.played_position()
+                while marks and marks[0][0] <= played:
+                    on_sentence(marks.popleft()[1])
+                if synthesis_done.is_set() and not marks:
+                    return
+                time.sleep(PLAYBACK_POLL)
+
+        first_audio = [True]
+        rates = [OUTPUT_SAMPLE_RATE, OUTPUT_SAMPLE_RATE] # model rate, stream rate; set by run_pipeline
+        def on_audio(wav):
+            if first_audio[0]:
+                first_audio[0] = False
+                self.last_ttfa_ms = (time.perf_counter() - requested_at) * 1000
+                tracer.record("ttfa", self.last_ttfa_ms)
+            if self.first_speech_pending:
+                self.first_speech_pending = False
+                self.metrics["first_speech_ms"] = (time.perf_counter() - requested_at) * 1000
+                self.metrics["first_speech_since_start_s"] = time.perf_counter() - self.started_at
+                print(f"Startup metrics: {format_metrics(self.metrics)}")
+            if rates[0] != rates[1]:
+                wav = resampler.resample(wav, rates[0], rates[1])
+            audio_ring.write(wav, is_cancelled=superseded, epoch=epoch)
+
+        def run_pipeline(synthesize_batch, workers, model_rate):
+            rates[:] = [model_rate, self.start_stream(model_rate)]
+            voice_settings = (selected_model, selected_voice, selected_lang)
+            pipeline = synthesis_pipeline.SynthesisPipeline(
+                synthesize=lambda sentence: self.synthesize_sentence(lambda s: synthesize_batch([s])[0], sentence, *voice_settings),
+                synthesize_batch=lambda batch: self.synthesize_sentences(synthesize_batch, batch, *voice_settings),
+                batch_size=settings["synthesis_batch_size"],
+                sentences=sentences,
+                on_audio=on_audio,
+                lookahead=max(settings["synthesis_lookahead"], workers),
+                workers=workers,
+                is_cancelled=superseded,
+                sample_rate=model_rate,
+                requested_at=requested_at,
+                on_sentence=mark_sentence if on_sentence is not None else None
+            )
+            completed[0] = pipeline.run()
+            return pipeline
+
+        completed = [False] # every segment was synthesized and queued
+
+        def run_in_process():
+            # Requests made while the model is still loading wait here instead of failing
+            if not self.model_pool.is_resident(selected_model):
+                print("Waiting for the voice model to finish loading...")
+            # The lease pins the model chosen at request time: switching models mid-utterance
+            # neither changes nor evicts it.
+            with self.model_pool.lease(selected_model, is_cancelled=superseded) as tts:
+                if tts is None:
+                    return None
+                # One synthesis thread: a Coqui model is not thread-safe, so parallel
+                # synthesis is left to the worker processes ("synthesis_processes").
+                return run_pipeline(
+                    lambda batch: batch_synthesis.synthesize_batch(tts, batch, selected_voice, selected_lang),
+                    1, self.model_sample_rate(selected_model, tts))
+
+        def tts_worker():
+            synth_server = self.synth_server
+            try:
+                if synth_server is not None and not synth_server.ensure_workers():
+                    # Every worker died and none could be relaunched
+                    if self.synth_server is synth_server:
+                        self._synthesize_in_process("no worker process could be relaunched")
+                    synth_server = None
+                if synth_server is not None:
+                    # Worker processes synthesize in parallel; these threads only wait on their results.
+                    kwargs = (selected_model, selected_voice, selected_lang)
+                    pipeline = run_pipeline(lambda batch: synth_server.submit(batch, *kwargs).result(),
+                                            synth_server.processes, self.model_sample_rate(selected_model))
+                else:
+                    pipeline = run_in_process()
+                if pipeline is None:
+                    return
+            except Exception as e:
+                print(f"TTS generation failed with {selected_model}: {e}")
+                return
+            finally:
+                synthesis_done.set()
+            if not superseded():
+                audio_ring.end_utterance(epoch)
+
+            # The stream stays open for the next utterance; the ring buffer plays silence meanwhile
+            drained = audio_ring.wait_until_drained(is_cancelled=superseded)
+            if monitor is not None:
+                monitor.join()
+            if drained and completed[0] and not superseded() and on_finished is not None:
+                on_finished()
+
+            self.last_stats = pipeline.stats()
+            print(f"TTS generation finished. ({pipeline.completed} segments, "
+                  f"synthesis: {self.last_stats}, buffer: {audio_ring.stats()})")
+
+        monitor = None
+        if on_sentence is not None:
+            monitor = threading.Thread(target=playback_monitor, name="tts-playback", daemon=True)
+            monitor.start()
+        thread = threading.Thread(target=tts_worker, name="tts", daemon=True)
+        thread.start()
+        return thread
+
+    def set_paused(self, paused):
+        self.is_paused = paused
+        self.audio_ring.paused = paused
+
+    def cancel(self):
+        self.is_cancelled = True
+        self.audio_ring.cancel()
+        if self.synth_server is not None:
+            self.synth_server.cancel_pending()
+        self.reading_positions.flush()
+        print("Playback cancelled.")
+
+    # --- File Reading (paragraphs streamed from disk, see document_reader.py) ---
+
+    def open_document(self, path):
+        """Indexes a text file (blocking) and makes it the current document; returns it."""
+        document = document_reader.Document(path)
+        print(f"Indexed {len(document)} paragraphs of {document.path} in {document.index_ms:.0f} ms "
+              f"({'one per line' if document.line_mode else 'blank-line separated'}).")
+        self.current_document = document
+        return document
+
+    def read_document(self, paragraph=None, on_paragraph=None, **voice):
+        """
+        Reads the current document from `paragraph` (default: where it was left), remembering the
+        position as it goes. `on_paragraph(index)` is called from the synthesis thread when a new
+        paragraph starts playing. Returns the synthesis thread, or None if there is nothing to read.
+        """
+        document = self.current_document
+        if document is None or len(document) == 0:
+            return None
+        if paragraph is None:
+            paragraph = self.reading_positions.get(document)
+        paragraph = max(0, min(paragraph, len(document) - 1))
+        self.reading_positions.set(document, paragraph)
+
+        settings = self.settings
+        clean = text_normalizer.build_pipeline("books")
+        first = [True]
+        def segment(text):
+            # Only the very first segment of the reading is kept short
+            first_max = settings["first_segment_max_chars"] if first[0] else settings["segment_max_chars"]
+            first[0] = False
+            return synthesis_pipeline.segment_text(text, settings["segment_max_chars"], first_max)
+
+        marks = deque() # paragraph of each segment handed to the pipeline, oldest first
+        def segments():
+            for index, piece in document_reader.iter_segments(document, paragraph, segment, clean):
+                marks.append(index)
+                yield piece
+
+        current = [paragraph]
+        def on_sentence(sentence):
+            index = marks.popleft()
+            if index != current[0]:
+                current[0] = index
+                self.reading_positions.set(document, index)
+                if on_paragraph is not None:
+                    on_paragraph(index)
+
+        def on_finished():
+            # Finished: start from the top next time
+            self.reading_positions.set(document, 0)
+            self.reading_positions.flush()
+
+        return self.speak_segments(segments(), time.perf_counter(), on_sentence, on_finished, **voice)
+
+    def close(self):
+        """Stops playback and the synthesis workers."""
+        self.is_cancelled = True
+        self.audio_ring.cancel()
+        self.stop_stream()
+        self.reading_positions.flush()
+        if self.synth_server is not None:
+            self.synth_server.stop()
+
+
+# --- Command Line ---
+
+def wait_for(engine, thread):
+    """Blocks until a speak request has played out; Ctrl+C cancels it."""
+    try:
+        while thread is not None and thread.is_alive():
+            thread.join(0.2)
+    except KeyboardInterrupt:
+        engine.cancel()
+
+def add_voice_arguments(parser):
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--voice", help="default: the model's first voice (p243 for VITS)")
+    parser.add_argument("--lang", help="default: the model's first language")
+
+def start_engine(args):
+    program.load_config()
+    settings = dict(program.app_settings)
+    if args.device is not None:
+        settings["audio_device"] = args.device
+    engine = SpeechEngine(settings)
+    engine.load_model(args.model)
+    engine.select(voice=args.voice, language=args.lang)
+    return engine
+
+def command_speak(args):
+    engine = start_engine(args)
+    try:
+        if args.file:
+            engine.open_document(args.file)
+            paragraph = args.paragraph - 1 if args.paragraph else None
+            wait_for(engine, engine.read_document(paragraph, on_paragraph=lambda i: print(f"Paragraph {i + 1}")))
+        else:
+            text = sys.stdin.read() if args.text == ["-"] else " ".join(args.text)
+            wait_for(engine, engine.speak(text))
+    finally:
+        engine.close()
+    return 0
+
+def command_serve(args):
+    import control_server
+    engine = start_engine(args)
+
+    def speak(request):
+        text = request.get("text")
+        if not isinstance(text, str) or not text.strip():
+            raise ValueError("'speak' needs a non-empty 'text' string")
+        engine.speak(text)
+
+    def pause(request):
+        paused = request.get("paused")
+        if paused is not None and not isinstance(paused, bool):
+            raise ValueError("'paused' must be true or false")
+        engine.set_paused(not engine.is_paused if paused is None else paused)
+
+    def set_voice(request):
+        model, voice, language = request.get("model"), request.get("voice"), request.get("language")
+        if not any(isinstance(v, str) and v for v in (model, voice, language)):
+            raise ValueError("'set-voice' needs at least one of 'voice', 'model' or 'language'")
+        if not model or model == engine.model_name:
+            engine.select(voice=voice, language=language) # errors go back to the client
+            return
+        def load():
+            try:
+                engine.select(model, voice, language)
+            except Exception as e:
+                print(f"Control: {e}")
+        threading.Thread(target=load, name="model-loader", daemon=True).start()
+
+    control = control_server.ControlServer({
+        "speak": speak,
+        "cancel": lambda request: engine.cancel(),
+        "pause": pause,
+        "set-voice": set_voice,
+    }, port=args.port or engine.settings["control_server_port"])
+    control.start()
+    print("Serving the control API; Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        control.stop()
+        engine.close()
+    return 0
+
+def command_voices(args):
+    engine = SpeechEngine(dict(program.DEFAULT_SETTINGS, synthesis_processes=0, model_warm_up=False))
+    voices, languages = engine.load_model(args.model)
+    print(f"{args.model}\n  voices: {', '.join(voices)}\n  languages: {', '.join(languages)}")
+    return 0
+
+def command_devices(args):
+    import sounddevice as sd
+    default = sd.default.device[1]
+    for index, device in enumerate(sd.query_devices()):
+        if device["max_output_channels"] > 0:
+            marker = "*" if index == default else " "
+            print(f"{marker} {index:>3}  {device['name']}  ({int(device['default_samplerate'])} Hz)")
+    return 0
+
+def command_render(args):
+    import render
+    return render.main(args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    speak_parser = commands.add_parser("speak", help="speak text or a text file on the default audio device")
+    speak_parser.add_argument("text", nargs="*", help="text to speak ('-' reads standard input)")
+    speak_parser.add_argument("--file", help="read a text file paragraph by paragraph instead")
+    speak_parser.add_argument("--paragraph", type=int, help="paragraph to start at (default: where it was left)")
+    speak_parser.add_argument("--device", help="audio output index or name (see 'devices')")
+    add_voice_arguments(speak_parser)
+    speak_parser.set_defaults(run=command_speak)
+
+    import render
+    render_parser = commands.add_parser("render", help="write speech to a WAV/FLAC/OGG file")
+    render.add_arguments(render_parser)
+    render_parser.set_defaults(run=command_render)
+
+    serve_parser = commands.add_parser("serve", help="speak requests from the control API, without a window")
+    serve_parser.add_argument("--port", type=int, help="TCP port where Unix sockets are unavailable")
+    serve_parser.add_argument("--device", help="audio output index or name (see 'devices')")
+    add_voice_arguments(serve_parser)
+    serve_parser.set_defaults(run=command_serve)
+
+    voices_parser = commands.add_parser("voices", help="list a model's voices and languages")
+    voices_parser.add_argument("--model", default=DEFAULT_MODEL)
+    voices_parser.set_defaults(run=command_voices)
+
+    devices_parser = commands.add_parser("devices", help="list audio output devices")
+    devices_parser.set_defaults(run=command_devices)
+
+    args = parser.parse_args()
+    if args.command == "speak" and not args.text and not args.file:
+        speak_parser.error("give text to speak or --file")
+    sys.exit(args.run(args))
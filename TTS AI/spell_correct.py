@@ -0,0 +1,128 @@
+# spell_correct.py
+# -*- coding: utf-8 -*-
+
+import re
+
+# --- Configuration ---
+MIN_WORD_LENGTH = 2        # single letters ("I", "a") are never touched
+MIN_FUZZY_LENGTH = 4       # edit-distance fallback only for words this long
+MAX_FUZZY_PER_LINE = 4     # bounds the cost of lines full of garbage
+MAX_LETTER_FIX_RANK = 10000 # letter-for-letter fixes must land on a common word ("haha" is not "baba")
+CACHE_SIZE = 8192          # corrected tokens remembered between lines
+
+# Tesseract confusions on game fonts, as (seen, meant); tried before any edit-distance guess.
+# A digit or '|' inside a word is almost always an OCR error; letter swaps may be a real word
+# missing from the list, so those only count when the result is common.
+SYMBOL_CONFUSIONS = [
+    ("1", "l"), ("1", "i"), ("|", "l"), ("|", "i"), ("0", "o"), ("5", "s"), ("8", "b"),
+]
+LETTER_CONFUSIONS = [
+    ("rn", "m"), ("m", "rn"), ("cl", "d"), ("vv", "w"), ("li", "h"), ("ii", "u"),
+    ("l", "i"), ("i", "l"), ("c", "e"), ("e", "c"), ("h", "b"), ("b", "h"),
+]
+SUSPICIOUS_CHARS = frozenset("0123456789|")
+
+TOKEN_RE = re.compile(r'(\S+)')
+EDGE_PUNCTUATION = '.,?!:;"\'()[]{}*-'
+
+
+def _match_case(original, corrected):
+    if len(original) > 1 and original.isupper():
+        return corrected.upper()
+    if original[:1] in "I|1" and corrected[:1] != "i":
+        return corrected # the capital was the OCR error ("Iike" -> "like")
+    if original[:1].isupper():
+        return corrected[:1].upper() + corrected[1:]
+    return corrected
+
+
+class SpellCorrector:
+    """
+    Fixes OCR'd words against the frequency-ordered lexicon (see lexicon.py) before speech:
+    1. words already in the lexicon are kept,
+    2. known OCR confusions (rn/m, l/I, 0/o, ...) are undone if that yields a word,
+    3. otherwise, for words with digits or '|' in them, the most frequent word one edit away
+       is used (symmetric-delete index).
+    Unknown all-letter words are usually names, slang or interjections and are left alone
+    unless a letter confusion turns them into a common word.
+    """
+    def __init__(self, lexicon, max_distance=1):
+        self.lexicon = lexicon
+        self.max_distance = max_distance
+        self._cache = {}
+        self.lines = 0
+        self.words_corrected = 0
+
+    @staticmethod
+    def _confusion_candidates(word, confusions):
+        for seen, meant in confusions:
+            start = word.find(seen)
+            if start < 0:
+                continue
+            yield word.replace(seen, meant)
+            while start >= 0:
+                yield word[:start] + meant + word[start + len(seen):]
+                start = word.find(seen, start + 1)
+
+    def correct_word(self, word, allow_fuzzy=True):
+        """Returns the corrected lowercase word, or None to keep the original."""
+        if len(word) < MIN_WORD_LENGTH or word.isdigit() or word in self.lexicon:
+            return None
+
+        suspicious = not SUSPICIOUS_CHARS.isdisjoint(word)
+        best = None
+        if suspicious:
+            for candidate in self._confusion_candidates(word, SYMBOL_CONFUSIONS):
+                rank = self.lexicon.rank(candidate)
+                if rank is not None and (best is None or rank < best[1]):
+                    best = (candidate, rank)
+        for candidate in self._confusion_candidates(word, LETTER_CONFUSIONS):
+            rank = self.lexicon.rank(candidate)
+            if rank is not None and rank < MAX_LETTER_FIX_RANK and (best is None or rank < best[1]):
+                best = (candidate, rank)
+        if best is not None:
+            return best[0]
+
+        if suspicious and allow_fuzzy and self.max_distance > 0 and len(word) >= MIN_FUZZY_LENGTH:
+            matches = self.lexicon.lookup(word, self.max_distance)
+            if matches:
+                return matches[0][0] # closest, then most frequent
+        return None
+
+    def _correct_token(self, token, allow_fuzzy):
+        core = token.strip(EDGE_PUNCTUATION)
+        if not core:
+            return token
+        key = (core, allow_fuzzy)
+        corrected = self._cache.get(key, False)
+        if corrected is False:
+            corrected = self.correct_word(core.lower(), allow_fuzzy)
+            if corrected is not None:
+                corrected = _match_case(core, corrected)
+            if len(self._cache) >= CACHE_SIZE:
+                self._cache.clear()
+            self._cache[key] = corrected
+        if corrected is None:
+            return token
+        self.words_corrected += 1
+        start = token.find(core)
+        return token[:start] + corrected + token[start + len(core):]
+
+    def correct(self, text):
+        """Corrects every word of a cleaned line; whitespace and punctuation are kept."""
+        if not text:
+            return text
+        self.lines += 1
+        parts = TOKEN_RE.split(text)
+        fuzzy_left = MAX_FUZZY_PER_LINE
+        for i in range(1, len(parts), 2):
+            token = parts[i]
+            core = token.strip(EDGE_PUNCTUATION)
+            allow_fuzzy = fuzzy_left > 0
+            if len(core) >= MIN_FUZZY_LENGTH and not SUSPICIOUS_CHARS.isdisjoint(core) and core.lower() not in self.lexicon:
+                fuzzy_left -= 1
+            parts[i] = self._correct_token(token, allow_fuzzy)
+        return "".join(parts)
+
+    def stats(self):
+        return {"lines": self.lines, "words_corrected": self.words_corrected, "cached_tokens": len(self._cache)}
@@ -0,0 +1,201 @@
+# synthesis_pipeline.py
+# -*- coding: utf-8 -*-
+
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from tracing import tracer
+
+# --- Configuration ---
+DEFAULT_LOOKAHEAD = 3
+DEFAULT_WORKERS = 1
+DEFAULT_MAX_SEGMENT_CHARS = 200   # longer sentences are split at clause boundaries
+DEFAULT_FIRST_SEGMENT_CHARS = 60  # the first segment is kept short so audio starts quickly
+MIN_SEGMENT_CHARS = 12            # clauses shorter than this are joined to the next one
+
+SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?]) +')
+# Sentence ends (also behind a closing quote/bracket), and blank lines between paragraphs
+SEGMENT_SENTENCE_RE = re.compile(r'(?<=[.!?\u2026])\s+|(?<=[.!?\u2026]["\'\u201d\u2019)\]])\s+|\n\s*\n')
+# After , ; : or a dash; before an em/en dash
+CLAUSE_SPLIT_RE = re.compile(r'(?<=[,;:])\s+|(?<=[\u2014\u2013])\s*|\s+(?=[\u2014\u2013])|(?<= -)\s+')
+
+
+def split_sentences(text):
+    """Splits text into sentences up front so they can be synthesized ahead of playback."""
+    if not text:
+        return []
+    return [s for s in SENTENCE_SPLIT_RE.split(text) if s.strip()]
+
+
+def _split_words(text, budget):
+    """Greedy word wrap for a clause with no punctuation to split on."""
+    chunks, current = [], ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > budget:
+            chunks.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        chunks.append(current)
+    return chunks
+
+def segment_text(text, max_chars=DEFAULT_MAX_SEGMENT_CHARS, first_max_chars=DEFAULT_FIRST_SEGMENT_CHARS):
+    """
+    Splits text into synthesis segments: sentences, with sentences longer than `max_chars` cut at
+    clause boundaries (commas, semicolons, colons, dashes) and, failing that, between words.
+    The first segment is held to `first_max_chars`, since nothing plays until it is synthesized.
+    """
+    segments = []
+    for sentence in SEGMENT_SENTENCE_RE.split(text or ""):
+        sentence = " ".join(sentence.split())
+        if not sentence:
+            continue
+        budget = first_max_chars if not segments else max_chars
+        if len(sentence) <= budget:
+            segments.append(sentence)
+            continue
+
+        clauses = []
+        for clause in CLAUSE_SPLIT_RE.split(sentence):
+            clause = clause.strip()
+            if clause:
+                clauses.extend(_split_words(clause, budget) if len(clause) > budget else [clause])
+
+        current = ""
+        for clause in clauses:
+            candidate = f"{current} {clause}" if current else clause
+            if not current or len(candidate) <= budget or (len(current) < MIN_SEGMENT_CHARS and len(candidate) <= max_chars):
+                current = candidate
+            else:
+                segments.append(current)
+                budget = max_chars
+                current = clause
+        if current:
+            segments.append(current)
+    return segments
+
+
+class SynthesisPipeline:
+    """
+    Producer/consumer stage between the sentence splitter and the audio stream.
+    Up to `lookahead` jobs are synthesized ahead of playback on a pool of `workers` threads,
+    and their audio is handed to `on_audio` strictly in sentence order.
+    `on_audio` may block (e.g. a full playback buffer); that is the pipeline's backpressure.
+
+    A job is one sentence, or with `synthesize_batch` a batch from batch_synthesis.iter_batches:
+    `synthesize_batch(list_of_sentences)` returns one waveform per sentence.
+    """
+    def __init__(self, synthesize, sentences, on_audio, lookahead=DEFAULT_LOOKAHEAD,
+                 workers=DEFAULT_WORKERS, is_cancelled=None, synthesize_batch=None,
+                 batch_size=1, sample_rate=None, requested_at=None, on_sentence=None):
+        self.synthesize = synthesize           # sentence -> float32 waveform
+        self.sentences = iter(sentences)       # any iterable, consumed lazily
+        self.on_audio = on_audio               # called with each waveform, in order
+        self.on_sentence = on_sentence         # optional: called with each sentence just before its audio
+        self.lookahead = max(1, int(lookahead))
+        self.workers = max(1, int(workers))
+        self.is_cancelled = is_cancelled or (lambda: False)
+        self.sample_rate = sample_rate         # only needed for the real-time factor
+        self.requested_at = requested_at       # perf_counter() of the speak request, for time-to-first-audio
+
+        if synthesize_batch is not None and batch_size > 1:
+            import batch_synthesis
+            self.jobs = batch_synthesis.iter_batches(self.sentences, batch_size)
+            self.synthesize_job = synthesize_batch
+        else:
+            self.jobs = ([sentence] for sentence in self.sentences)
+            self.synthesize_job = lambda batch: [self.synthesize(batch[0])]
+
+        self.completed = 0
+        self.batches = 0
+        self.stall_seconds = 0.0 # time spent waiting on inference with nothing ready to hand off
+        self.job_seconds = []    # inference time of each job (appended from the worker threads)
+        self.audio_seconds = 0.0
+        self.first_audio_seconds = None # request -> first waveform handed to on_audio
+
+    def _fill(self, executor, pending):
+        """Submits upcoming jobs until the lookahead window is full."""
+        while len(pending) < self.lookahead and not self.is_cancelled():
+            batch = next(self.jobs, None)
+            if batch is None:
+                return False
+            pending.append((batch, executor.submit(self._timed_job, batch)))
+        return True
+
+    def _timed_job(self, batch):
+        start = time.perf_counter()
+        wavs = self.synthesize_job(batch)
+        seconds = time.perf_counter() - start
+        self.job_seconds.append(seconds)
+        # Per sentence, so batched and single synthesis read the same on the metrics panel
+        tracer.record("synth", seconds * 1000 / len(batch), sentences=len(batch), chars=sum(map(len, batch)))
+        return wavs
+
+    def run(self):
+        """Blocks until every sentence has been handed off, an error occurs, or playback is cancelled."""
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tts-synth")
+        more = True
+        if self.requested_at is None:
+            self.requested_at = time.perf_counter()
+        try:
+            while not self.is_cancelled():
+                if more:
+                    more = self._fill(executor, pending)
+
+                tracer.gauge("synth_queue", len(pending))
+                if not pending:
+                    break
+
+                batch, future = pending.popleft()
+                start = time.perf_counter()
+                try:
+                    wavs = future.result()
+                except Exception as e:
+                    if self.is_cancelled():
+                        break # superseded work may be dropped by the synthesis backend
+                    print(f"TTS generation error for sentence '{batch[0]}': {e}")
+                    return False
+                self.stall_seconds += time.perf_counter() - start
+                self.batches += 1
+
+                for sentence, wav in zip(batch, wavs):
+                    if self.is_cancelled():
+                        break
+                    if self.on_sentence is not None:
+                        self.on_sentence(sentence)
+                    if self.first_audio_seconds is None:
+                        self.first_audio_seconds = time.perf_counter() - self.requested_at
+                    self.on_audio(wav)
+                    self.completed += 1
+                    if self.sample_rate:
+                        self.audio_seconds += len(wav) / self.sample_rate
+            return not self.is_cancelled()
+        finally:
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def stats(self):
+        """
+        Time to first audio, plus synthesis throughput: sentences per second of inference and the
+        real-time factor (inference / audio seconds).
+        """
+        inference_seconds = sum(self.job_seconds)
+        result = {
+            "sentences": self.completed,
+            "batches": self.batches,
+            "inference_s": round(inference_seconds, 2),
+            "stall_s": round(self.stall_seconds, 2),
+        }
+        if self.first_audio_seconds is not None:
+            result["ttfa_ms"] = round(self.first_audio_seconds * 1000, 1)
+        if inference_seconds:
+            result["sentences_per_s"] = round(self.completed / inference_seconds, 2)
+        if self.audio_seconds:
+            result["audio_s"] = round(self.audio_seconds, 2)
+            result["rtf"] = round(inference_seconds / self.audio_seconds, 3)
+        return result
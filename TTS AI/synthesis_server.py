@@ -0,0 +1,543 @@
+# synthesis_server.py
+# -*- coding: utf-8 -*-
+
+"""
+Out-of-process synthesis: a pool of worker processes, each with its own model pool, so
+inference runs on other cores instead of competing with Tk, the hotkeys and OCR for the GIL.
+
+- Workers are plain `python synthesis_server.py --synthesis-worker` processes that connect back
+  over a local pipe (multiprocessing.connection, authenticated); nothing re-imports the GUI
+  script. A frozen (PyInstaller) build has no script to run, so it relaunches its own executable
+  with the same flag and TTS_AI.py hands off to worker_main before loading Tk.
+- Jobs are small pickled tuples on that pipe; each worker gets the least busy queue. A job is a
+  batch of sentences (see batch_synthesis.py), often just one.
+- PCM comes back through shared-memory slots owned by the parent: the worker writes the
+  batch's waveforms back to back into the slot it was given and only sends their sample counts.
+  Batches larger than a slot fall back to the pipe.
+- Cancelling bumps an epoch in shared memory; workers skip queued jobs from older epochs.
+- Jobs only go to live workers. A worker that died is relaunched (and the current model
+  reloaded) in the background, or before the job if no worker is left.
+"""
+
+import argparse
+import atexit
+import itertools
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import connection, shared_memory
+
+import numpy as np
+
+# --- Configuration ---
+DEFAULT_PROCESSES = 1
+SLOTS_PER_WORKER = 3             # results a worker can have waiting to be copied out
+SLOT_SECONDS = 30                # slot size; longer waveforms go over the pipe
+SLOT_SAMPLE_RATE = 24000         # highest model rate we ship
+CONNECT_TIMEOUT = 30.0           # seconds for every worker to connect back
+POLL_SECONDS = 0.5               # how often the result reader checks for dead workers
+WORKER_FLAG = "--synthesis-worker" # argv[1] of a worker process, also checked by TTS_AI.py
+
+
+def _attach(name):
+    """Attaches to a parent-owned segment without letting this process's tracker unlink it on exit."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False) # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == "posix":
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class WorkerStartError(RuntimeError):
+    """The worker processes could not be launched or did not connect back."""
+
+
+class _Worker:
+    """Parent-side handle of one worker process."""
+    def __init__(self, index, process=None):
+        self.index = index
+        self.process = process
+        self.conn = None
+        self.ready = False       # config sent; jobs may go to it
+        self.send_lock = threading.Lock()
+        self.outstanding = set() # job ids sent and not answered yet
+        self.completed = 0
+
+    @property
+    def alive(self):
+        return self.ready and self.conn is not None and self.process.poll() is None
+
+
+class SynthesisServer:
+    """
+    Parent side of the worker pool. Thread-safe: submit() is called from the synthesis
+    pipeline's threads, load() from the model loader thread.
+
+        server = SynthesisServer(processes=2)
+        voices, languages = server.load("tts_models/en/vctk/vits")
+        wavs = server.submit(["Hello there."], "tts_models/en/vctk/vits", "p243", "default").result()
+    """
+    def __init__(self, processes=DEFAULT_PROCESSES, memory_budget_mb=2048, warm_up=True,
+                 slot_seconds=SLOT_SECONDS):
+        self.processes = max(1, int(processes))
+        self.memory_budget_mb = memory_budget_mb
+        self.warm_up = warm_up
+        self.slot_samples = int(slot_seconds * SLOT_SAMPLE_RATE)
+
+        self._lock = threading.Lock()     # jobs, slots and worker bookkeeping
+        self._start_lock = threading.Lock()
+        self._started = False
+        self._stopping = False
+        self._workers = []
+        self._jobs = {}                   # job id -> (future, worker, slot or None)
+        self._job_ids = itertools.count(1)
+        self._slots = []
+        self._slot_arrays = []
+        self._free_slots = None           # threading.Semaphore guarding _free_slot_list
+        self._free_slot_list = []
+        self._epoch_shm = None
+        self._epoch = None
+        self._reader = None
+        self._authkey = None
+        self._config = None               # sent to every worker when it connects
+        self._respawn_lock = threading.Lock()
+        self._model_name = None           # last model passed to load(), reloaded into relaunched workers
+        self._preloaded = []              # models passed to preload(), likewise
+        self.sample_rates = {}            # model name -> output sample rate, filled in by load()
+
+        # Metrics
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.via_pipe = 0                 # waveforms too large for a slot
+        self.copy_seconds = 0.0
+        self.respawned = 0
+
+    # --- Lifecycle ---
+
+    def start(self):
+        """Creates the shared memory, launches the workers and waits for them to connect. Idempotent."""
+        with self._start_lock:
+            if self._started:
+                return
+            slot_count = SLOTS_PER_WORKER * self.processes
+            for _ in range(slot_count):
+                shm = shared_memory.SharedMemory(create=True, size=self.slot_samples * 4)
+                self._slots.append(shm)
+                self._slot_arrays.append(np.ndarray((self.slot_samples,), dtype=np.float32, buffer=shm.buf))
+            self._free_slot_list = list(range(slot_count))
+            self._free_slots = threading.Semaphore(slot_count)
+            self._epoch_shm = shared_memory.SharedMemory(create=True, size=8)
+            self._epoch = np.ndarray((1,), dtype=np.int64, buffer=self._epoch_shm.buf)
+            self._epoch[0] = 0
+
+            self._authkey = secrets.token_bytes(16)
+            self._config = {
+                "slots": [shm.name for shm in self._slots],
+                "slot_samples": self.slot_samples,
+                "epoch": self._epoch_shm.name,
+                "memory_budget_mb": self.memory_budget_mb,
+                "warm_up": self.warm_up,
+                "threads": max(1, (os.cpu_count() or 1) // self.processes),
+            }
+            self._workers = [_Worker(index) for index in range(self.processes)]
+            try:
+                self._launch(self._workers)
+            except WorkerStartError:
+                self._kill_workers()
+                self._workers = []
+                self._release_memory()
+                raise
+
+            self._reader = threading.Thread(target=self._read_results, name="synth-results", daemon=True)
+            self._reader.start()
+            self._started = True
+            atexit.register(self.stop)
+            print(f"Synthesis server: {self.processes} worker process(es) ready, "
+                  f"{slot_count} x {self.slot_samples * 4 / 1e6:.1f} MB shared-memory slots")
+
+    @staticmethod
+    def _worker_command(index, address):
+        if getattr(sys, "frozen", False):
+            return [sys.executable, WORKER_FLAG, str(index), address]
+        return [sys.executable, os.path.abspath(__file__), WORKER_FLAG, str(index), address]
+
+    def _launch(self, workers):
+        """Starts a process for each of `workers`, waits for it to connect back and sends the config."""
+        listener = connection.Listener(authkey=self._authkey)
+        try:
+            for worker in workers:
+                worker.process = subprocess.Popen(
+                    self._worker_command(worker.index, repr(listener.address)),
+                    stdin=subprocess.PIPE,
+                    creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+                )
+                worker.process.stdin.write(self._authkey.hex().encode("ascii") + b"\n")
+                worker.process.stdin.close()
+            self._accept_all(listener, workers)
+            for worker in workers:
+                worker.conn.send(self._config)
+                worker.ready = True
+        except WorkerStartError:
+            raise
+        except Exception as e:
+            raise WorkerStartError(str(e)) from e
+        finally:
+            listener.close()
+
+    def _accept_all(self, listener, workers):
+        # Listener.accept() has no timeout and closing the listener does not wake it on every
+        # platform, so accept on a helper thread and give up on it if a worker dies or is too slow.
+        errors = []
+        by_index = {worker.index: worker for worker in workers}
+        def accept():
+            try:
+                for _ in workers:
+                    conn = listener.accept()
+                    by_index[conn.recv()].conn = conn
+            except Exception as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=accept, name="synth-accept", daemon=True)
+        thread.start()
+        deadline = time.monotonic() + CONNECT_TIMEOUT
+        while thread.is_alive():
+            thread.join(POLL_SECONDS / 5)
+            if any(w.process.poll() is not None for w in workers):
+                raise WorkerStartError("a synthesis worker exited during startup")
+            if time.monotonic() > deadline:
+                raise WorkerStartError("synthesis workers did not connect in time")
+        if errors:
+            raise WorkerStartError(str(errors[0]))
+
+    def _respawn(self):
+        """Relaunches dead workers and reloads the current model into them. Returns True if any worker is alive."""
+        with self._respawn_lock:
+            dead = [w for w in self._workers if not w.alive]
+            if not dead or self._stopping:
+                return any(w.alive for w in self._workers)
+            for worker in dead:
+                self._fail_worker(worker, RuntimeError(f"synthesis worker {worker.index} exited"))
+                if worker.process is not None and worker.process.poll() is None:
+                    worker.process.kill()
+                worker.conn, worker.ready = None, False
+            try:
+                self._launch(dead)
+            except WorkerStartError as e:
+                print(f"Synthesis server: could not relaunch worker(s) {[w.index for w in dead]}: {e}")
+                for worker in dead:
+                    if worker.process is not None and worker.process.poll() is None:
+                        worker.process.kill()
+                return any(w.alive for w in self._workers)
+            self.respawned += len(dead)
+            print(f"Synthesis server: relaunched worker(s) {[w.index for w in dead]}")
+            if self._preloaded:
+                for worker in dead:
+                    self._send(worker, ("preload", next(self._job_ids), list(self._preloaded)), Future())
+            if self._model_name is not None:
+                futures = [Future() for _ in dead]
+                for worker, future in zip(dead, futures):
+                    self._send(worker, ("load", next(self._job_ids), self._model_name), future)
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"Synthesis server: reloading '{self._model_name}' failed: {e}")
+            return True
+
+    def ensure_workers(self):
+        """Relaunches workers that died; returns False if none is running afterwards. Blocking."""
+        self.start()
+        if all(w.alive for w in self._workers):
+            return True
+        return self._respawn()
+
+    def _respawn_async(self):
+        if not self._respawn_lock.locked():
+            threading.Thread(target=self._respawn, name="synth-respawn", daemon=True).start()
+
+    def stop(self):
+        """Stops the workers and frees the shared memory."""
+        with self._start_lock:
+            if not self._started or self._stopping:
+                return
+            self._stopping = True
+        for worker in self._workers:
+            try:
+                with worker.send_lock:
+                    if worker.conn is not None:
+                        worker.conn.send(("stop",))
+            except (OSError, ValueError):
+                pass
+        for worker in self._workers:
+            if worker.process is None:
+                continue
+            try:
+                worker.process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                worker.process.kill()
+        self._fail_all(RuntimeError("synthesis server stopped"))
+        self._release_memory()
+
+    def _release_memory(self):
+        self._slot_arrays = [] # views must go before the segments can be closed
+        self._epoch = None
+        for shm in self._slots + ([self._epoch_shm] if self._epoch_shm else []):
+            shm.close()
+            shm.unlink()
+        self._slots = []
+        self._epoch_shm = None
+
+    def _kill_workers(self):
+        for worker in self._workers:
+            if worker.process is not None and worker.process.poll() is None:
+                worker.process.kill()
+
+    # --- Jobs ---
+
+    def _send(self, worker, message, future, slot=None):
+        job_id = message[1]
+        with self._lock:
+            self._jobs[job_id] = (future, worker, slot)
+            worker.outstanding.add(job_id)
+        try:
+            with worker.send_lock:
+                worker.conn.send(message)
+        except (OSError, ValueError) as e:
+            self._finish(job_id, error=RuntimeError(f"synthesis worker {worker.index} is gone: {e}"))
+
+    def load(self, model_name):
+        """
+        Makes `model_name` current in every worker (loading and warming it up where needed)
+        and returns its (voices, languages). Blocking; call it off the Tk thread.
+        """
+        self.start()
+        self._model_name = model_name
+        if not any(w.alive for w in self._workers) and not self._respawn():
+            raise WorkerStartError("no synthesis worker is running")
+        futures = []
+        for worker in self._workers:
+            if worker.alive:
+                future = Future()
+                self._send(worker, ("load", next(self._job_ids), model_name), future)
+                futures.append(future)
+        voices, languages, sample_rate = [future.result() for future in futures][0]
+        self.sample_rates[model_name] = sample_rate
+        return voices, languages
+
+    def preload(self, model_names):
+        """Loads `model_names` into every worker in the background, for instant switching."""
+        self.start()
+        self._preloaded = list(model_names)
+        for worker in self._workers:
+            if worker.alive:
+                self._send(worker, ("preload", next(self._job_ids), list(model_names)), Future())
+
+    def submit(self, texts, model_name, voice, lang):
+        """
+        Queues a batch of sentences on the least busy live worker; the Future resolves to one
+        float32 waveform per sentence. Raises WorkerStartError if no worker can be (re)started.
+        """
+        self.start()
+        live = [w for w in self._workers if w.alive]
+        if len(live) < len(self._workers):
+            if not live:
+                if not self._respawn():
+                    raise WorkerStartError("every synthesis worker has exited and none could be relaunched")
+            else:
+                self._respawn_async() # keep serving from the live ones meanwhile
+        self._free_slots.acquire() # bounded by the slot count: backpressure on the producers
+        with self._lock:
+            slot = self._free_slot_list.pop()
+            worker = min((w for w in self._workers if w.alive), key=lambda w: len(w.outstanding), default=None)
+            if worker is None:
+                self._free_slot_list.append(slot)
+                self._free_slots.release()
+                raise WorkerStartError("no synthesis worker is running")
+            epoch = int(self._epoch[0])
+            self.submitted += 1
+        future = Future()
+        self._send(worker, ("synth", next(self._job_ids), epoch, slot, model_name, list(texts), voice, lang), future, slot)
+        return future
+
+    def cancel_pending(self):
+        """Drops every job submitted so far that a worker has not started yet."""
+        if self._started and self._epoch is not None:
+            self._epoch[0] += 1
+
+    # --- Results ---
+
+    def _read_results(self):
+        while not self._stopping:
+            conns = {w.conn: w for w in self._workers if w.conn is not None and w.process.poll() is None}
+            for worker in self._workers:
+                if worker.process.poll() is not None and worker.outstanding:
+                    self._fail_worker(worker, RuntimeError(f"synthesis worker {worker.index} exited"))
+            if not conns:
+                time.sleep(POLL_SECONDS)
+                continue
+            for conn in connection.wait(list(conns), timeout=POLL_SECONDS):
+                worker = conns[conn]
+                try:
+                    job_id, status, payload = conn.recv()
+                except (EOFError, OSError):
+                    worker.conn = None
+                    self._fail_worker(worker, RuntimeError(f"synthesis worker {worker.index} exited"))
+                    continue
+                if status == "ok":
+                    self._finish(job_id, result=payload)
+                elif status == "cancelled":
+                    self._finish(job_id, cancelled=True)
+                else:
+                    self._finish(job_id, error=RuntimeError(payload))
+
+    def _finish(self, job_id, result=None, error=None, cancelled=False):
+        with self._lock:
+            entry = self._jobs.pop(job_id, None)
+            if entry is None:
+                return
+            future, worker, slot = entry
+            worker.outstanding.discard(job_id)
+            if error is None and not cancelled:
+                if slot is not None:
+                    worker.completed += 1
+                    if all(isinstance(n, int) for n in result):
+                        start = time.perf_counter()
+                        offsets = np.cumsum([0] + result)
+                        result = [self._slot_arrays[slot][a:b].copy() for a, b in zip(offsets[:-1], offsets[1:])]
+                        self.copy_seconds += time.perf_counter() - start
+                    else:
+                        self.via_pipe += 1
+                    self.completed += 1
+            elif cancelled:
+                self.cancelled += 1
+            if slot is not None:
+                self._free_slot_list.append(slot)
+        if slot is not None:
+            self._free_slots.release()
+
+        if cancelled:
+            future.cancel()
+        elif error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _fail_worker(self, worker, error):
+        with self._lock:
+            job_ids = list(worker.outstanding)
+        for job_id in job_ids:
+            self._finish(job_id, error=error)
+
+    def _fail_all(self, error):
+        with self._lock:
+            job_ids = list(self._jobs)
+        for job_id in job_ids:
+            self._finish(job_id, error=error)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "processes": self.processes,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "via_pipe": self.via_pipe,
+                "copy_ms": round(self.copy_seconds * 1000, 2),
+                "per_worker": [w.completed for w in self._workers],
+                "respawned": self.respawned,
+                "in_flight": sum(len(w.outstanding) for w in self._workers),
+            }
+
+
+# --- Worker Process ---
+
+def worker_main(index, address):
+    """Runs in the worker process: loads models on demand and answers jobs until told to stop."""
+    import ast
+    import batch_synthesis
+    import model_manager
+
+    authkey = bytes.fromhex(sys.stdin.readline().strip())
+    conn = connection.Client(ast.literal_eval(address), authkey=authkey)
+    conn.send(index)
+    config = conn.recv()
+
+    slots = [_attach(name) for name in config["slots"]]
+    slot_arrays = [np.ndarray((config["slot_samples"],), dtype=np.float32, buffer=s.buf) for s in slots]
+    epoch_shm = _attach(config["epoch"])
+    epoch = np.ndarray((1,), dtype=np.int64, buffer=epoch_shm.buf)
+
+    device = None
+    def loader(model_name):
+        nonlocal device
+        if device is None:
+            import torch
+            torch.set_num_threads(config["threads"]) # workers share the cores instead of oversubscribing
+            device = model_manager.default_device()
+            print(f"Synthesis worker {index}: using {device}, {config['threads']} thread(s)")
+        return model_manager.load_tts_model(model_name, device)
+
+    pool = model_manager.ModelManager(
+        loader=loader,
+        warm_up=model_manager.warm_up_model if config["warm_up"] else None,
+        memory_budget_mb=config["memory_budget_mb"]
+    )
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break # the GUI went away
+        kind = message[0]
+        if kind == "stop":
+            break
+        job_id = message[1]
+        try:
+            if kind == "load":
+                model_name = message[2]
+                resident = pool.switch(model_name)
+                voices, languages = model_manager.describe_model(resident.model, model_name, verbose=False)
+                reply = (job_id, "ok", (voices, languages, model_manager.output_sample_rate(resident.model)))
+            elif kind == "preload":
+                pool.preload_async(message[2]) # alongside the jobs; the pool is thread-safe
+                reply = (job_id, "ok", None)
+            elif kind == "synth":
+                _, _, job_epoch, slot, model_name, texts, voice, lang = message
+                if job_epoch < epoch[0]:
+                    conn.send((job_id, "cancelled", None))
+                    continue
+                tts = pool.ensure(model_name).model
+                wavs = batch_synthesis.synthesize_batch(tts, texts, voice, lang)
+                lengths = [len(wav) for wav in wavs]
+                if sum(lengths) <= len(slot_arrays[slot]):
+                    offset = 0
+                    for wav in wavs:
+                        slot_arrays[slot][offset:offset + len(wav)] = wav
+                        offset += len(wav)
+                    reply = (job_id, "ok", lengths)
+                else:
+                    reply = (job_id, "ok", wavs)
+            else:
+                reply = (job_id, "error", f"unknown job type {kind!r}")
+        except Exception as e:
+            reply = (job_id, "error", f"{type(e).__name__}: {e}")
+        conn.send(reply)
+
+    slot_arrays = epoch = None
+    for shm in slots + [epoch_shm]:
+        shm.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Neuro Speak synthesis worker (started by SynthesisServer).")
+    parser.add_argument(WORKER_FLAG, dest="worker", nargs=2, metavar=("INDEX", "ADDRESS"), required=True)
+    args = parser.parse_args()
+    worker_main(int(args.worker[0]), args.worker[1])
@@ -0,0 +1,269 @@
+# text_normalizer.py
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import re
+import time
+
+PROFILES_FILE = "text_profiles.json" # optional user stages/profiles, merged over the built-ins
+DEFAULT_PROFILE = "renpy"
+
+# --- Rule Format ---
+# A stage is a named list of rules, applied in order. Rules are lists so they can be written
+# the same way in text_profiles.json:
+#   ["translate", {char: replacement or null}]   all single-character substitutions in one str.translate
+#   ["replace", old, new]                         literal str.replace
+#   ["regex", pattern, repl, flags, guard]        re.sub; flags is a string of "i"/"m"/"s". repl may be a
+#                                                 {match: replacement} dict. Skipped when `guard` (a string
+#                                                 of characters) is given and none of them occur in the text.
+#   ["strip"]                                     str.strip()
+#   ["collapse_whitespace"]                       runs of whitespace -> one space, then strip
+
+REGEX_FLAGS = {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL}
+
+# --- Built-in Stages ---
+STAGES = {
+    # Ren'Py dialogue boxes: drop the "Name" / Speaker: prefix.
+    # With the newlines gone '^' only matches at the start, so both prefixes go in one anchored regex
+    "renpy_speaker": [
+        ["replace", "\n", " "],
+        ["regex", r'^(?:\s*".*?"\s*)?(?:[^:]+:\s*)?', "", "", None],
+        ["strip"],
+    ],
+    # OCR confusions in Ren'Py fonts
+    "renpy_charfix": [
+        ["translate", {"|": "I", "$": "s", "[": "I", "]": "I", "{": "I", "}": "I", "@": "0"}],
+    ],
+    "renpy_sounds": [
+        ["replace", "sigh", ""],
+        ["replace", "whisper", ""],
+        ["regex", r'\bOoh\b', "Oh", "i", "oO"],
+    ],
+    # Replace number 0 with letter 'o' when next to letters
+    "renpy_digit_o": [
+        ["regex", r'(?<=[a-z])0|0(?=[a-z])', "o", "i", "0"],
+    ],
+    "units": [
+        ["regex", r'oz', "ounces", "i", "oO"],
+    ],
+    # "I-I was" -> "I was"
+    "stutter": [
+        ["regex", r'\b[A-Za-z]-', "", "", "-"],
+    ],
+    "vocalizations": [
+        ["regex", r'\b[AOHEU]\b', {"A": "Ah", "O": "Oh", "H": "Hhh", "E": "Ehh", "U": "Uhh"}, "", "AOHEU"],
+    ],
+    "filler_sounds": [
+        ["regex", r'\b[mM]{1,3}\b', "", "", "mM"],
+    ],
+    "ellipsis": [
+        ["regex", r'\.{2,}', ".", "", "."],
+    ],
+    # Punctuation OCR'd between two words
+    "stray_punctuation": [
+        ["regex", r'\b[.,!?]\b', "", "", ".,!?"],
+    ],
+    "whitespace": [
+        ["collapse_whitespace"],
+    ],
+    "asterisks": [
+        ["replace", "*", ""],
+    ],
+    # Books / PDFs: re-join words hyphenated across lines, then the lines themselves
+    "join_lines": [
+        ["regex", r'(?<=[a-z])-[ \t]*\r?\n[ \t]*(?=[a-z])', "", "", "\n"],
+        ["replace", "\r\n", " "],
+        ["replace", "\n", " "],
+    ],
+    # Web pages: links, markdown and common HTML entities
+    "web_cleanup": [
+        ["regex", r'\[([^\]\n]+)\]\([^)\s]*\)', r'\1', "", "]"],
+        ["regex", r'\bhttps?://\S+|\bwww\.\S+', "", "", "/w"],
+        ["regex", r'^[ \t]*(?:#{1,6}|>|[*+-])[ \t]+', "", "m", "#>*+-"],
+        ["replace", "&nbsp;", " "],
+        ["replace", "&quot;", '"'],
+        ["replace", "&#39;", "'"],
+        ["replace", "&lt;", "<"],
+        ["replace", "&gt;", ">"],
+        ["replace", "&amp;", "&"],
+        ["translate", {"*": None, "_": " ", "`": None, "~": None}],
+    ],
+    # SRT/VTT/ASS subtitles: cue numbers, timestamps, tags, sound descriptions, dialogue dashes
+    "subtitle_markup": [
+        ["regex", r'^[ \t]*\d+[ \t]*$', "", "m", None],
+        ["regex", r'^.*\d{1,2}:\d{2}:\d{2}[,.]\d{1,3}[ \t]*-->.*$', "", "m", ">"],
+        ["regex", r'</?[a-zA-Z][^>]*>|\{\\[^}]*\}', "", "", "<{"],
+        ["regex", r'\[[^\]\n]*\]|\([A-Z][A-Z ]*\)|♪[^♪\n]*♪?', "", "", "[(♪"],
+        ["regex", r'^[ \t]*-[ \t]*', "", "m", "-"],
+        ["regex", r'^[ \t]*[A-Z][A-Z .]+:[ \t]*', "", "m", ":"],
+    ],
+}
+
+COMMON_STAGES = ["units", "stutter", "vocalizations", "filler_sounds", "ellipsis",
+                 "stray_punctuation", "whitespace", "asterisks"]
+
+# --- Built-in Profiles (ordered stage names) ---
+PROFILES = {
+    "renpy": ["renpy_speaker", "renpy_charfix", "renpy_sounds", "renpy_digit_o"] + COMMON_STAGES,
+    "plain": COMMON_STAGES,
+    "books": ["join_lines", "ellipsis", "whitespace"],
+    "web": ["web_cleanup", "join_lines", "ellipsis", "whitespace"],
+    "subtitles": ["subtitle_markup", "join_lines", "filler_sounds", "ellipsis", "whitespace"],
+}
+
+
+# --- Engine ---
+
+def _compile_rule(rule):
+    kind = rule[0]
+    if kind == "translate":
+        table = str.maketrans(rule[1])
+        return lambda text: text.translate(table)
+    if kind == "replace":
+        old, new = rule[1], rule[2]
+        return lambda text: text.replace(old, new) if old in text else text
+    if kind == "regex":
+        pattern, repl = rule[1], rule[2]
+        flags = rule[3] if len(rule) > 3 else ""
+        guard = rule[4] if len(rule) > 4 else None
+        if isinstance(flags, str):
+            flags = sum(REGEX_FLAGS[f] for f in set(flags))
+        if isinstance(repl, dict):
+            mapping = repl
+            repl = lambda m: mapping.get(m.group(0), m.group(0))
+        sub = re.compile(pattern, flags).sub
+        if guard:
+            return lambda text: sub(repl, text) if any(c in text for c in guard) else text
+        return lambda text: sub(repl, text)
+    if kind == "strip":
+        return str.strip
+    if kind == "collapse_whitespace":
+        # str.split() and re's \s agree on what Unicode counts as whitespace
+        return lambda text: " ".join(text.split())
+    raise ValueError(f"Unknown text rule: {kind!r}")
+
+
+class Stage:
+    """A named list of rules compiled once into string -> string steps."""
+    def __init__(self, name, rules):
+        self.name = name
+        self.rules = [list(rule) for rule in rules]
+        self._steps = [_compile_rule(rule) for rule in self.rules]
+
+    def __call__(self, text):
+        for step in self._steps:
+            text = step(text)
+        return text
+
+
+class TextPipeline:
+    """
+    Ordered stages for one profile. With `timed` on, every stage's calls and time are recorded
+    (see stats()). A pipeline is not changed after it is built, so swapping profiles is one assignment.
+    """
+    def __init__(self, name, stages, timed=False):
+        self.name = name
+        self.stages = list(stages)
+        self.timed = timed
+        self._timings = {stage.name: [0, 0.0] for stage in self.stages}
+        self._steps = [step for stage in self.stages for step in stage._steps] # flat, for the untimed path
+
+    @property
+    def stage_names(self):
+        return [stage.name for stage in self.stages]
+
+    def __call__(self, text):
+        if not text:
+            return ""
+        if not self.timed:
+            for step in self._steps:
+                text = step(text)
+            return text
+
+        for stage in self.stages:
+            start = time.perf_counter()
+            text = stage(text)
+            timing = self._timings[stage.name]
+            timing[0] += 1
+            timing[1] += time.perf_counter() - start
+        return text
+
+    def reset_stats(self):
+        for timing in self._timings.values():
+            timing[0], timing[1] = 0, 0.0
+
+    def stats(self):
+        """Per stage: calls, total_ms and avg_us (collected only while `timed` is on)."""
+        return {
+            name: {"calls": calls, "total_ms": round(total * 1000, 3),
+                   "avg_us": round(total / calls * 1e6, 2) if calls else 0.0}
+            for name, (calls, total) in self._timings.items()
+        }
+
+
+def load_user_config(path=PROFILES_FILE):
+    """
+    Reads optional user stages and profiles, e.g.
+        {"stages": {"my_game_fixes": [["replace", "Ml", "MI"]]},
+         "profiles": {"my_game": ["renpy_speaker", "my_game_fixes", "whitespace"]}}
+    Returns (stages, profiles); both empty if the file is missing or unreadable.
+    """
+    if not path or not os.path.exists(path):
+        return {}, {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return dict(data.get("stages", {})), dict(data.get("profiles", {}))
+    except (OSError, ValueError, AttributeError, TypeError) as e:
+        print(f"Error reading {path}: {e}. Using built-in text profiles only.")
+        return {}, {}
+
+
+def available_profiles(path=PROFILES_FILE):
+    _, user_profiles = load_user_config(path)
+    return list(PROFILES) + [name for name in user_profiles if name not in PROFILES]
+
+
+def build_pipeline(profile=DEFAULT_PROFILE, path=PROFILES_FILE, timed=False):
+    """
+    Compiles the named profile. The user config is re-read on every call, so edits apply on the
+    next switch. Unknown profiles fall back to DEFAULT_PROFILE; bad stages are skipped with a warning.
+    """
+    user_stages, user_profiles = load_user_config(path)
+    stage_rules = {**STAGES, **user_stages}
+    profiles = {**PROFILES, **user_profiles}
+
+    if profile not in profiles:
+        print(f"Text profile '{profile}' not found. Using '{DEFAULT_PROFILE}'.")
+        profile = DEFAULT_PROFILE
+
+    stages = []
+    for stage_name in profiles[profile]:
+        rules = stage_rules.get(stage_name)
+        if rules is None:
+            print(f"Text profile '{profile}': unknown stage '{stage_name}' skipped.")
+            continue
+        try:
+            stages.append(Stage(stage_name, rules))
+        except (ValueError, KeyError, IndexError, TypeError, re.error) as e:
+            print(f"Text profile '{profile}': stage '{stage_name}' is invalid ({e}) and was skipped.")
+    return TextPipeline(profile, stages, timed=timed)
+
+
+def profile_for(settings):
+    """The profile named in settings; "auto" follows the Renpy Mode switch."""
+    profile = settings.get("text_profile", "auto")
+    if profile == "auto":
+        return "renpy" if settings.get("renpy_mode") else "plain"
+    return profile
+
+
+# Built-in pipelines for callers that only know the Renpy on/off switch
+renpy_pipeline = TextPipeline("renpy", [Stage(name, STAGES[name]) for name in PROFILES["renpy"]])
+plain_pipeline = TextPipeline("plain", [Stage(name, STAGES[name]) for name in PROFILES["plain"]])
+
+
+def clean(text, renpy_mode=False):
+    """Same output as the old multi-pass clean_text_content."""
+    return (renpy_pipeline if renpy_mode else plain_pipeline)(text)
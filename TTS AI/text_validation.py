@@ -0,0 +1,144 @@
+# text_validation.py
+# -*- coding: utf-8 -*-
+
+"""
+Cleaning and validation of OCR'd text: the active text profile (text_normalizer), spell
+correction (spell_correct) and the allowed-word check (lexicon). Split out of window_scanner.py
+so it can be used and benchmarked without the Tk/PIL/pynput stack.
+"""
+
+import json
+import os
+import threading
+import time
+
+import lexicon
+import spell_correct
+import text_normalizer
+
+# --- Configuration ---
+CONFIG_FILE = "config.json"
+MIN_FUZZY_WORD_LENGTH = 4 # shorter OCR fragments are too close to too many real words
+
+# --- Settings ---
+
+def load_app_settings():
+    """Loads application settings, notably renpy_mode."""
+    config = {"renpy_mode": False, "text_profile": "auto", "text_pipeline_timing": False,
+              "validation_max_edit_distance": 1, "spell_correction": True,
+              "ocr_backend": "auto", "capture_backend": "auto"} # Default
+    try:
+        if os.path.exists(CONFIG_FILE):
+            with open(CONFIG_FILE, 'r') as f:
+                config_data = json.load(f)
+                for key in config:
+                    if key in config_data:
+                        config[key] = config_data[key]
+    except Exception as e:
+        print(f"Error loading app settings from config: {e}")
+    return config
+
+APP_SETTINGS = load_app_settings() # shared with window_scanner.py
+
+# --- Word List ---
+
+def load_word_list(filename="top_words.txt"):
+    """
+    Maps the compiled lexicon for the word list (top_words.lex, rebuilt automatically when
+    top_words.txt changes). Returns None if there is no word list, which disables validation.
+    """
+    start = time.perf_counter()
+    try:
+        allowed_words = lexicon.open_lexicon(filename)
+    except Exception as e:
+        print(f"Warning: Could not load the lexicon for '{filename}': {e}. Text validation disabled.")
+        return None
+    if allowed_words is None:
+        print(f"Warning: The file '{filename}' was not found. Text validation disabled.")
+        return None # Indicate validation is disabled
+    print(f"Loaded {len(allowed_words)} words for validation in {(time.perf_counter() - start) * 1000:.1f} ms.")
+    return allowed_words
+
+ALLOWED_WORDS = None # lexicon, mapped on first validation (see get_allowed_words)
+spell_corrector = None # undoes OCR slips (rn/m, l/I, 0/o, ...) after cleaning, using the same lexicon
+_word_list_loaded = False
+_word_list_lock = threading.Lock()
+
+def get_allowed_words():
+    """Loads the lexicon and spell corrector on first use, so importing this module stays cheap."""
+    global ALLOWED_WORDS, spell_corrector, _word_list_loaded
+    if not _word_list_loaded:
+        with _word_list_lock:
+            if not _word_list_loaded:
+                ALLOWED_WORDS = load_word_list()
+                if ALLOWED_WORDS is not None:
+                    spell_corrector = spell_correct.SpellCorrector(ALLOWED_WORDS, APP_SETTINGS["validation_max_edit_distance"])
+                _word_list_loaded = True
+    return ALLOWED_WORDS
+
+# --- Cleaning and Validation ---
+
+_text_pipeline = None # compiled stages of the active text profile (see text_normalizer)
+
+def get_text_pipeline():
+    global _text_pipeline
+    if _text_pipeline is None:
+        _text_pipeline = text_normalizer.build_pipeline(text_normalizer.profile_for(APP_SETTINGS),
+                                                        timed=APP_SETTINGS["text_pipeline_timing"])
+        print(f"Text profile: '{_text_pipeline.name}' ({', '.join(_text_pipeline.stage_names)})")
+    return _text_pipeline
+
+def set_text_profile(profile=None, renpy_mode=None):
+    """
+    Switches the cleaning pipeline at runtime (no restart). `profile` is a profile name or "auto"
+    (follow Renpy Mode). text_profiles.json is re-read, so edited stages apply on the next switch.
+    """
+    global _text_pipeline
+    if profile is not None:
+        APP_SETTINGS["text_profile"] = profile
+    if renpy_mode is not None:
+        APP_SETTINGS["renpy_mode"] = renpy_mode
+    # Built first, then swapped in with one assignment; a scan in progress finishes on the old one
+    _text_pipeline = text_normalizer.build_pipeline(text_normalizer.profile_for(APP_SETTINGS),
+                                                    timed=APP_SETTINGS["text_pipeline_timing"])
+    print(f"Text profile switched to '{_text_pipeline.name}' ({', '.join(_text_pipeline.stage_names)})")
+    return _text_pipeline
+
+def clean_text_content(text):
+    """
+    Applies all regex and replacement logic to clean the text.
+    Runs the stages of the active text profile (APP_SETTINGS['text_profile'], default follows renpy_mode),
+    then spell correction if enabled.
+    """
+    text = get_text_pipeline()(text)
+    get_allowed_words()
+    if spell_corrector is not None and APP_SETTINGS["spell_correction"]:
+        text = spell_corrector.correct(text)
+    return text
+
+def is_text_valid(text):
+    """Checks if the text contains at least one allowed word, or if validation is disabled."""
+    global ALLOWED_WORDS
+
+    if get_allowed_words() is None:
+        return True # Validation disabled, always allow
+
+    if not text:
+        return False
+        
+    text_lowercase = text.lower()
+    words = [word.strip('.,?!:;"\'()[]{}') for word in text_lowercase.split()]
+
+    for clean_word in words:
+        # Simple check: remove common trailing punctuation for word validation
+        if clean_word in ALLOWED_WORDS:
+            return True
+
+    # Nothing matched exactly: accept a word that is one OCR slip away from a known word
+    max_distance = APP_SETTINGS["validation_max_edit_distance"]
+    if max_distance > 0:
+        for clean_word in words:
+            if len(clean_word) >= MIN_FUZZY_WORD_LENGTH and ALLOWED_WORDS.lookup(clean_word, max_distance):
+                return True
+
+    return False
@@ -0,0 +1,224 @@
+# tracing.py
+# -*- coding: utf-8 -*-
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# --- Configuration ---
+WINDOW_SECONDS = 60        # live stats cover this much recent history
+MAX_SAMPLES = 1024         # per span name; older samples fall out of the window anyway
+EXPORT_INTERVAL = 1.0      # seconds between writes to the JSONL file
+EXPORT_QUEUE = 10000       # records waiting for the writer; the oldest are dropped if it falls behind
+DEFAULT_TRACE_FILE_MB = 5
+TRACE_FILE_BACKUPS = 2     # traces.jsonl.1, traces.jsonl.2
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "fields", "start")
+
+    def __init__(self, tracer, name, fields):
+        self.tracer = tracer
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.name, (time.perf_counter() - self.start) * 1000, **self.fields)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    """
+    Spans, counters and gauges for the hot paths (capture, OCR, cleaning, synthesis, playback).
+
+    Recording is a perf_counter() pair and a deque append, with no lock and no I/O, so it can stay
+    on in production; a background thread writes the records to a size-capped JSONL file.
+    snapshot() summarizes the last WINDOW_SECONDS for the metrics panel. Probes are callables
+    read only when a snapshot or export is taken, for values that already live elsewhere
+    (ring buffer underflows, event bus queue depth) and so cost nothing on the hot path.
+    """
+    def __init__(self):
+        self.enabled = True
+        self.path = None
+        self.max_bytes = DEFAULT_TRACE_FILE_MB * 1024 * 1024
+        self._samples = {}  # span name -> deque of (end perf_counter, ms)
+        self._counters = {}
+        self._gauges = {}
+        self._probes = {}
+        self._export = deque(maxlen=EXPORT_QUEUE)
+        self._writer = None
+        self._lock = threading.Lock() # only for creating entries and for the writer
+        self._count_lock = threading.Lock() # counters are read-modify-write from several threads
+        self._flush_lock = threading.Lock() # the writer thread and atexit may flush at once
+        self.dropped = 0
+
+    # --- Setup ---
+
+    def configure(self, enabled=True, path=None, max_mb=DEFAULT_TRACE_FILE_MB):
+        """Turns recording on/off and sets the export file (None = no file)."""
+        self.enabled = enabled
+        self.path = path if enabled else None
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        if self.path and self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.flush) # the writer is a daemon thread; don't lose the last second
+
+    def probe(self, name, read):
+        """Registers a gauge read on demand: `read()` returns a number."""
+        self._probes[name] = read
+
+    # --- Recording (any thread) ---
+
+    def span(self, name, **fields):
+        """Context manager timing its block in ms: `with tracer.span("ocr"): ...`"""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name, fields)
+
+    def record(self, name, ms, **fields):
+        """Adds one timing sample (for work timed elsewhere, e.g. per sentence of a batch)."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        samples = self._samples.get(name)
+        if samples is None:
+            with self._lock:
+                samples = self._samples.setdefault(name, deque(maxlen=MAX_SAMPLES))
+        samples.append((now, ms))
+        if self.path:
+            if len(self._export) == EXPORT_QUEUE:
+                self.dropped += 1
+            self._export.append((time.time(), name, ms, fields))
+
+    def count(self, name, n=1):
+        if self.enabled:
+            with self._count_lock:
+                self._counters[name] = self._counters.get(name, 0) + n
+
+    def gauge(self, name, value):
+        if self.enabled:
+            self._gauges[name] = value
+
+    # --- Reading ---
+
+    def _read_gauges(self):
+        gauges = dict(self._gauges)
+        for name, read in list(self._probes.items()):
+            try:
+                gauges[name] = read()
+            except Exception:
+                pass
+        return gauges
+
+    def snapshot(self, window=WINDOW_SECONDS):
+        """Per span: count, rate/s, mean/p50/p95/max ms over the last `window` seconds; plus counters and gauges."""
+        cutoff = time.perf_counter() - window
+        spans = {}
+        for name, samples in list(self._samples.items()):
+            recent = [ms for end, ms in list(samples) if end >= cutoff]
+            if not recent:
+                continue
+            ordered = sorted(recent)
+            pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+            spans[name] = {
+                "count": len(ordered),
+                "rate_per_s": round(len(ordered) / window, 2),
+                "mean_ms": round(sum(ordered) / len(ordered), 2),
+                "p50_ms": round(pick(0.5), 2),
+                "p95_ms": round(pick(0.95), 2),
+                "max_ms": round(ordered[-1], 2),
+            }
+        with self._count_lock:
+            counters = dict(self._counters)
+        return {"spans": spans, "counters": counters, "gauges": self._read_gauges()}
+
+    # --- Export ---
+
+    def _rotate(self):
+        for index in range(TRACE_FILE_BACKUPS, 0, -1):
+            source = self.path if index == 1 else f"{self.path}.{index - 1}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index}")
+
+    def flush(self):
+        """Writes queued records (and current counters/gauges) to the trace file."""
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self):
+        path = self.path
+        if not path:
+            self._export.clear()
+            return
+        lines = []
+        while True:
+            try:
+                wall, name, ms, fields = self._export.popleft()
+            except IndexError:
+                break
+            record = {"t": round(wall, 3), "span": name, "ms": round(ms, 3)}
+            if fields:
+                record.update(fields)
+            lines.append(json.dumps(record))
+        if not lines:
+            return
+        with self._count_lock:
+            counters = dict(self._counters)
+        lines.append(json.dumps({"t": round(time.time(), 3), "counters": counters, "gauges": self._read_gauges()}))
+        with self._lock:
+            try:
+                if os.path.exists(path) and os.path.getsize(path) >= self.max_bytes:
+                    self._rotate()
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            except OSError as e:
+                print(f"Tracing: could not write {path}: {e}")
+                self.path = None
+
+    def _write_loop(self):
+        while True:
+            time.sleep(EXPORT_INTERVAL)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Tracing: export failed: {e}")
+
+
+def format_snapshot(snapshot):
+    """Plain-text table of a snapshot, for the metrics panel and console dumps."""
+    lines = [f"{'span':<14}{'count':>7}{'/s':>7}{'mean':>9}{'p50':>9}{'p95':>9}{'max':>9}   (ms)"]
+    for name, s in sorted(snapshot["spans"].items()):
+        lines.append(f"{name:<14}{s['count']:>7}{s['rate_per_s']:>7.1f}{s['mean_ms']:>9.1f}"
+                     f"{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['max_ms']:>9.1f}")
+    if not snapshot["spans"]:
+        lines.append("(nothing recorded in the last minute)")
+    values = sorted(snapshot["counters"].items()) + sorted(snapshot["gauges"].items())
+    if values:
+        lines.append("")
+        for name, value in values:
+            lines.append(f"{name:<28}{value:>10.1f}" if isinstance(value, float) else f"{name:<28}{value:>10}")
+    return "\n".join(lines)
+
+
+# Shared instance, like event_bus.bus: the scanner, engine and GUI all record here.
+tracer = Tracer()
@@ -4,28 +4,32 @@
 import tkinter as tk
 from tkinter import messagebox, scrolledtext, simpledialog
 from PIL import Image
-import pytesseract
 import threading
 from pynput import keyboard
 from pynput import mouse
 import time
-import numpy as np
-import cv2
 import os
-import pyautogui
 import keyboard # Import for global hotkey
 import json 
-import re # NEW: Added for text cleaning regex
+import hashlib
+from collections import OrderedDict
+import event_bus
+import ocr_backend
+import frame_diff
+import capture_backend
+import scan_service
+from tracing import tracer
+from text_validation import (APP_SETTINGS, clean_text_content, get_allowed_words, get_text_pipeline,
+                             is_text_valid, set_text_profile)
 
 # --- Global Configuration and Styling ---
-COMM_FILE = "tts_input.txt"
-TRIGGER_FILE = "tts_trigger.txt" # Must match TTS AI.py
-CANCEL_FILE = "tts_cancel.txt"   # Must match TTS AI.py
 CONFIG_FILE = "config.json" 
 
 # NEW: Continuous Scan Configuration
 MAX_SCAN_TIME = 20 # seconds
-SCAN_INTERVAL = 0.25 # seconds between retries
+SCAN_INTERVAL_FAST = 0.05 # seconds between frames right after a click / while the ROI changes
+SCAN_INTERVAL_SLOW = 0.5  # backs off to this while the ROI stays unchanged
+OCR_CACHE_SIZE = 256 # distinct subtitle boxes remembered (menus, choices, rollback)
 
 # Dark theme colors (Defined globally for accessibility)
 BG_COLOR = "#2e2e2e"
@@ -40,6 +44,10 @@ DEFAULT_TESSERACT_PATH = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 # --- Globals ---
 roi_rect = None  # (x1, y1, x2, y2) - Absolute screen coordinates
 tesseract_path = DEFAULT_TESSERACT_PATH
+_ocr_backend = None # created on first scan, recreated when the Tesseract path changes
+_capture_backend = None # created on first scan; see set_capture_backend() for headless use
+_white_masker = None
+_backend_lock = threading.RLock() # the warm-up thread and the first scan may race to create backends
 
 # --- Configuration Persistence Helpers ---
 
@@ -81,120 +89,6 @@ def save_config_roi(rect):
     except Exception as e:
         print(f"Error saving ROI config: {e}")
 
-# --- Text Validation and Cleaning (MOVED FROM TTS_AI.py) ---
-
-def load_app_settings():
-    """Loads application settings, notably renpy_mode."""
-    config = {"renpy_mode": False} # Default
-    try:
-        if os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, 'r') as f:
-                config_data = json.load(f)
-                if 'renpy_mode' in config_data:
-                    config['renpy_mode'] = config_data['renpy_mode']
-    except Exception as e:
-        print(f"Error loading app settings from config: {e}")
-    return config
-
-APP_SETTINGS = load_app_settings()
-
-def load_word_list(filename="top_words.txt"):
-    """Reads the contents of the file and loads them into the AllowedWords set."""
-    print("reading top_words.txt for validation...")
-    AllowedWords = set()
-    try:
-        with open(filename, 'r', encoding='utf-8') as file:
-            for line in file:
-                word = line.strip().lower() 
-                if word:
-                    AllowedWords.add(word)
-        print(f"Loaded {len(AllowedWords)} words for validation.")
-        return AllowedWords
-    except FileNotFoundError:
-        print(f"Warning: The file '{filename}' was not found. Text validation disabled.")
-        return None # Indicate validation is disabled
-
-ALLOWED_WORDS = load_word_list()
-
-# Helper functions for clean_text_content
-def collapse_repeats(match):
-    return match.group(1) + (match.group(2) if match.group(2) else "")
-
-vocalizations = {"A": "Ah", "O": "Oh", "H": "Hhh", "E": "Ehh", "U": "Uhh"}
-def replace_vocal(match):
-    word = match.group(0)
-    return vocalizations.get(word, word)
-
-def clean_text_content(text):
-    """
-    Applies all regex and replacement logic to clean the text.
-    Uses the global APP_SETTINGS['renpy_mode'].
-    """
-    if not text:
-        return ""
-
-    # Renpy Mode Preprocessing
-    if APP_SETTINGS["renpy_mode"]:
-        text = text.replace('\n', ' ')
-        text = re.sub(r'^\s*".*?"\s*', '', text, flags=re.MULTILINE)
-        text = re.sub(r'^\s*[^:]+:\s*', '', text, flags=re.MULTILINE)
-        text = text.strip()
-        
-        # Renpy specific character fixes
-        text = text.replace("|", "I")
-        text = text.replace("$", "s")
-        text = text.replace("[", "I")
-        text = text.replace("]", "I")
-        text = text.replace("{", "I")
-        text = text.replace("}", "I")
-        text = text.replace("@", "0")
-        text = text.replace("sigh", "")
-        text = text.replace("whisper", "")
-        # FIX: Added 'text' argument to re.sub
-        text = re.sub(r'\bOoh\b', 'Oh', text, flags=re.IGNORECASE)
-
-        # Replace number 0 with letter 'o' when next to letters
-        text = re.sub(r'(?i)(?<=([a-z]))0|0(?=([a-z]))', 'o', text)
-
-    text = re.sub(r'oz', 'ounces', text, flags=re.IGNORECASE)
-
-    # Collapse repeated letters
-    text = re.sub(r'\b(\w)(\1+)?', collapse_repeats, text)
-    text = re.sub(r'\b[A-Za-z]-', '', text)
-
-    # Vocalizations
-    text = re.sub(r'\b[A-Z]\b', replace_vocal, text)
-
-    # Clean punctuation and unwanted sounds
-    text = re.sub(r'\b[mM]{1,3}\b', '', text)
-    text = re.sub(r'\.{2,}', '.', text)
-    text = re.sub(r'\b[.,!?]\b', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    text = re.sub(r'\*', '', text)
-
-    return text
-
-def is_text_valid(text):
-    """Checks if the text contains at least one allowed word, or if validation is disabled."""
-    global ALLOWED_WORDS
-    
-    if ALLOWED_WORDS is None:
-        return True # Validation disabled, always allow
-
-    if not text:
-        return False
-        
-    text_lowercase = text.lower()
-    words = text_lowercase.split()
-
-    for word in words:
-        # Simple check: remove common trailing punctuation for word validation
-        clean_word = word.strip('.,?!:;"\'()[]{}').lower()
-        if clean_word in ALLOWED_WORDS:
-            return True
-    
-    return False
-
 # --- Helper Functions ---
 
 def save_debug_image(img, prefix="debug"):
@@ -220,85 +114,208 @@ def normalize_text(text):
     text = ' '.join(text.split())
     return text
 
-def grab_and_ocr(rect):
-    
-    #Grabs screenshot, preprocesses (white text isolation), runs OCR.
-    
-    global tesseract_path
-
-    pytesseract.pytesseract.tesseract_cmd = tesseract_path
-
+def get_ocr_backend():
+    """Returns the shared OCR engine, loading it (and its language data) only once."""
+    global _ocr_backend
+    with _backend_lock:
+        if _ocr_backend is None:
+            _ocr_backend = ocr_backend.create_ocr_backend(tesseract_path, APP_SETTINGS["ocr_backend"])
+        return _ocr_backend
+
+def reset_ocr_backend():
+    """Drops the current engine so the next scan picks up a new Tesseract path."""
+    global _ocr_backend
+    with _backend_lock:
+        if _ocr_backend is not None:
+            _ocr_backend.close()
+            _ocr_backend = None
+
+def get_capture_backend():
+    """Returns the shared screen grabber and white-text masker, creating them on first use."""
+    global _capture_backend, _white_masker
+    with _backend_lock:
+        if _capture_backend is None:
+            _capture_backend = capture_backend.create_capture_backend(APP_SETTINGS["capture_backend"])
+        if _white_masker is None:
+            _white_masker = capture_backend.WhiteMasker()
+        return _capture_backend
+
+def set_capture_backend(backend):
+    """Swaps the grabber, e.g. for capture_backend.ArrayCapture in headless tests and benchmarks."""
+    global _capture_backend
+    if _capture_backend is not None and _capture_backend is not backend:
+        _capture_backend.close()
+    _capture_backend = backend
+
+def grab_mask(rect):
+    """
+    Grabs the ROI and isolates white text.
+    Returns (mask, None) on success or (None, error_text) on failure.
+    The mask lives in a reused buffer and is overwritten by the next grab on this thread.
+    """
     if not rect:
-        return "", None
+        return None, ""
 
     x1, y1, x2, y2 = rect
     width = x2 - x1
     height = y2 - y1
 
     if width <= 0 or height <= 0:
-        return f"Capture Error: Invalid ROI dimensions (W:{width}, H:{height}). Please reselect a valid area (min 10x10).", None
+        return None, f"Capture Error: Invalid ROI dimensions (W:{width}, H:{height}). Please reselect a valid area (min 10x10)."
 
     # 1. Capture the region
+    backend = get_capture_backend()
     try:
-        img_pil = pyautogui.screenshot(region=(x1, y1, width, height))
+        with tracer.span("capture"):
+            frame = backend.grab(rect)
     except Exception as e:
-        return f"Capture Error (pyautogui): {e}", None
+        tracer.count("capture_errors")
+        return None, f"Capture Error ({backend.name}): {e}"
 
-    img_cv = np.array(img_pil)
-    img_cv = cv2.cvtColor(img_cv, cv2.COLOR_RGB2BGR)
-
-    # 2. Preprocessing (Color Masking for White Text)
-    hsv = cv2.cvtColor(img_cv, cv2.COLOR_BGR2HSV)
-    lower_white = np.array([0, 0, 180], dtype=np.uint8)
-    upper_white = np.array([179, 70, 255], dtype=np.uint8)
-    mask = cv2.inRange(hsv, lower_white, upper_white)
+    # 2. Preprocessing (Color Masking for White Text, straight from the captured layout)
+    with tracer.span("mask"):
+        mask = _white_masker.compute(frame)
+    return mask, None
 
+def ocr_mask(mask):
+    """Runs OCR on a white-text mask. Returns (text, processed_img_pil) like grab_and_ocr."""
     processed_image = mask
-    processed_img_pil = Image.fromarray(processed_image)
+    processed_img_pil = Image.fromarray(processed_image.copy()) # the mask buffer gets reused
 
     # 3. Run OCR
     try:
-        # Use PSM 6 (single text line) is often best for subtitles.
-        text = pytesseract.image_to_string(processed_img_pil, config='--oem 3 --psm 6')
+        # Use PSM 6 (single text block) is often best for subtitles.
+        with tracer.span("ocr"):
+            text = get_ocr_backend().image_to_string(processed_image)
         return text.strip(), processed_img_pil
-    except pytesseract.TesseractNotFoundError:
+    except ocr_backend.OcrEngineNotFound:
         return "Tesseract Error: Path incorrect or Tesseract missing!", processed_img_pil
     except Exception as e:
         return f"OCR Runtime Error: {e}", processed_img_pil
 
+class OcrResultCache:
+    """
+    LRU cache from a hash of the binarized mask to (raw_text, cleaned_text, is_valid).
+    A pixel-identical subtitle box skips Tesseract and the whole cleaning/validation pipeline.
+    """
+    def __init__(self, max_entries=OCR_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(mask):
+        digest = hashlib.blake2b(mask.tobytes(), digest_size=16)
+        digest.update(repr(mask.shape).encode("ascii"))
+        # Cleaning depends on the text profile, so the same pixels can mean different text
+        return digest.digest(), get_text_pipeline()
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+ocr_result_cache = OcrResultCache()
+
+def recognize_mask(mask):
+    """
+    OCR + clean + validate one mask, reusing the stored result for a repeated frame.
+    Returns (raw_text, processed_img_pil, cleaned_text, is_valid). Errors are never cached.
+    """
+    key = ocr_result_cache.key_for(mask)
+    cached = ocr_result_cache.get(key)
+    if cached is not None:
+        tracer.count("ocr_cache_hits")
+        raw_text, current_text, is_valid = cached
+        return raw_text, Image.fromarray(mask.copy()), current_text, is_valid
+
+    raw_text, processed_img = ocr_mask(mask)
+    if "Error" in raw_text:
+        return raw_text, processed_img, "", False
+
+    with tracer.span("clean"):
+        current_text = clean_text_content(raw_text)
+    with tracer.span("validate"):
+        is_valid = is_text_valid(current_text)
+    ocr_result_cache.put(key, (raw_text, current_text, is_valid))
+    return raw_text, processed_img, current_text, is_valid
+
+def grab_and_ocr(rect):
+    
+    #Grabs screenshot, preprocesses (white text isolation), runs OCR.
+
+    mask, error = grab_mask(rect)
+    if mask is None:
+        return error, None
+    return ocr_mask(mask)
+
 def update_monitor_display(text_widget, text):
     """Updates the text box in the ScannerApp GUI."""
     text_widget.delete("1.0", tk.END)
     text_widget.insert("1.0", text)
 
 
+# The legacy file protocol is only used when nobody in this process is listening on the bus
+# (window_scanner.py launched on its own, talking to a TTS_AI.py with 'file_ipc_compat' on).
+# Writing it as well when the player is in this process would make every scan speak twice.
+file_trigger_adapter = event_bus.FileTriggerAdapter()
+
+def _use_file_protocol():
+    return not event_bus.bus.has_subscribers(event_bus.SPEAK)
+
+def _publish_scan_text(text):
+    """Sends recognized text to the TTS player: a speak event if there is text, else a text update."""
+    if normalize_text(text):
+        event_bus.bus.publish(event_bus.SPEAK, text, source="scanner")
+    else:
+        event_bus.bus.publish(event_bus.TEXT_UPDATE, "", source="scanner")
+    if _use_file_protocol():
+        file_trigger_adapter.write_text(text)
+
+def _publish_cancel():
+    event_bus.bus.publish(event_bus.CANCEL, source="scanner")
+    if _use_file_protocol():
+        file_trigger_adapter.write_cancel()
+
 def _write_communication_files(text, processed_img, app_instance):
-    """Shared logic for writing text to files and saving debug images."""
+    """Shared logic for sending text to the TTS player and saving debug images."""
     current_normalized_text = normalize_text(text)
 
-    # 1. Write recognized text or clear the file
-    with open(COMM_FILE, 'w', encoding='utf-8') as f:
-        f.write(text)
+    _publish_scan_text(text)
 
-    # 2. Write the trigger file only if meaningful text was detected
     if current_normalized_text:
-        with open(TRIGGER_FILE, 'w', encoding='utf-8') as f:
-            f.write("SPEAK")
-
         if app_instance.save_images_var.get() and processed_img:
             app_instance.text_widget.master.after(0, lambda img=processed_img: save_debug_image(img, prefix="change"))
         return True
-    else:
-        # If no text, ensure any old trigger is cleared
-        if os.path.exists(TRIGGER_FILE):
-            os.remove(TRIGGER_FILE)
-        return False
+    return False
 
 
-def perform_single_scan(text_widget, app_instance):
+def perform_single_scan(text_widget, app_instance, job=None):
     """
     Performs a single capture, OCR, cleans and validates text, and updates files.
-    Used for the 'Ctrl+R' key (Scan Only).
+    Used for the 'Ctrl+R' key (Scan Only). Nothing is sent if `job` was cancelled meanwhile.
     """
     global roi_rect
 
@@ -306,7 +323,12 @@ def perform_single_scan(text_widget, app_instance):
         text_widget.master.after(0, lambda t="Scan Error: ROI not selected.": update_monitor_display(text_widget, t))
         return
 
-    raw_text, processed_img = grab_and_ocr(roi_rect)
+    mask, capture_error = grab_mask(roi_rect)
+    if mask is not None:
+        # Cleans and validates too, or reuses the result for a frame seen before
+        raw_text, processed_img, current_text, is_valid = recognize_mask(mask)
+    else:
+        raw_text, processed_img = capture_error, None
     is_error = "Error" in raw_text
 
     # Update the GUI text box with raw text immediately
@@ -317,10 +339,6 @@ def perform_single_scan(text_widget, app_instance):
         if app_instance.save_images_var.get() and processed_img:
             text_widget.master.after(0, lambda img=processed_img: save_debug_image(img, prefix="error"))
         return # Stop on error
-    
-    # NEW: Clean and Validate
-    current_text = clean_text_content(raw_text)
-    is_valid = is_text_valid(current_text)
 
     if not is_valid:
         # If invalid, write empty string to comm file and clear trigger
@@ -328,6 +346,10 @@ def perform_single_scan(text_widget, app_instance):
         text_widget.master.after(0, lambda t=f"{raw_text}\n[Text Invalid: No Allowed Words Found]": update_monitor_display(text_widget, t))
         print("Single scan: Text invalid, files cleared.")
 
+    if job is not None and job.cancelled:
+        print("Single scan: Cancelled, nothing sent.")
+        return
+
     # --- Write to files ---
     try:
         # Use the cleaned/empty text for writing. _write_communication_files handles the trigger/file writing.
@@ -339,79 +361,92 @@ def perform_single_scan(text_widget, app_instance):
         print(f"Error writing to communication file or trigger file: {e}")
 
 
-def perform_continuous_scan(text_widget, app_instance):
+def continuous_scan_step(job):
     """
-    Performs continuous capture and OCR until VALID text is found or MAX_SCAN_TIME expires.
-    Used for the Spacebar hotkey (Click & Scan).
+    One frame of the continuous scan (Spacebar hotkey, Click & Scan), driven by ScanService.
+    Returns FOUND once valid text was sent, FAILED on a fatal error, otherwise CHANGING/STABLE
+    so the service can speed up or back off.
     """
-    global roi_rect
-    start_time = time.time()
-    scan_count = 0
-
-    print(f"Continuous scan loop started. Max time: {MAX_SCAN_TIME}s.") 
-
+    text_widget, app_instance = job.context
     if not roi_rect:
         text_widget.master.after(0, lambda t="Scan Error: ROI not selected.": update_monitor_display(text_widget, t))
-        return
+        return scan_service.FAILED
+
+    # Skips Tesseract while the ROI is unchanged or still animating (typewriter text)
+    change_detector = job.state.setdefault("detector", frame_diff.FrameChangeDetector())
+
+    mask, capture_error = grab_mask(roi_rect)
+    if mask is not None:
+        decision = change_detector.check(mask)
+        if decision == frame_diff.SKIP_UNCHANGED:
+            tracer.count("frames_unchanged")
+            return scan_service.STABLE
+        if decision == frame_diff.SKIP_SETTLING:
+            tracer.count("frames_settling")
+            return scan_service.CHANGING
+        # Cleans and validates too, or reuses the result for a frame seen before
+        raw_text, processed_img, current_text, is_valid = recognize_mask(mask)
+    else:
+        raw_text, processed_img = capture_error, None
 
-    # Loop for MAX_SCAN_TIME or until VALID text is found
-    while time.time() - start_time < MAX_SCAN_TIME:
-        scan_count += 1
-        
-        if scan_count > 1:
-            print(f"[{scan_count}/{int(MAX_SCAN_TIME/SCAN_INTERVAL) + 1}] Retrying scan...")
+    if change_detector.ocr_calls > 1:
+        print(f"[frame {job.frames + 1}] Retrying scan... (OCR calls avoided so far: {change_detector.ocr_avoided})")
 
-        raw_text, processed_img = grab_and_ocr(roi_rect)
-        is_error = "Error" in raw_text
+    is_error = "Error" in raw_text
+
+    # 1. Update the GUI text box with raw text
+    text_widget.master.after(0, lambda t=raw_text: update_monitor_display(text_widget, t))
+
+    # Check for errors
+    if is_error:
+        print(f"OCR Error detected: {raw_text}")
+        if app_instance.save_images_var.get() and processed_img:
+            text_widget.master.after(0, lambda img=processed_img: save_debug_image(img, prefix="error"))
+        _write_communication_files("", None, app_instance) 
+        return scan_service.FAILED # EXIT the scan on fatal error
 
-        # 1. Update the GUI text box with raw text
-        text_widget.master.after(0, lambda t=raw_text: update_monitor_display(text_widget, t))
+    # A cancel that arrived during capture/OCR must not be followed by a speak request
+    if job.cancelled:
+        return scan_service.FAILED
 
-        # Check for errors
-        if is_error:
-            print(f"OCR Error detected: {raw_text}")
-            if app_instance.save_images_var.get() and processed_img:
-                text_widget.master.after(0, lambda img=processed_img: save_debug_image(img, prefix="error"))
-            _write_communication_files("", None, app_instance) 
-            return # EXIT the scan loop on fatal error
+    # 2. Check for found/valid text
+    if is_valid and current_text:
+        try:
+            # Send the *cleaned* text
+            if _write_communication_files(current_text, processed_img, app_instance):
+                print(f"Continuous scan: Valid text detected on frame {job.frames + 1}. Sending text and stopping. OCR stats: {change_detector.stats()}, cache: {ocr_result_cache.stats()}")
+                return scan_service.FOUND # EXIT the scan upon success
+        except Exception as e:
+            print(f"Error writing communication file or trigger file: {e}")
+            return scan_service.FAILED # EXIT on file error
 
-        # 2. NEW: Clean and Validate the text
-        current_text = clean_text_content(raw_text)
-        is_valid = is_text_valid(current_text)
+    # 3. Text not found or invalid, keep polling
+    time_left = MAX_SCAN_TIME - (time.perf_counter() - job.created_at)
 
-        # 3. Check for found/valid text
-        if is_valid and current_text:
-            try:
-                # Write the *cleaned* text and trigger
-                if _write_communication_files(current_text, processed_img, app_instance):
-                    print(f"Continuous scan: Valid text detected on scan {scan_count}. Writing files and stopping.")
-                    return # EXIT the scan loop upon success
-            except Exception as e:
-                print(f"Error writing communication file or trigger file: {e}")
-                return # EXIT on file error
-
-        # 4. Text not found or invalid, wait and retry
-        time_elapsed = time.time() - start_time
-        time_left = MAX_SCAN_TIME - time_elapsed
-        
-        # Update GUI if invalid text was found, to show the reason
-        if not is_valid and current_text:
-             text_widget.master.after(0, lambda t=f"{raw_text}\n[Invalid/Filtered - Retrying {time_left:.2f}s left]": update_monitor_display(text_widget, t))
-        
-        time.sleep(SCAN_INTERVAL)
+    # Update GUI if invalid text was found, to show the reason
+    if not is_valid and current_text:
+         text_widget.master.after(0, lambda t=f"{raw_text}\n[Invalid/Filtered - Retrying {time_left:.2f}s left]": update_monitor_display(text_widget, t))
 
-    # If the loop finishes without finding valid text
-    print(f"Continuous scan terminated: Maximum time ({MAX_SCAN_TIME}s) reached. No valid text found.")
+    return scan_service.CHANGING
 
-    # Clear communication files upon timeout
+
+def continuous_scan_timeout(job):
+    """Called by ScanService when a continuous scan found no valid text within MAX_SCAN_TIME."""
+    text_widget, app_instance = job.context
+    change_detector = job.state.get("detector")
+    print(f"Continuous scan terminated: Maximum time ({MAX_SCAN_TIME}s) reached. No valid text found. OCR stats: {change_detector.stats() if change_detector else {}}")
+
+    # Tell the player nothing was found upon timeout
     text_widget.master.after(0, lambda t="Scan Timeout: No valid text found within limits.": update_monitor_display(text_widget, t))
     try:
-        with open(COMM_FILE, 'w', encoding='utf-8') as f:
-            f.write("")
-        if os.path.exists(TRIGGER_FILE):
-            os.remove(TRIGGER_FILE)
+        _publish_scan_text("")
     except Exception as e:
-        print(f"Error clearing files after timeout: {e}")
+        print(f"Error publishing scan timeout: {e}")
+
+
+def single_scan_step(job):
+    perform_single_scan(*job.context, job=job)
+    return scan_service.FOUND
 
 
 # --- Scanner Application GUI (Control Panel) ---
@@ -484,6 +519,19 @@ class ScannerApp:
 
         tk.Label(button_frame, text="Scan Only (Ctrl+R)", fg=FG_COLOR, bg=BG_COLOR, font=("Arial", 10)).pack(side=tk.LEFT, padx=15) # MODIFIED FOR CTRL+R
 
+        # One long-lived scan thread per window; new requests supersede the running scan
+        self.scan_service = scan_service.ScanService(
+            step=continuous_scan_step,
+            single_step=single_scan_step,
+            on_timeout=continuous_scan_timeout,
+            on_state=lambda active: self.master.after(0, lambda: self._on_scan_state(active)),
+            fast_interval=SCAN_INTERVAL_FAST,
+            slow_interval=SCAN_INTERVAL_SLOW,
+            max_scan_time=MAX_SCAN_TIME
+        )
+        # Cancel (hotkey, button, control API) stops a running scan as well as the speech
+        event_bus.bus.subscribe(event_bus.CANCEL, self._on_cancel_event)
+
         # CRITICAL FIX: Call the new helper function after setting up widgets
         self.update_roi_status_label()
 
@@ -517,6 +565,7 @@ class ScannerApp:
         if new_path:
             if os.path.exists(new_path) and os.path.isfile(new_path):
                 tesseract_path = new_path
+                reset_ocr_backend()
                 self.tesseract_path_var.set(tesseract_path)
                 messagebox.showinfo("Success", "Tesseract path updated successfully!")
             else:
@@ -601,26 +650,22 @@ class ScannerApp:
 
     def _trigger_scan_action(self, simulate_click):
         """The core scanning logic, conditionally simulating a left click and choosing scan type."""
-        if not os.path.exists(tesseract_path) or not os.path.isfile(tesseract_path):
+        if get_ocr_backend().requires_executable and not os.path.isfile(tesseract_path):
             messagebox.showerror("Error", "Tesseract executable not found. Please set the correct path above.")
             return
 
-        if roi_rect and self.trigger_btn['state'] == tk.NORMAL:
+        if roi_rect:
 
-            # --- File-Based Cancel for Reliable Stop (Spacebar or Button) ---
+            # --- Cancel current speech (Spacebar or Button) ---
             if simulate_click: # Only cancel if it's the click/scan action
+                self.scan_service.cancel()
                 try:
-                    # 1. Write the dedicated CANCEL file
-                    with open(CANCEL_FILE, 'w', encoding='utf-8') as f:
-                        f.write("CANCEL")
-                    print(f"Wrote cancel file: {CANCEL_FILE}")
-
-                    # 2. Use a small, quick delay (0.1s) to allow the TTS_AI file watcher to process
-                    # the cancel file before the new scan text is written.
-                    time.sleep(0.1)
-
+                    # Events are delivered in order, so this cancel is always handled
+                    # before the speak event of the scan that follows; no delay needed.
+                    _publish_cancel()
+                    print("Published cancel event.")
                 except Exception as e:
-                    print(f"Error writing cancel file: {e}")
+                    print(f"Error publishing cancel event: {e}")
             # -----------------------------------------------------------------------
 
 
@@ -639,36 +684,41 @@ class ScannerApp:
             self.adjust_btn.config(state=tk.DISABLED)
 
             # --- Select Scan Type (UNAMBIGUOUS LOGIC) ---
+            # A press while a scan is running restarts it instead of starting a second one.
             if simulate_click:
                  # Hotkey is SPACEBAR or GUI Button
-                 scan_target = perform_continuous_scan
-                 self.trigger_btn.config(state=tk.DISABLED, text="Scanning (Continuous)...")
+                 scan_mode = scan_service.CONTINUOUS
+                 self.trigger_btn.config(text="Scanning (Continuous)...")
                  print("DEBUG: Selected CONTINUOUS scan (Spacebar/Button).")
             else:
                  # Hotkey is 'Ctrl+R'
-                 scan_target = perform_single_scan
-                 self.trigger_btn.config(state=tk.DISABLED, text="Scanning (Single)...")
+                 scan_mode = scan_service.SINGLE
+                 self.trigger_btn.config(text="Scanning (Single)...")
                  print("DEBUG: Selected SINGLE scan (Ctrl+R key).")
 
-            # Start the scan thread with the selected target function
-            scan_thread = threading.Thread(target=scan_target, args=(self.text_widget, self), daemon=True)
-            scan_thread.start()
-
-            self.master.after(100, lambda: self._check_scan_thread(scan_thread))
+            self.scan_service.request(scan_mode, context=(self.text_widget, self))
 
         elif not roi_rect:
             messagebox.showwarning("Warning", "Please select the area (ROI) first.")
 
-    def _check_scan_thread(self, thread):
-        """Checks if the scan thread is done and re-enables the button."""
-        if thread.is_alive():
-            self.master.after(100, lambda: self._check_scan_thread(thread))
-        else:
-            self.trigger_btn.config(state=tk.NORMAL, text="Click & Scan (Spacebar)")
+    def _on_cancel_event(self, event):
+        # Our own cancel is published just before the scan it precedes; that scan must keep running
+        if event.source != "scanner":
+            self.scan_service.cancel()
+
+    def _on_scan_state(self, active):
+        """Runs on the Tk thread when the scan service starts or goes idle."""
+        if not active:
+            self.trigger_btn.config(text="Click & Scan (Spacebar)")
             self.adjust_btn.config(state=tk.NORMAL)
-            print("Scan thread terminated.")
+            print(f"Scan finished. Scan stats: {self.scan_service.stats()}")
+            text_pipeline = get_text_pipeline()
+            if text_pipeline.timed:
+                print(f"Text stage timings ({text_pipeline.name}): {text_pipeline.stats()}")
 
     def on_closing(self):
+        event_bus.bus.unsubscribe(event_bus.CANCEL, self._on_cancel_event)
+        self.scan_service.stop()
         # Clean up the global hotkeys
         try:
             keyboard.remove_hotkey('space')
@@ -765,8 +815,20 @@ class AreaSelector:
 
 # --- Main Execution (Same as before) ---
 
+def warm_up_scanner():
+    """Loads the lexicon, OCR engine and capture stack (cv2, mss) so the first scan does not wait on them."""
+    start = time.perf_counter()
+    try:
+        get_allowed_words()
+        get_ocr_backend()
+        get_capture_backend()
+        print(f"Scanner warm-up finished in {(time.perf_counter() - start) * 1000:.0f} ms.")
+    except Exception as e:
+        print(f"Scanner warm-up failed (will retry on first scan): {e}")
+
 def launch_scanner_app():
     """Initial function to launch the main scanner control GUI."""
+    threading.Thread(target=warm_up_scanner, name="scanner-warm-up", daemon=True).start()
     root_scanner = tk.Tk()
     app = ScannerApp(root_scanner)
     root_scanner.mainloop()